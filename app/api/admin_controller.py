@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from app.api.dependencies import require_role
+from app.db.models import User
+from app.db.slow_queries import slow_query_log
+import logging
+
+logger = logging.getLogger("app.admin")
+
+admin_router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@admin_router.get("/slow-queries")
+def get_slow_queries(
+    full_scans_only: bool = False,
+    current_admin: User = Depends(require_role(["admin"])),
+):
+    """Recent statements slower than SLOW_QUERY_MS with their query plans,
+    most recent first; full_scan marks plans scanning booking_table"""
+    logger.info(f"Slow query log requested by admin: {current_admin.username}")
+    return slow_query_log.entries(full_scans_only=full_scans_only)
+
+
+@admin_router.delete("/slow-queries")
+def clear_slow_queries(current_admin: User = Depends(require_role(["admin"]))):
+    logger.info(f"Slow query log cleared by admin: {current_admin.username}")
+    slow_query_log.clear()
+    return {"message": "Slow query log cleared"}
@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from app.api.dependencies import get_current_user, require_role
-from app.schemas.booking import BookingCreate
+from app.schemas.booking import (
+    BookingBatch,
+    BookingCreate,
+    BookingExport,
+    BookingSeriesCreate,
+    ResolveRequests,
+)
 from app.db.models import User
+from app.schemas.pagination import PageParams
 from app.schemas.times import Times
 from app.services.booking_service import BookingService
 import logging
@@ -56,18 +64,90 @@ def create_booking_request(
         raise
 
 
+@booking_router.post("/batch")
+def create_booking_batch(
+    batch: BookingBatch,
+    current_user: User = Depends(get_current_user),
+    booking_service: BookingService = Depends(),
+):
+    logger.info(
+        f"Creating batch of {len(batch.bookings)} bookings for user "
+        f"{current_user.id} ({batch.mode})"
+    )
+
+    try:
+        result = booking_service.batch_booking_logic(batch, current_user=current_user)
+        logger.info(
+            f"Batch created {result['created']} bookings with {result['failed']} "
+            f"failures for user {current_user.id}"
+        )
+        return result
+    except Exception as e:
+        logger.error(
+            f"Failed to create booking batch for user {current_user.id}: {str(e)}"
+        )
+        raise
+
+
+@booking_router.post("/series")
+def create_booking_series(
+    series: BookingSeriesCreate,
+    current_user: User = Depends(get_current_user),
+    booking_service: BookingService = Depends(),
+):
+    logger.info(
+        f"Creating {series.frequency} booking series for user {current_user.id}, "
+        f"room {series.room_number}"
+    )
+
+    try:
+        result = booking_service.create_series(series, current_user=current_user)
+        logger.info(
+            f"Booking series {result['series_id']} created with "
+            f"{result['created']} occurrences for user {current_user.id}"
+        )
+        return result
+    except Exception as e:
+        logger.error(
+            f"Failed to create booking series for user {current_user.id}: {str(e)}"
+        )
+        raise
+
+
 @booking_router.get("")
 def get_bookings(
+    response: Response,
     booking_service: BookingService = Depends(),
     current_user: User = Depends(get_current_user),
+    page: PageParams = Query(),
 ):
     logger.info(f"Fetching bookings for user {current_user.id}")
     user_id = current_user.id
-    result = booking_service.get_all_your_bookings(user_id)
+    result, next_cursor = booking_service.get_all_your_bookings(user_id, page)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     logger.debug(f"Retrieved bookings for user {current_user.id}")
     return result
 
 
+@booking_router.get("/export")
+def export_bookings(
+    current_admin: User = Depends(require_role(["admin"])),
+    filters: BookingExport = Query(),
+):
+    logger.info(
+        f"Admin {current_admin.username} exporting {filters.status} bookings as {filters.format}"
+    )
+
+    media_type = "text/csv" if filters.format == "csv" else "application/x-ndjson"
+    extension = "csv" if filters.format == "csv" else "ndjson"
+    return StreamingResponse(
+        BookingService.export_bookings(filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="bookings.{extension}"'},
+    )
+
+
 @booking_router.delete("/{booking_id}")
 def delete_a_booking(
     booking_id: int,
@@ -93,15 +173,37 @@ def delete_a_booking(
 
 @booking_router.get("/request")
 def get_all_booking_requests(
+    response: Response,
     _: User = Depends(require_role(["admin"])),
     booking_service: BookingService = Depends(),
+    page: PageParams = Query(),
 ):
     logger.info("Admin fetching all booking requests")
-    result = booking_service.get_all_requests()
+    result, next_cursor = booking_service.get_all_requests(page)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     logger.debug(f"Retrieved booking requests")
     return result
 
 
+@booking_router.post("/request/resolve")
+def resolve_booking_requests(
+    options: ResolveRequests,
+    booking_service: BookingService = Depends(),
+    _: User = Depends(require_role(["admin"])),
+):
+    logger.info(
+        f"Admin resolving booking requests by {options.weight_by} (dry run: {options.dry_run})"
+    )
+
+    result = booking_service.resolve_requests(options)
+    logger.info(
+        f"Resolved booking requests: {len(result['approved'])} approved, "
+        f"{len(result['declined'])} declined"
+    )
+    return result
+
+
 @booking_router.put("/{booking_id}/approve")
 def approve_booking_request(
     booking_id: int,
@@ -1,23 +1,59 @@
 from fastapi import Depends, HTTPException, status
-from app.db.models import User
+from app.auth.principal_cache import Principal, principal_cache
+from app.auth.revocation import revocation_store
+from app.auth.role_bits import has_all_roles, role_registry
 from app.repositories.user_repository import UserRepository
 from app.services.exception_wrapper import handle_db_exceptions
 from app.services.user_service import UserService, oauth2_scheme
+import app.config as Config
 import jwt
 
 
+def _principal_from_claims(payload: dict) -> Principal | None:
+    """Build the principal from signed role claims if they are present and current"""
+    claims = payload.get("user")
+    if not Config.JWT_ROLE_CLAIMS or not {"id", "name", "roles"} <= claims.keys():
+        return None
+    if principal_cache.issued_before_invalidation(
+        claims["username"], payload.get("iat")
+    ):
+        return None
+    return Principal(
+        id=claims["id"],
+        name=claims["name"],
+        username=claims["username"],
+        role_names=tuple(claims["roles"]),
+    )
+
+
 @handle_db_exceptions
 def get_current_user(
     token: str = Depends(oauth2_scheme), user_repo: UserRepository = Depends()
-) -> User:
+) -> Principal:
     try:
-        username = UserService.get_username_from_jwt(token)
-        user = user_repo.get_user_by_username(username)
-        if not user:
+        payload = UserService.decode_token(token)
+        username = payload.get("user").get("username")
+        jti = payload.get("jti")
+        if revocation_store.is_revoked(jti, username, payload.get("iat")):
             raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user"
+                status_code=status.HTTP_403_FORBIDDEN, detail="Token has been revoked"
             )
-        return user
+
+        principal = principal_cache.get(username, jti)
+        if principal:
+            return principal
+
+        principal = _principal_from_claims(payload)
+        if not principal:
+            user = user_repo.get_user_with_roles(username)
+            if not user:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user"
+                )
+            principal = Principal.from_user(user)
+
+        principal_cache.put(username, jti, principal)
+        return principal
     except jwt.PyJWTError:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired token"
@@ -25,8 +61,10 @@ def get_current_user(
 
 
 def require_role(required_roles: list[str]):
-    def dependency(current_user: User = Depends(get_current_user)):
-        if not set(required_roles).issubset(set(current_user.role_names)):
+    required_mask = role_registry.mask(required_roles)
+
+    def dependency(current_user: Principal = Depends(get_current_user)):
+        if not has_all_roles(current_user.role_mask, required_mask):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Insufficient permissions",
@@ -1,5 +1,7 @@
 from datetime import datetime
-from fastapi import APIRouter
+from fastapi import APIRouter, Response, status
+from app.services.password_hasher import password_hasher
+from app.services.warmup import readiness
 
 health_router = APIRouter(prefix="/health", tags=["Health"])
 
@@ -11,3 +13,18 @@ async def healthcheck():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
     }
+
+
+@health_router.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness probe, 503 until this worker has finished warming up"""
+    state = readiness.snapshot()
+    if not state["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return state
+
+
+@health_router.get("/hashing")
+async def hashing_metrics():
+    """Queue and latency metrics for the password hashing pool"""
+    return password_hasher.metrics()
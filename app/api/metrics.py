@@ -0,0 +1,67 @@
+from anyio.to_thread import current_default_thread_limiter
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.db.database import engine
+from app.services.metrics import Gauge, registry
+from app.services.password_hasher import password_hasher
+
+metrics_router = APIRouter(tags=["Metrics"])
+
+
+def _pool_stats() -> dict:
+    pool = engine.pool
+    # not every pool class keeps a fixed size, e.g. the one used for :memory:
+    if not hasattr(pool, "checkedout"):
+        return {}
+    return {
+        ("size",): pool.size(),
+        ("checked_out",): pool.checkedout(),
+        ("overflow",): max(pool.overflow(), 0),
+    }
+
+
+def _threadpool_stats() -> dict:
+    # only callable from the event loop, which is where /metrics is rendered
+    limiter = current_default_thread_limiter()
+    return {("busy",): limiter.borrowed_tokens, ("limit",): limiter.total_tokens}
+
+
+def _hashing_stats() -> dict:
+    stats = password_hasher.metrics()
+    bulk = stats["bulk"]
+    return {
+        ("interactive", "running"): stats["running"],
+        ("interactive", "queued"): stats["queued"],
+        ("interactive", "workers"): stats["workers"],
+        ("bulk", "running"): bulk["running"],
+        ("bulk", "queued"): bulk["queued"],
+        ("bulk", "workers"): bulk["workers"],
+    }
+
+
+Gauge(
+    "db_pool_connections",
+    "SQLAlchemy connection pool size, checked out connections and overflow",
+    _pool_stats,
+    ["state"],
+)
+Gauge(
+    "threadpool_threads",
+    "AnyIO worker threads running sync endpoints and dependencies",
+    _threadpool_stats,
+    ["state"],
+)
+Gauge(
+    "password_hash_jobs",
+    "bcrypt jobs running and queued, and the number of hashing workers, by pool",
+    _hashing_stats,
+    ["pool", "state"],
+)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics for this worker process"""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -1,7 +1,14 @@
+from typing import Optional
 from app.api.dependencies import get_current_user, require_role
 from app.db.models import User
-from app.schemas.room import GetRooms, RoomCreate
-from fastapi import APIRouter, Depends, Query
+from app.schemas.room import (
+    AvailabilityGrid,
+    FreeSlots,
+    GetRooms,
+    RoomCreate,
+    RoomPage,
+)
+from fastapi import APIRouter, Depends, Query, Response
 from app.services.room_service import RoomService
 import logging
 
@@ -21,17 +28,15 @@ def get_available_rooms(
     )
 
     try:
-        # get available rooms
+        # get available rooms with the user's permission to book each
         rooms = room_service.get_available_rooms_time(
-            filters.min_capacity, filters.start_datetime, filters.end_datetime
+            filters.min_capacity,
+            filters.start_datetime,
+            filters.end_datetime,
+            current_user,
+            filters.q,
         )
 
-        # Add permission checking to each room
-        for room_dict in rooms:
-            room_dict["sufficient_roles"] = RoomService.check_user_has_room_permissions(
-                room_dict, current_user
-            )
-
         logger.info(f"Found {len(rooms)} available rooms for user {current_user.id}")
         return {"filters": filters, "rooms": rooms}
 
@@ -42,15 +47,62 @@ def get_available_rooms(
         raise
 
 
+@room_router.get("/availability-grid")
+def get_availability_grid(
+    current_user: User = Depends(get_current_user),
+    room_service: RoomService = Depends(),
+    filters: AvailabilityGrid = Query(),
+):
+    logger.info(
+        f"User {current_user.id} fetching availability grid from {filters.date} "
+        f"for {filters.days} day(s)"
+    )
+
+    try:
+        result = room_service.get_availability_grid(
+            filters.min_capacity, filters.date, filters.days
+        )
+        logger.debug(f"Built availability grid for {len(result['rooms'])} rooms")
+        return result
+    except Exception as e:
+        logger.error(
+            f"Failed to get availability grid for user {current_user.id}: {str(e)}"
+        )
+        raise
+
+
+@room_router.get("/free-slots")
+def get_free_slots(
+    current_user: User = Depends(get_current_user),
+    room_service: RoomService = Depends(),
+    filters: FreeSlots = Query(),
+):
+    logger.info(
+        f"User {current_user.id} searching for {filters.duration_minutes} minute free slots"
+    )
+
+    try:
+        rooms = room_service.get_free_slots(filters, current_user)
+        logger.info(f"Found free slots in {len(rooms)} rooms for user {current_user.id}")
+        return {"filters": filters, "rooms": rooms}
+    except Exception as e:
+        logger.error(f"Failed to get free slots for user {current_user.id}: {str(e)}")
+        raise
+
+
 @room_router.get("/all")
 def get_all_rooms(
+    response: Response,
     current_user: User = Depends(get_current_user),
     room_service: RoomService = Depends(),
+    page: RoomPage = Query(),
 ):
     logger.info(f"User {current_user.id} fetching all rooms")
 
     try:
-        result = room_service.get_all_rooms()
+        result, next_cursor = room_service.get_all_rooms(page)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         logger.debug(f"Retrieved all rooms for user {current_user.id}")
         return result
     except Exception as e:
@@ -76,11 +128,12 @@ def delete_room(
     room_number: str,
     _: User = Depends(require_role(["admin"])),
     room_service: RoomService = Depends(),
+    chunk_size: Optional[int] = Query(None, ge=1),
 ):
     logger.info(f"Admin deleting room: {room_number}")
 
     try:
-        result = room_service.delete_room(room_number)
+        result = room_service.delete_room(room_number, chunk_size=chunk_size)
         logger.info(f"Room {room_number} deleted successfully")
         return result
     except Exception as e:
@@ -0,0 +1,86 @@
+"""Request timing middleware reporting where each request spent its time"""
+
+import logging
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.db.query_stats import RequestStats, current_request_stats
+from app.services.metrics import http_request_duration, http_requests
+import app.config as Config
+
+logger = logging.getLogger("app.timing")
+
+
+def server_timing(stats: RequestStats) -> str:
+    return (
+        f"total;dur={stats.elapsed_seconds * 1000:.1f}, "
+        f"db;dur={stats.db_seconds * 1000:.1f};"
+        f'desc="{len(stats.queries)} queries, {stats.rows} rows, '
+        f'{stats.lazy_loads} lazy loads"'
+    )
+
+
+class RequestTimingMiddleware:
+    """Records wall time, DB time, query count, rows fetched and lazy loads
+    for every request.
+
+    A pure ASGI middleware, so unlike BaseHTTPMiddleware it neither buffers
+    streamed responses nor runs the endpoint in another task. The
+    Server-Timing header covers the time until the response starts. The
+    log line written once the body has been sent also covers streaming.
+    Requests slower than SLOW_REQUEST_MS log each query they ran. Request
+    counts and latencies per route also feed the /metrics endpoint.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_timing(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", server_timing(stats)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_request_stats.reset(token)
+            self.log_request(scope, status_code, stats)
+            self.record_metrics(scope, status_code, stats)
+
+    @staticmethod
+    def record_metrics(scope: Scope, status_code: int, stats: RequestStats):
+        # the route template rather than the path keeps label cardinality bounded
+        route = getattr(scope.get("route"), "path", "unmatched")
+        http_requests.inc(scope["method"], route, str(status_code))
+        http_request_duration.observe(stats.elapsed_seconds, scope["method"], route)
+
+    @staticmethod
+    def log_request(scope: Scope, status_code: int, stats: RequestStats):
+        elapsed_ms = stats.elapsed_seconds * 1000
+        logger.info(
+            f"method={scope['method']} path={scope['path']} status={status_code} "
+            f"total_ms={elapsed_ms:.1f} db_ms={stats.db_seconds * 1000:.1f} "
+            f"queries={len(stats.queries)} rows={stats.rows} "
+            f"lazy_loads={stats.lazy_loads}"
+        )
+        if elapsed_ms > Config.SLOW_REQUEST_MS:
+            queries = "\n".join(
+                f"  {seconds * 1000:.1f}ms {statement}"
+                for statement, seconds in stats.queries
+            )
+            logger.warning(
+                f"Slow request {scope['method']} {scope['path']} took "
+                f"{elapsed_ms:.1f}ms over {len(stats.queries)} queries:\n{queries}"
+            )
@@ -1,10 +1,26 @@
-from typing import List
+from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from app.api.dependencies import get_current_user, require_role
 from app.db.models import User
-from fastapi import APIRouter, Depends, HTTPException, status, Response
-from app.schemas.user import PutRoles, UserCreate, UserOut
-from app.services.user_service import UserService
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    status,
+)
+from app.schemas.user import (
+    BulkRoles,
+    PutRoles,
+    UserCreate,
+    UserFilter,
+    UserOut,
+    UserPage,
+)
+from app.services.user_service import UserService, optional_oauth2_scheme
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,15 +28,19 @@ logger = logging.getLogger(__name__)
 user_router = APIRouter(prefix="/users", tags=["Users"])
 
 
+# login and registration are async so that waiting on bcrypt does not hold one
+# of the threadpool threads that every sync endpoint shares
 @user_router.post("/token", response_model=UserOut)
-def login(
+async def login(
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
     user_service: UserService = Depends(),
 ):
     logger.info(f"Login attempt for username: {form_data.username}")
 
-    user = user_service.authenticate_user(form_data.username, form_data.password)
+    user = await user_service.authenticate_user(
+        form_data.username, form_data.password
+    )
     if not user:
         logger.warning(f"Failed login attempt for username: {form_data.username}")
         raise HTTPException(
@@ -29,7 +49,7 @@ def login(
         )
 
     logger.info(f"Successful login for user: {user.username}")
-    access_token = UserService.create_token(user_data={"username": user.username})
+    access_token = UserService.create_token(user_data=UserService.token_claims(user))
 
     # set access token in http cookie rather than returning in response
     response.set_cookie(
@@ -44,14 +64,14 @@ def login(
 
 
 @user_router.post("", response_model=UserOut)
-def register_user(
+async def register_user(
     response: Response,
     user: UserCreate,
     user_service: UserService = Depends(),
 ):
     logger.info(f"User registration attempt for username: {user.username}")
 
-    db_user = user_service.get_user_by_username(user.username)
+    db_user = await run_in_threadpool(user_service.get_user_by_username, user.username)
     if db_user:
         logger.warning(
             f"Registration failed - username already exists: {user.username}"
@@ -65,13 +85,13 @@ def register_user(
         new_user = User(
             name=user.name,
             username=user.username,
-            hashed_password=user_service.hash_password(user.password),
+            hashed_password=await user_service.hash_password(user.password),
         )
-        created_user = user_service.create_user(new_user)
+        created_user = await run_in_threadpool(user_service.create_user, new_user)
         logger.info(f"Successfully registered user: {created_user.username}")
 
         access_token = UserService.create_token(
-            user_data={"username": created_user.username}
+            user_data=UserService.token_claims(created_user)
         )
         response.set_cookie(
             key="access_token",
@@ -82,6 +102,8 @@ def register_user(
             max_age=60 * 60 * 24,
         )
         return UserOut.model_validate(created_user)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating user {user.username}: {str(e)}")
         raise HTTPException(
@@ -98,15 +120,21 @@ def get_me(current_user: User = Depends(get_current_user)):
 
 @user_router.get("/all", response_model=List[UserOut])
 def get_all_users(
+    response: Response,
     current_admin: User = Depends(require_role(["admin"])),
     user_service: UserService = Depends(),
+    page: UserPage = Query(),
 ):
     logger.info(f"All users requested by admin: {current_admin.username}")
 
     try:
-        users = user_service.get_all_users_from_db()
+        users, next_cursor = user_service.get_all_users_from_db(page)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         logger.debug(f"Retrieved {len(users)} users from database")
         return [UserOut.model_validate(user) for user in users]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error retrieving all users: {str(e)}")
         raise HTTPException(
@@ -115,10 +143,33 @@ def get_all_users(
         )
 
 
+@user_router.get("/count")
+def count_users(
+    current_admin: User = Depends(require_role(["admin"])),
+    user_service: UserService = Depends(),
+    filters: UserFilter = Query(),
+):
+    logger.info(f"User count requested by admin: {current_admin.username}")
+
+    try:
+        return {"count": user_service.count_users(filters)}
+    except Exception as e:
+        logger.error(f"Error counting users: {str(e)}")
+        raise
+
+
 @user_router.post("/logout")
-def logout(response: Response):
+def logout(
+    response: Response,
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+    user_service: UserService = Depends(),
+):
     logger.info("User logout requested")
 
+    # revoke the token too, so a copy of it stops working before it expires
+    if token:
+        user_service.revoke_token(token)
+
     # clear access token in cookie
     response.set_cookie(
         key="access_token",
@@ -154,3 +205,67 @@ def put_roles(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating user roles",
         )
+
+
+@user_router.put("/roles/bulk")
+def assign_roles(
+    bulk: BulkRoles,
+    user_service: UserService = Depends(),
+    current_admin: User = Depends(require_role(["admin"])),
+):
+    logger.info(
+        f"Admin {current_admin.username} assigning roles {bulk.roles} to "
+        f"{len(bulk.usernames)} users"
+    )
+
+    try:
+        result = user_service.assign_roles(bulk)
+        logger.info(
+            f"Roles updated for {result['updated']} users with {result['failed']} failures"
+        )
+        return result
+    except Exception as e:
+        logger.error(f"Error assigning roles in bulk: {str(e)}")
+        raise
+
+
+@user_router.post("/import")
+def import_users(
+    file: UploadFile,
+    user_service: UserService = Depends(),
+    current_admin: User = Depends(require_role(["admin"])),
+):
+    logger.info(f"Admin {current_admin.username} importing users from {file.filename}")
+
+    is_csv = file.content_type == "text/csv" or (file.filename or "").endswith(".csv")
+    try:
+        rows = UserService.read_import_rows(file.file.read(), is_csv)
+        result = user_service.import_users(rows)
+        logger.info(
+            f"Imported {result['created']} users with {result['failed']} failures"
+        )
+        return result
+    except Exception as e:
+        logger.error(f"Error importing users from {file.filename}: {str(e)}")
+        raise
+
+
+@user_router.delete("/{username}")
+def delete_user(
+    username: str,
+    user_service: UserService = Depends(),
+    current_admin: User = Depends(require_role(["admin"])),
+    chunk_size: Optional[int] = Query(None, ge=1),
+):
+    logger.info(f"Admin {current_admin.username} deleting user: {username}")
+
+    try:
+        user_service.delete_user(username, chunk_size=chunk_size)
+        logger.info(f"User {username} deleted successfully")
+        return {
+            "message": f"User {username} deleted successfully",
+            "username": username,
+        }
+    except Exception as e:
+        logger.error(f"Failed to delete user {username}: {str(e)}")
+        raise
@@ -0,0 +1,101 @@
+"""Per-process TTL/LRU cache of authenticated users"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from threading import Lock
+import time
+from typing import Dict, Optional, Set, Tuple
+from app.auth.role_bits import role_registry
+from app.db.models import User
+import app.config as Config
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the fields request handlers read from the current user"""
+
+    id: int
+    name: str
+    username: str
+    role_names: Tuple[str, ...]
+    role_mask: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "role_mask", role_registry.mask(self.role_names))
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            name=user.name,
+            username=user.username,
+            role_names=tuple(user.role_names),
+        )
+
+
+class PrincipalCache:
+    """LRU of principals keyed by (username, jti), each kept for ttl_seconds"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Principal]]" = (
+            OrderedDict()
+        )
+        self._keys_by_username: Dict[str, Set[Tuple[str, str]]] = {}
+        self._invalidated_at: Dict[str, float] = {}
+
+    def get(self, username: str, jti: str) -> Optional[Principal]:
+        key = (username, jti)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at < time.monotonic():
+                self._pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, username: str, jti: str, principal: Principal):
+        key = (username, jti)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(key)
+            self._keys_by_username.setdefault(username, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, username: str):
+        """Forget a user's cached principals, e.g. after their roles change"""
+        with self._lock:
+            for key in list(self._keys_by_username.get(username, ())):
+                self._pop(key)
+            self._invalidated_at[username] = time.time()
+
+    def issued_before_invalidation(self, username: str, issued_at: float) -> bool:
+        """Whether claims in a token issued at `issued_at` may be out of date"""
+        invalidated_at = self._invalidated_at.get(username)
+        return invalidated_at is not None and (
+            issued_at is None or issued_at <= invalidated_at
+        )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_username.clear()
+
+    def _pop(self, key: Tuple[str, str]):
+        self._entries.pop(key, None)
+        keys = self._keys_by_username.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_username[key[0]]
+
+
+principal_cache = PrincipalCache(
+    Config.PRINCIPAL_CACHE_SIZE, Config.PRINCIPAL_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,104 @@
+"""Per-process store of revoked tokens checked on every authenticated request.
+
+Revocations are also written to the database, and app.services.revocation_sync
+loads the ones made by other workers into each worker's store.
+"""
+
+from hashlib import blake2b
+import math
+from threading import Lock
+import time
+from typing import Dict, Optional
+import app.config as Config
+
+
+class BloomFilter:
+    """Fixed size Bloom filter over strings using double hashing"""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        self.size = max(
+            8, int(-capacity * math.log(false_positive_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        digest = blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationStore:
+    """Revoked token jtis and per-user revocation cutoffs.
+
+    Nearly every token checked is not revoked, and the Bloom filter answers
+    that without touching the exact set; only a filter hit is confirmed in the
+    jti -> expiry dict. Expired jtis are pruned and the filter rebuilt once the
+    dict outgrows the capacity the filter was sized for.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._lock = Lock()
+        self._bloom = BloomFilter(capacity)
+        self._revoked: Dict[str, float] = {}
+        self._revoked_users: Dict[str, float] = {}
+
+    def revoke(self, jti: str, expires_at: float):
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._bloom.add(jti)
+            if len(self._revoked) > self.capacity:
+                self._prune()
+
+    def revoke_user(self, username: str, before: Optional[float] = None):
+        """Revoke every token of `username` issued up to `before` (default now),
+        keeping a later cutoff the user already has"""
+        before = before if before is not None else time.time()
+        with self._lock:
+            self._revoked_users[username] = max(
+                before, self._revoked_users.get(username, before)
+            )
+
+    def is_revoked(
+        self, jti: str, username: str, issued_at: Optional[float]
+    ) -> bool:
+        revoked_before = self._revoked_users.get(username)
+        if revoked_before is not None and (
+            issued_at is None or issued_at <= revoked_before
+        ):
+            return True
+        return jti in self._bloom and jti in self._revoked
+
+    def _prune(self):
+        now = time.time()
+        self._revoked = {
+            jti: expires_at
+            for jti, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+        # a cutoff older than the token lifetime has nothing left to revoke
+        oldest_valid = now - Config.ACCESS_TOKEN_EXPIRE_SECONDS
+        self._revoked_users = {
+            username: before
+            for username, before in self._revoked_users.items()
+            if before > oldest_valid
+        }
+        self.capacity = max(self.capacity, 2 * len(self._revoked))
+        self._bloom = BloomFilter(self.capacity)
+        for jti in self._revoked:
+            self._bloom.add(jti)
+
+
+revocation_store = RevocationStore(Config.REVOCATION_CAPACITY)
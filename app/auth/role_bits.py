@@ -0,0 +1,47 @@
+"""Role names interned as bit positions so permission checks are one AND"""
+
+from threading import Lock
+from typing import Dict, Iterable
+
+
+class RoleRegistry:
+    """Assigns each role name the next free bit the first time it is seen.
+
+    Positions are only meaningful within this process, so masks are derived
+    from role names when needed and never stored in the database.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._bits: Dict[str, int] = {}
+
+    def bit(self, role: str) -> int:
+        bit = self._bits.get(role)
+        if bit is None:
+            with self._lock:
+                bit = self._bits.setdefault(role, 1 << len(self._bits))
+        return bit
+
+    def mask(self, roles: Iterable[str]) -> int:
+        mask = 0
+        for role in roles:
+            mask |= self.bit(role)
+        return mask
+
+    def roles(self, mask: int) -> tuple:
+        """The names of the roles set in `mask`, ignoring bits never assigned"""
+        with self._lock:
+            bits = list(self._bits.items())
+        return tuple(sorted(role for role, bit in bits if mask & bit))
+
+
+role_registry = RoleRegistry()
+
+
+def has_all_roles(role_mask: int, required_mask: int) -> bool:
+    return role_mask & required_mask == required_mask
+
+
+def has_any_role(role_mask: int, allowed_mask: int) -> bool:
+    """Whether a user may use something limited to `allowed_mask` (0 if open to all)"""
+    return not allowed_mask or bool(role_mask & allowed_mask)
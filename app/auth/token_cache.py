@@ -0,0 +1,63 @@
+"""Per-process cache of JWT payloads that have already been verified"""
+
+from collections import OrderedDict
+from threading import Lock
+import time
+from typing import Dict, Optional, Tuple
+import app.config as Config
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified payloads, each dropped once its token expires.
+
+    Entries are looked up by the exact token string, so only a token that was
+    verified byte for byte is ever served from the cache, and indexed by jti so
+    a revoked token can be evicted without knowing its encoded form.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = Lock()
+        self._payloads: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._tokens_by_jti: Dict[str, str] = {}
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._payloads.get(token)
+            if entry is None:
+                return None
+            expires_at, payload = entry
+            if expires_at <= time.time():
+                self._pop(token)
+                return None
+            self._payloads.move_to_end(token)
+            return payload
+
+    def put(self, token: str, payload: dict):
+        jti, expires_at = payload.get("jti"), payload.get("exp")
+        if jti is None or expires_at is None:
+            return
+        with self._lock:
+            self._payloads[token] = (expires_at, payload)
+            self._payloads.move_to_end(token)
+            self._tokens_by_jti[jti] = token
+            while len(self._payloads) > self.max_size:
+                self._pop(next(iter(self._payloads)))
+
+    def evict(self, jti: str):
+        with self._lock:
+            token = self._tokens_by_jti.get(jti)
+            if token is not None:
+                self._pop(token)
+
+    def clear(self):
+        with self._lock:
+            self._payloads.clear()
+            self._tokens_by_jti.clear()
+
+    def _pop(self, token: str):
+        _, payload = self._payloads.pop(token)
+        self._tokens_by_jti.pop(payload["jti"], None)
+
+
+token_cache = VerifiedTokenCache(Config.TOKEN_CACHE_SIZE)
@@ -9,3 +9,57 @@ if os.getenv("ENVIRONMENT") != "production":
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_SECONDS = int(os.getenv("JWT_EXPIRATION_SECONDS", "3600"))
+
+# Keep accepted bookings in memory for conflict checks. Each worker process has
+# its own copy, brought up to date from booking_change_table before each check.
+AVAILABILITY_INDEX_ENABLED = (
+    os.getenv("AVAILABILITY_INDEX_ENABLED", "true").lower() == "true"
+)
+
+# Page sizes for list endpoints using keyset pagination
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+# Authenticated principals cached per worker, keyed by username and token jti
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+# Carry user id, name and roles as signed claims so a cold cache needs no query
+JWT_ROLE_CLAIMS = os.getenv("JWT_ROLE_CLAIMS", "false").lower() == "true"
+
+# bcrypt runs on its own pool so that login bursts do not starve the request threadpool
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hashes allowed to wait for a worker before new ones are rejected with 503
+HASH_QUEUE_DEPTH = int(os.getenv("HASH_QUEUE_DEPTH", "16"))
+# Workers for bulk imports and seeding, kept apart so batches never hold login workers
+HASH_BULK_WORKERS = int(
+    os.getenv("HASH_BULK_WORKERS", str(max(1, (os.cpu_count() or 1) // 2)))
+)
+
+# bcrypt cost; when unset the highest cost hashing within the budget is picked at startup
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS")) if os.getenv("BCRYPT_ROUNDS") else None
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "16"))
+HASH_LATENCY_BUDGET_MS = int(os.getenv("HASH_LATENCY_BUDGET_MS", "250"))
+
+# Verified JWT payloads kept per worker so repeat requests skip HMAC and JSON decoding
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+# Revoked tokens expected before the revocation Bloom filter is resized
+REVOCATION_CAPACITY = int(os.getenv("REVOCATION_CAPACITY", "100000"))
+# Seconds between loads of revocations made by other workers (0 to load only at startup)
+REVOCATION_SYNC_SECONDS = int(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+
+# Seed demo data on startup when the database has no users (otherwise run app.db.seed_db)
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "false").lower() == "true"
+
+# Rooms are cached per worker; other workers' room changes show up after this long
+ROOM_CATALOG_TTL_SECONDS = int(os.getenv("ROOM_CATALOG_TTL_SECONDS", "60"))
+
+# Most users one bulk import or bulk role assignment may touch
+MAX_BULK_USERS = int(os.getenv("MAX_BULK_USERS", "1000"))
+
+# Requests slower than this log every query they ran
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "500"))
+
+# Statements slower than this are kept with their query plan in the slow query log
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
@@ -1,26 +1,49 @@
 from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
 import sqlite3
+from app.db import query_stats
 
 load_dotenv()
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
-    connect_args={"check_same_thread": False}
-)
 
 # Enable foreign key constraints for SQLite
-@event.listens_for(engine, "connect")
 def enable_foreign_keys(dbapi_connection, connection_record):
-    if isinstance(dbapi_connection, sqlite3.Connection): 
+    if isinstance(dbapi_connection, sqlite3.Connection):
         cursor = dbapi_connection.cursor()
         cursor.execute("PRAGMA foreign_keys=ON")
         cursor.close()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+def create_db_engine(url: str) -> Engine:
+    """Engine with foreign keys on and the query accounting hooks installed"""
+    db_engine = create_engine(
+        url,
+        connect_args={
+            "check_same_thread": False,
+            "factory": query_stats.CountingConnection,
+        },
+    )
+    event.listen(db_engine, "connect", enable_foreign_keys)
+    # Per-request query timing and counts and the slow query log, see app.db.query_stats
+    event.listen(db_engine, "before_cursor_execute", query_stats.before_cursor_execute)
+    event.listen(db_engine, "after_cursor_execute", query_stats.after_cursor_execute)
+    event.listen(db_engine, "handle_error", query_stats.handle_error)
+    return db_engine
+
+
+def create_session_factory(bind: Engine) -> sessionmaker:
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=bind)
+    event.listen(factory, "do_orm_execute", query_stats.count_lazy_load)
+    return factory
+
+
+engine = create_db_engine(SQLALCHEMY_DATABASE_URL)
+
+SessionLocal = create_session_factory(engine)
+
+Base = declarative_base()
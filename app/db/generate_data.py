@@ -0,0 +1,309 @@
+"""Generate a large synthetic sqlite database for load and scale testing.
+
+Unlike seed_db, rows are built as plain dicts from a seeded random generator
+and written with Core executemany inserts in batched transactions, with a
+single password hash shared by every user. The same arguments (including
+--seed and --start-date) always produce the same rows, apart from the salt
+of the shared password hash.
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+from itertools import islice
+import os
+import random
+import time
+from typing import Dict, Iterable, Iterator, List
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine
+from app.db.migrations import (
+    BOOKING_CHANGE_TRIGGERS,
+    create_booking_change_triggers,
+    run_migrations,
+)
+from app.db.models import Booking, Role, Room, User, room_role_table, user_role_table
+from app.services.password_hasher import pwd_context
+
+BASE_ROLES = ["admin", "manager", "employee", "guest"]
+DEPARTMENTS = ["engineering", "sales", "finance", "operations", "research", "hr"]
+BUILDINGS = "ABCDEFGH"
+# (capacity, weight) so small huddle rooms dominate as they do in practice
+CAPACITIES = [
+    (4, 30), (6, 25), (8, 15), (10, 10), (12, 8), (20, 6), (50, 4), (100, 2)
+]
+DESCRIPTIONS = [
+    "Huddle room",
+    "Meeting room with whiteboard",
+    "Conference room with projector",
+    "Conference room with video conferencing",
+    "Training room with computers",
+    "Presentation hall",
+]
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Eva", "Frank", "Grace", "Henry", "Ivy",
+    "Jack", "Karen", "Liam", "Maya", "Noah", "Olivia", "Peter", "Quinn", "Rosa",
+    "Sam", "Tara", "Umar", "Vera", "Will", "Xena", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Smith", "Johnson", "Davis", "Wilson", "Brown", "Miller", "Lee", "Taylor",
+    "Anderson", "Thomas", "Moore", "Martin", "Clark", "Lewis", "Walker", "Hall",
+    "Young", "King", "Wright", "Scott", "Green", "Baker", "Adams", "Nelson",
+]
+
+SLOT = timedelta(minutes=15)
+DAY_START_HOUR = 8
+DAY_END_HOUR = 18
+
+
+def _batched(rows: Iterable, size: int) -> Iterator[List]:
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def _generate_rooms(rng: random.Random, count: int) -> Iterator[Dict]:
+    capacities, weights = zip(*CAPACITIES)
+    for i in range(count):
+        capacity = rng.choices(capacities, weights)[0]
+        building, number = BUILDINGS[i % len(BUILDINGS)], 100 + i // len(BUILDINGS)
+        yield {
+            "room_number": f"{building}{number}",
+            "capacity": capacity,
+            "description": DESCRIPTIONS[min(len(DESCRIPTIONS) - 1, capacity // 10)],
+            "request_only": capacity >= 50 or rng.random() < 0.05,
+        }
+
+
+def _generate_room_roles(
+    rng: random.Random, room_numbers: List[str]
+) -> Iterator[Dict]:
+    """Restrict about one room in seven to a department, plus managers"""
+    for room_number in room_numbers:
+        if rng.random() < 0.15:
+            yield {"role": rng.choice(DEPARTMENTS), "room_number": room_number}
+            yield {"role": "manager", "room_number": room_number}
+
+
+def _generate_users(
+    rng: random.Random, count: int, hashed_password: str
+) -> Iterator[Dict]:
+    yield {
+        "id": 1,
+        "name": "Admin User",
+        "username": "admin",
+        "hashed_password": hashed_password,
+    }
+    for user_id in range(2, count + 1):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        yield {
+            "id": user_id,
+            "name": f"{first} {last}",
+            "username": f"{first}.{last}{user_id}".lower(),
+            "hashed_password": hashed_password,
+        }
+
+
+def _roles_for_user(rng: random.Random, user_id: int) -> List[str]:
+    if user_id == 1:
+        return ["admin"]
+    draw = rng.random()
+    if draw < 0.01:
+        roles = ["admin", "employee"]
+    elif draw < 0.11:
+        roles = ["manager", "employee"]
+    elif draw < 0.91:
+        roles = ["employee"]
+    else:
+        return ["guest"]
+    return roles + [rng.choice(DEPARTMENTS)]
+
+
+def _generate_user_roles(rng: random.Random, user_count: int) -> Iterator[Dict]:
+    for user_id in range(1, user_count + 1):
+        for role in _roles_for_user(rng, user_id):
+            yield {"role": role, "user_id": user_id}
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time()).replace(hour=DAY_START_HOUR)
+
+
+def _working_day(day: date) -> date:
+    """`day` itself, or the Monday after it when it falls on a weekend"""
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def _next_working_day(day: date) -> date:
+    return _working_day(day + timedelta(days=1))
+
+
+def _generate_bookings(
+    rng: random.Random,
+    room_numbers: List[str],
+    count: int,
+    user_count: int,
+    start_date: date,
+) -> Iterator[Dict]:
+    """Walk each room's calendar forward through working hours so its bookings
+    never overlap, spreading `count` bookings evenly across the rooms"""
+    per_room, extra = divmod(count, len(room_numbers))
+    first_day = _day_start(_working_day(start_date))
+    for index, room_number in enumerate(room_numbers):
+        cursor = first_day
+        for _ in range(per_room + (index < extra)):
+            start = cursor + rng.randint(0, 12) * SLOT
+            end = start + rng.randint(2, 8) * SLOT
+            if end > start.replace(hour=DAY_END_HOUR, minute=0):
+                start = _day_start(_next_working_day(start.date()))
+                start += rng.randint(0, 4) * SLOT
+                end = start + rng.randint(2, 8) * SLOT
+            cursor = end
+            yield {
+                "user_id": rng.randint(1, user_count),
+                "room_number": room_number,
+                "start_time": start,
+                "end_time": end,
+                "accepted": rng.random() < 0.9,
+                "datetime_made": start - timedelta(days=rng.randint(1, 60)),
+            }
+
+
+def _insert(
+    connection: Connection, table, rows: Iterable[Dict], batch_size: int
+) -> int:
+    inserted = 0
+    for batch in _batched(rows, batch_size):
+        connection.execute(table.insert(), batch)
+        inserted += len(batch)
+    return inserted
+
+
+def _bulk_engine(path: str) -> Engine:
+    engine = create_engine(f"sqlite:///{path}")
+
+    @event.listens_for(engine, "connect")
+    def fast_writes(dbapi_connection, connection_record):
+        # the file is disposable until generation finishes, so skip durability
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=OFF")
+        cursor.execute("PRAGMA synchronous=OFF")
+        cursor.execute("PRAGMA cache_size=-200000")
+        cursor.close()
+
+    return engine
+
+
+def generate(
+    path: str,
+    rooms: int,
+    users: int,
+    bookings: int,
+    seed: int = 0,
+    start_date: date = None,
+    password: str = "password",
+    batch_size: int = 50_000,
+) -> Dict[str, int]:
+    """Create the database at `path` and return the number of rows per table"""
+    rng = random.Random(seed)
+    start_date = start_date or date.today()
+    engine = _bulk_engine(path)
+    run_migrations(bind=engine)
+
+    counts = {}
+    booking_indexes = list(Booking.__table__.indexes)
+    with engine.begin() as connection:
+        # building indexes once after loading is far cheaper than maintaining them
+        for index in booking_indexes:
+            index.drop(bind=connection, checkfirst=True)
+        # nothing has loaded the bookings yet, so there are no readers to replay
+        # the changes to and logging every generated booking would be wasted
+        for trigger in BOOKING_CHANGE_TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+
+        counts["roles"] = _insert(
+            connection,
+            Role.__table__,
+            ({"role": role} for role in BASE_ROLES + DEPARTMENTS),
+            batch_size,
+        )
+        room_rows = list(_generate_rooms(rng, rooms))
+        room_numbers = [room["room_number"] for room in room_rows]
+        counts["rooms"] = _insert(connection, Room.__table__, room_rows, batch_size)
+        counts["room_roles"] = _insert(
+            connection,
+            room_role_table,
+            _generate_room_roles(rng, room_numbers),
+            batch_size,
+        )
+        counts["users"] = _insert(
+            connection,
+            User.__table__,
+            _generate_users(rng, users, pwd_context.hash(password)),
+            batch_size,
+        )
+        counts["user_roles"] = _insert(
+            connection, user_role_table, _generate_user_roles(rng, users), batch_size
+        )
+
+    counts["bookings"] = 0
+    for batch in _batched(
+        _generate_bookings(rng, room_numbers, bookings, users, start_date), batch_size
+    ):
+        with engine.begin() as connection:
+            connection.execute(Booking.__table__.insert(), batch)
+        counts["bookings"] += len(batch)
+
+    with engine.begin() as connection:
+        for index in booking_indexes:
+            index.create(bind=connection)
+        create_booking_change_triggers(connection)
+        connection.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    return counts
+
+
+# For CLI usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic sqlite database"
+    )
+    parser.add_argument("output", help="path of the sqlite file to create")
+    parser.add_argument("--rooms", type=int, default=5_000)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--bookings", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--start-date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="first day of the generated schedules (YYYY-MM-DD)",
+    )
+    parser.add_argument("--password", default="password", help="shared by every user")
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--force", action="store_true", help="overwrite the output")
+    args = parser.parse_args()
+
+    if os.path.exists(args.output):
+        if not args.force:
+            parser.error(f"{args.output} already exists, pass --force to replace it")
+        os.remove(args.output)
+
+    print(
+        f"Generating {args.output} from seed {args.seed} from {args.start_date}..."
+    )
+    started = time.perf_counter()
+    counts = generate(
+        args.output,
+        rooms=args.rooms,
+        users=args.users,
+        bookings=args.bookings,
+        seed=args.seed,
+        start_date=args.start_date,
+        password=args.password,
+        batch_size=args.batch_size,
+    )
+    for table, count in counts.items():
+        print(f"  {table}: {count}")
+    print(f"Done in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,247 @@
+"""Versioned schema upgrades applied in place to existing sqlite files.
+
+Each migration is written to be safe to re-run, since sqlite does not wrap
+every DDL statement in the surrounding transaction. The current version is
+kept in a single row of the schema_version table.
+"""
+
+import logging
+from typing import Callable, List, Tuple
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from app.db.database import Base, engine
+from app.db.models import (
+    Booking,
+    BookingChange,
+    BookingSeries,
+    RevokedToken,
+    User,
+    UserRevocation,
+    room_role_table,
+)
+
+logger = logging.getLogger("app.migrations")
+
+# booking_change_table keeps this many of the latest changes; a worker that
+# falls further behind reloads its availability index from booking_table
+BOOKING_CHANGE_LOG_ROWS = 100_000
+
+schema_version_table = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, nullable=False),
+)
+
+
+def _create_initial_schema(connection: Connection):
+    Base.metadata.create_all(bind=connection)
+
+
+def _create_booking_indexes(connection: Connection, *names: str):
+    for index in Booking.__table__.indexes:
+        if index.name in names:
+            index.create(bind=connection, checkfirst=True)
+
+
+def _fix_room_role_room_number_type(connection: Connection):
+    """room_role_table.room_number was declared Integer against a String key"""
+    columns = {
+        column["name"]: column["type"]
+        for column in inspect(connection).get_columns(room_role_table.name)
+    }
+    if isinstance(columns["room_number"], String):
+        return
+
+    # sqlite cannot alter a column type, so rebuild the table and copy the rows
+    connection.exec_driver_sql(
+        "ALTER TABLE room_role_table RENAME TO _room_role_table_old"
+    )
+    room_role_table.create(bind=connection)
+    connection.exec_driver_sql(
+        "INSERT INTO room_role_table (role, room_number) "
+        "SELECT role, CAST(room_number AS TEXT) FROM _room_role_table_old"
+    )
+    connection.exec_driver_sql("DROP TABLE _room_role_table_old")
+
+
+def _add_booking_indexes_and_fix_room_roles(connection: Connection):
+    _create_booking_indexes(
+        connection,
+        "ix_booking_room_accepted_time",
+        "ix_booking_user_start",
+        "ix_booking_pending_start",
+    )
+    _fix_room_role_room_number_type(connection)
+
+
+def _add_booking_series(connection: Connection):
+    BookingSeries.__table__.create(bind=connection, checkfirst=True)
+    columns = [
+        column["name"] for column in inspect(connection).get_columns(Booking.__tablename__)
+    ]
+    if "series_id" not in columns:
+        connection.exec_driver_sql(
+            "ALTER TABLE booking_table ADD COLUMN series_id INTEGER "
+            "REFERENCES booking_series_table (id)"
+        )
+    _create_booking_indexes(connection, "ix_booking_table_series_id")
+
+
+def _add_room_search(connection: Connection):
+    """FTS5 index over room_table kept in sync by triggers"""
+    connection.exec_driver_sql(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS room_search USING fts5("
+        "room_number, description, content='room_table', content_rowid='rowid', "
+        "tokenize='porter unicode61')"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS room_search_insert AFTER INSERT ON room_table "
+        "BEGIN "
+        "INSERT INTO room_search (rowid, room_number, description) "
+        "VALUES (new.rowid, new.room_number, new.description); "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS room_search_delete AFTER DELETE ON room_table "
+        "BEGIN "
+        "INSERT INTO room_search (room_search, rowid, room_number, description) "
+        "VALUES ('delete', old.rowid, old.room_number, old.description); "
+        "END"
+    )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS room_search_update AFTER UPDATE ON room_table "
+        "BEGIN "
+        "INSERT INTO room_search (room_search, rowid, room_number, description) "
+        "VALUES ('delete', old.rowid, old.room_number, old.description); "
+        "INSERT INTO room_search (rowid, room_number, description) "
+        "VALUES (new.rowid, new.room_number, new.description); "
+        "END"
+    )
+    # index the rooms that already exist
+    connection.exec_driver_sql(
+        "INSERT INTO room_search (room_search) VALUES ('rebuild')"
+    )
+
+
+def _add_user_prefix_indexes(connection: Connection):
+    for index in User.__table__.indexes:
+        if index.name.endswith("_nocase"):
+            index.create(bind=connection, checkfirst=True)
+
+
+def _add_revocations(connection: Connection):
+    RevokedToken.__table__.create(bind=connection, checkfirst=True)
+    UserRevocation.__table__.create(bind=connection, checkfirst=True)
+
+
+BOOKING_CHANGE_TRIGGERS = (
+    "booking_change_insert",
+    "booking_change_update",
+    "booking_change_delete",
+)
+
+
+def create_booking_change_triggers(connection: Connection):
+    """Triggers appending every booking_table write to booking_change_table"""
+    for event in ("insert", "update"):
+        connection.exec_driver_sql(
+            f"CREATE TRIGGER IF NOT EXISTS booking_change_{event} "
+            f"AFTER {event.upper()} ON booking_table "
+            "BEGIN "
+            "INSERT INTO booking_change_table "
+            "(booking_id, room_number, start_time, end_time, accepted) "
+            "VALUES (new.id, new.room_number, new.start_time, new.end_time, "
+            "new.accepted); "
+            "END"
+        )
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS booking_change_delete "
+        "AFTER DELETE ON booking_table "
+        "BEGIN "
+        "INSERT INTO booking_change_table (booking_id, accepted) VALUES (old.id, 0); "
+        "END"
+    )
+
+
+def _add_booking_change_log(connection: Connection):
+    BookingChange.__table__.create(bind=connection, checkfirst=True)
+    create_booking_change_triggers(connection)
+    connection.exec_driver_sql(
+        "CREATE TRIGGER IF NOT EXISTS booking_change_prune "
+        "AFTER INSERT ON booking_change_table "
+        "BEGIN "
+        "DELETE FROM booking_change_table "
+        f"WHERE seq <= new.seq - {BOOKING_CHANGE_LOG_ROWS}; "
+        "END"
+    )
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "initial schema", _create_initial_schema),
+    (
+        2,
+        "booking_table indexes and room_role_table.room_number as String",
+        _add_booking_indexes_and_fix_room_roles,
+    ),
+    (3, "recurring booking series", _add_booking_series),
+    (4, "room_search full-text index", _add_room_search),
+    (5, "user_table name and username prefix indexes", _add_user_prefix_indexes),
+    (6, "revoked tokens and user revocation cutoffs", _add_revocations),
+    (7, "booking change log", _add_booking_change_log),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(connection: Connection) -> int:
+    """Read the stored version with one query, 0 for a database never migrated"""
+    try:
+        version = connection.execute(schema_version_table.select()).scalar()
+    except OperationalError:
+        # no schema_version table yet
+        return 0
+    return version or 0
+
+
+def _set_schema_version(connection: Connection, version: int):
+    schema_version_table.create(bind=connection, checkfirst=True)
+    connection.execute(schema_version_table.delete())
+    connection.execute(schema_version_table.insert().values(version=version))
+
+
+def run_migrations(bind: Engine = engine) -> int:
+    """Apply every migration newer than the stored version and return the new version.
+
+    An up to date database costs a single SELECT, so this is cheap enough to
+    run on every worker start. Each step runs in a BEGIN IMMEDIATE transaction
+    that re-reads the version, so a step another worker applied while this one
+    waited for the lock is skipped.
+    """
+    with bind.connect() as connection:
+        current = get_schema_version(connection)
+    if current >= LATEST_VERSION:
+        return current
+
+    for version, description, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        with bind.begin() as connection:
+            # take the write lock before reading, so that workers starting
+            # together apply each step once, one after the other
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            current = get_schema_version(connection)
+            if version <= current:
+                continue
+            logger.info(f"Applying schema migration {version}: {description}")
+            migrate(connection)
+            _set_schema_version(connection, version)
+        current = version
+
+    return current
+
+
+# For CLI usage
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    print(f"Database schema at version {run_migrations()}")
@@ -1,5 +1,19 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Table
-from typing import List
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Boolean,
+    ForeignKey,
+    DateTime,
+    Float,
+    Index,
+    Table,
+    column,
+    table,
+    text,
+)
+from typing import List, Optional
+from app.auth.role_bits import role_registry
 from app.db.database import Base
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from datetime import datetime
@@ -17,10 +31,20 @@ room_role_table = Table(
     Base.metadata,
     Column("role", String, ForeignKey("role_table.role"), primary_key=True),
     Column(
-        "room_number", Integer, ForeignKey("room_table.room_number"), primary_key=True
+        "room_number", String, ForeignKey("room_table.room_number"), primary_key=True
     ),
 )
 
+# FTS5 index over room_table's room_number and description, created by migration 4
+# and kept in sync by triggers rather than by the ORM. Matching against the column
+# named after the table searches every indexed column; rank is the bm25 score.
+room_search_table = table(
+    "room_search",
+    column("rowid", Integer),
+    column("room_search", String),
+    column("rank", Float),
+)
+
 
 class Room(Base):
     __tablename__ = "room_table"
@@ -36,11 +60,18 @@ class Room(Base):
     allowed_roles: Mapped[List["Role"]] = relationship(
         secondary=room_role_table, back_populates="rooms"
     )
+    booking_series: Mapped[List["BookingSeries"]] = relationship(
+        back_populates="room", cascade="all, delete-orphan"
+    )
 
     @property
     def allowed_role_names(self) -> List[str]:
         return [role.role for role in self.allowed_roles]
 
+    @property
+    def allowed_role_mask(self) -> int:
+        return role_registry.mask(self.allowed_role_names)
+
 
 class User(Base):
     __tablename__ = "user_table"
@@ -58,14 +89,45 @@ class User(Base):
     roles: Mapped[List["Role"]] = relationship(
         secondary=user_role_table, back_populates="users"
     )
+    booking_series: Mapped[List["BookingSeries"]] = relationship(
+        back_populates="user", cascade="all, delete-orphan"
+    )
 
     @property
     def role_names(self) -> List[str]:
         return [role.role for role in self.roles]
 
+    @property
+    def role_mask(self) -> int:
+        return role_registry.mask(self.role_names)
+
+
+# Case-insensitive prefix search: sqlite only serves `LIKE 'abc%'` from an index
+# when the indexed column uses the NOCASE collation
+Index("ix_user_table_name_nocase", User.name.collate("NOCASE"))
+Index("ix_user_table_username_nocase", User.username.collate("NOCASE"))
+
 
 class Booking(Base):
     __tablename__ = "booking_table"
+    __table_args__ = (
+        # conflict checks by room
+        Index(
+            "ix_booking_room_accepted_time",
+            "room_number",
+            "accepted",
+            "start_time",
+            "end_time",
+        ),
+        # a user's own bookings
+        Index("ix_booking_user_start", "user_id", "start_time"),
+        # the pending request queue
+        Index(
+            "ix_booking_pending_start",
+            "start_time",
+            sqlite_where=text("accepted = 0"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("user_table.id"), nullable=False)
@@ -76,9 +138,36 @@ class Booking(Base):
     end_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     accepted: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     datetime_made: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    series_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("booking_series_table.id"), nullable=True, index=True
+    )
 
     room: Mapped["Room"] = relationship(back_populates="bookings")
     user: Mapped["User"] = relationship(back_populates="bookings")
+    series: Mapped[Optional["BookingSeries"]] = relationship(back_populates="bookings")
+
+
+class BookingSeries(Base):
+    """A recurring booking; each occurrence is stored as its own Booking"""
+
+    __tablename__ = "booking_series_table"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("user_table.id"), nullable=False)
+    room_number: Mapped[str] = mapped_column(
+        ForeignKey("room_table.room_number"), nullable=False
+    )
+    frequency: Mapped[str] = mapped_column(String, nullable=False)
+    interval: Mapped[int] = mapped_column(Integer, default=1, nullable=False)
+    count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    start_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    end_time: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    datetime_made: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+    room: Mapped["Room"] = relationship(back_populates="booking_series")
+    user: Mapped["User"] = relationship(back_populates="booking_series")
+    bookings: Mapped[List["Booking"]] = relationship(back_populates="series")
 
 
 class Role(Base):
@@ -92,3 +181,40 @@ class Role(Base):
     rooms: Mapped[List["Room"]] = relationship(
         secondary=room_role_table, back_populates="allowed_roles"
     )
+
+
+class RevokedToken(Base):
+    """A token revoked before it expires, loaded by every worker"""
+
+    __tablename__ = "revoked_token_table"
+
+    jti: Mapped[str] = mapped_column(String, primary_key=True)
+    # epoch seconds, like the token's exp and iat claims
+    expires_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+    revoked_at: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+
+
+class UserRevocation(Base):
+    """Every token of `username` issued up to `revoked_before` is revoked"""
+
+    __tablename__ = "user_revocation_table"
+
+    username: Mapped[str] = mapped_column(String, primary_key=True)
+    revoked_before: Mapped[float] = mapped_column(Float, nullable=False, index=True)
+
+
+class BookingChange(Base):
+    """A booking as it was after an insert, update or delete, appended by
+    triggers on booking_table so every worker can replay writes made by others"""
+
+    __tablename__ = "booking_change_table"
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    booking_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # null when the booking was deleted
+    room_number: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    start_time: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    end_time: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    accepted: Mapped[bool] = mapped_column(Boolean, nullable=False)
+
+    __table_args__ = {"sqlite_autoincrement": True}
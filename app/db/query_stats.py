@@ -0,0 +1,153 @@
+"""Per-request accounting of the SQL run through the engine.
+
+The timing middleware puts a RequestStats in `current_request_stats` for
+each request. The engine and session hooks in app.db.database add to it,
+including from threadpool workers, which run in a copy of the request's
+context. Outside a request, such as in warmup, only the slow query log
+sees the statements.
+
+sqlite produces rows as they are fetched, so the time of a statement that
+returns rows includes fetching them: it is recorded once the rows have all
+been fetched or its cursor is closed, whichever comes first.
+"""
+
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+import sqlite3
+import time
+from typing import List, Optional, Tuple
+from app.db.slow_queries import slow_query_log
+import app.config as Config
+
+
+@dataclass
+class RequestStats:
+    started: float = field(default_factory=time.perf_counter)
+    # (statement, seconds) in the order they ran
+    queries: List[Tuple[str, float]] = field(default_factory=list)
+    db_seconds: float = 0.0
+    rows: int = 0
+    lazy_loads: int = 0
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_started"].pop()
+    if isinstance(cursor, CountingCursor) and cursor.description is not None:
+        cursor.track(statement, parameters, executemany, elapsed)
+    else:
+        _record_query(
+            cursor,
+            statement,
+            parameters,
+            executemany,
+            elapsed,
+            current_request_stats.get(),
+        )
+
+
+def _record_query(
+    cursor: sqlite3.Cursor,
+    statement: str,
+    parameters,
+    executemany: bool,
+    seconds: float,
+    stats: Optional[RequestStats],
+):
+    if stats is not None:
+        stats.queries.append((statement, seconds))
+        stats.db_seconds += seconds
+    if seconds * 1000 >= Config.SLOW_QUERY_MS:
+        slow_query_log.record(cursor, statement, parameters, seconds, executemany)
+
+
+def handle_error(exception_context):
+    # after_cursor_execute is skipped for a failed statement
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def count_lazy_load(orm_execute_state):
+    # lazy_loaded_from raises for anything but a SELECT
+    if not orm_execute_state.is_select:
+        return
+    stats = current_request_stats.get()
+    if stats is not None and orm_execute_state.lazy_loaded_from is not None:
+        stats.lazy_loads += 1
+
+
+class CountingCursor(sqlite3.Cursor):
+    """Counts fetched rows and times fetching them, which no SQLAlchemy event
+    reports, and records a tracked statement once it is done"""
+
+    # (statement, parameters, executemany, seconds, stats) of the statement
+    # whose rows are being fetched
+    _query: Optional[tuple] = None
+
+    def track(self, statement: str, parameters, executemany: bool, seconds: float):
+        self._finish()
+        self._query = (
+            statement,
+            parameters,
+            executemany,
+            seconds,
+            current_request_stats.get(),
+        )
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(started, 0 if row is None else 1, exhausted=row is None)
+        return row
+
+    def fetchmany(self, size: Optional[int] = None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(started, len(rows), exhausted=len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(started, len(rows), exhausted=True)
+        return rows
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def _fetched(self, started: float, rows: int, exhausted: bool):
+        seconds = time.perf_counter() - started
+        if self._query is None:
+            stats = current_request_stats.get()
+        else:
+            statement, parameters, executemany, elapsed, stats = self._query
+            self._query = (statement, parameters, executemany, elapsed + seconds, stats)
+        if stats is not None:
+            stats.rows += rows
+        if exhausted:
+            self._finish()
+
+    def _finish(self):
+        if self._query is not None:
+            query, self._query = self._query, None
+            _record_query(self, *query)
+
+
+class CountingConnection(sqlite3.Connection):
+    def cursor(self, factory=CountingCursor):
+        return super().cursor(factory)
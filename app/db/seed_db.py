@@ -1,15 +1,22 @@
 from datetime import datetime, timedelta
 import random
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
-from app.db.models import Room, User, Booking, Role, user_role_table
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.db.migrations import run_migrations
+from app.db.models import (
+    Room,
+    User,
+    Booking,
+    BookingSeries,
+    Role,
+    room_role_table,
+    user_role_table,
+)
+from app.services.password_hasher import password_hasher
 
 
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 
 def seed_data_if_needed():
@@ -31,7 +38,10 @@ def seed_database(db: Session = None, clear: bool = False):
         if clear:
             print("Clearing existing data...")
             db.execute(user_role_table.delete())
+            db.execute(room_role_table.delete())
             db.query(Booking).delete()
+            # after their bookings, which reference them, and before users and rooms
+            db.query(BookingSeries).delete()
             db.query(User).delete()
             db.query(Room).delete()
             db.query(Role).delete()
@@ -119,11 +129,14 @@ def seed_database(db: Session = None, clear: bool = False):
             {"name": "Guest User", "username": "guest", "roles": ["guest"]},
         ]
         users = []
-        for user_data in users_data:
+        hashed_passwords = password_hasher.hash_many(
+            user_data["username"] for user_data in users_data
+        )
+        for user_data, hashed_password in zip(users_data, hashed_passwords):
             user = User(
                 name=user_data["name"],
                 username=user_data["username"],
-                hashed_password=hash_password(user_data["username"]),
+                hashed_password=hashed_password,
             )
             users.append(user)
             db.add(user)
@@ -198,5 +211,6 @@ def seed_database(db: Session = None, clear: bool = False):
 # For CLI usage
 if __name__ == "__main__":
     print("Seeding database...")
+    run_migrations()
     seed_database(clear=True)
     print("Done.")
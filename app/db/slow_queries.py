@@ -0,0 +1,112 @@
+"""Bounded in-memory log of slow SQL statements and their query plans.
+
+The engine hooks in app.db.query_stats hand every statement slower than
+SLOW_QUERY_MS to `slow_query_log`. The log asks sqlite for the statement's
+plan with EXPLAIN QUERY PLAN and flags plans that scan a watched table
+rather than searching it through an index.
+"""
+
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+import re
+import sqlite3
+from threading import Lock
+from typing import Any, Deque, Dict, List, Sequence
+import app.config as Config
+
+# full scans of these tables are the ones that hurt as history grows
+WATCHED_TABLES = ("booking_table",)
+# a SCAN walking an index (USING [COVERING] INDEX) reads rows in index order
+# rather than the whole table, so only a bare SCAN counts
+FULL_SCAN = re.compile(
+    rf"^SCAN ({'|'.join(WATCHED_TABLES)})(_\d+)?\b(?!.*\bUSING\b.*\bINDEX\b)"
+)
+# datetimes reach sqlite as strings, keep them since they rarely identify anyone
+DATETIME_STRING = re.compile(r"^\d{4}-\d{2}-\d{2}([ T]\d{2}:\d{2}(:\d{2}(\.\d+)?)?)?$")
+
+
+def redact(value: Any) -> Any:
+    """Keep numbers, booleans, NULLs and datetimes, and replace anything
+    else (names, usernames, password hashes) with its type"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str) and DATETIME_STRING.match(value):
+        return value
+    return f"<{type(value).__name__}>"
+
+
+@dataclass(frozen=True)
+class SlowQuery:
+    recorded_at: datetime
+    duration_ms: float
+    statement: str
+    parameters: List[Any]
+    plan: List[str]
+    full_scan: bool
+
+
+class SlowQueryLog:
+    """Ring buffer holding the most recent `size` slow statements"""
+
+    def __init__(self, size: int):
+        self._entries: Deque[SlowQuery] = deque(maxlen=size)
+        self._lock = Lock()
+
+    def record(
+        self,
+        cursor: sqlite3.Cursor,
+        statement: str,
+        parameters: Sequence,
+        seconds: float,
+        executemany: bool,
+    ):
+        if executemany:
+            # one plan serves every parameter set of an executemany
+            parameters = parameters[0] if parameters else ()
+        plan = self.explain(cursor.connection, statement, parameters)
+        entry = SlowQuery(
+            recorded_at=datetime.now(),
+            duration_ms=round(seconds * 1000, 3),
+            statement=statement,
+            parameters=[redact(value) for value in parameters or ()],
+            plan=plan,
+            full_scan=any(FULL_SCAN.match(detail) for detail in plan),
+        )
+        with self._lock:
+            self._entries.append(entry)
+
+    @staticmethod
+    def explain(
+        connection: sqlite3.Connection, statement: str, parameters: Sequence
+    ) -> List[str]:
+        if not statement.lstrip().upper().startswith(
+            ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+        ):
+            return []
+        # a plain cursor, so the plan rows are not counted as rows fetched
+        cursor = connection.cursor(sqlite3.Cursor)
+        try:
+            rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+            return [detail for _, _, _, detail in rows.fetchall()]
+        except sqlite3.Error as e:
+            return [f"EXPLAIN QUERY PLAN failed: {e}"]
+        finally:
+            cursor.close()
+
+    def entries(self, full_scans_only: bool = False) -> List[Dict[str, Any]]:
+        """Logged statements, most recent first"""
+        with self._lock:
+            entries = list(self._entries)
+        return [
+            asdict(entry)
+            for entry in reversed(entries)
+            if entry.full_scan or not full_scans_only
+        ]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(Config.SLOW_QUERY_LOG_SIZE)
@@ -1,23 +1,44 @@
 from contextlib import asynccontextmanager
 import logging
+from threading import Event, Thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from app.api.admin_controller import admin_router
 from app.api.booking_controller import booking_router
 from app.api.room_controller import room_router
 from app.api.user_controller import user_router
 from app.api.role_controller import role_router
 from app.api.health import health_router
-from app.db.database import Base, engine
+from app.api.metrics import metrics_router
+from app.api.timing import RequestTimingMiddleware
+from app.db.migrations import run_migrations
 from app.db.seed_db import seed_data_if_needed
+from app.services.revocation_sync import revocation_sync
+from app.services.warmup import warm_up
+import app.config as Config
 
 logging.basicConfig(level=logging.INFO)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    seed_data_if_needed()
+    run_migrations()
+    if Config.SEED_ON_STARTUP:
+        seed_data_if_needed()
+    # before serving, so no token revoked by an earlier process is accepted
+    revocation_sync.load()
+    stop_sync = Event()
+    if Config.REVOCATION_SYNC_SECONDS > 0:
+        Thread(
+            target=revocation_sync.run,
+            args=(stop_sync,),
+            name="revocation-sync",
+            daemon=True,
+        ).start()
+    # serve liveness straight away; /health/ready reports when warmup is done
+    Thread(target=warm_up, args=(app,), name="warmup", daemon=True).start()
     yield
+    stop_sync.set()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -29,11 +50,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# added last so it is outermost and its timings include the other middleware
+app.add_middleware(RequestTimingMiddleware)
 
 # Routers
 app.include_router(booking_router)
 app.include_router(room_router)
 app.include_router(user_router)
 app.include_router(role_router)
+app.include_router(admin_router)
 app.include_router(health_router)
+app.include_router(metrics_router)
@@ -1,6 +1,15 @@
-from sqlalchemy.orm import Session
-from fastapi import Depends
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.orm import Query, Session
+from fastapi import Depends, HTTPException, status
 from app.db.database import SessionLocal
+from app.schemas.pagination import Page
+
+# values sqlite can bind as an INTEGER
+SQLITE_INTEGERS = range(-(2**63), 2**63)
 
 
 def get_db():
@@ -11,8 +20,85 @@ def get_db():
         db.close()
 
 
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque cursor holding the sort key of the last row on a page"""
+    payload = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: List[Any]) -> List[Any]:
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(payload)
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("Cursor does not match the sort order")
+        decoded = [
+            datetime.fromisoformat(value)
+            if column.type.python_type is datetime
+            else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        ]
+        if any(
+            isinstance(value, int) and value not in SQLITE_INTEGERS
+            for value in decoded
+        ):
+            raise ValueError("Cursor value out of range")
+        return decoded
+    except (ValueError, TypeError, OverflowError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        ) from e
+
+
 class BaseRepository:
     """Base repository class containing db connection"""
 
     def __init__(self, db: Session = Depends(get_db)):
         self.db = db
+
+    def delete_in_chunks(self, model, condition, chunk_size: int) -> List[int]:
+        """Delete the `model` rows matching `condition`, committing every
+        `chunk_size` rows so other writers can take the sqlite write lock in
+        between. Returns the ids of the deleted rows."""
+        deleted = []
+        while True:
+            chunk = select(model.id).where(condition).limit(chunk_size)
+            ids = (
+                self.db.execute(
+                    delete(model).where(model.id.in_(chunk)).returning(model.id),
+                    execution_options={"synchronize_session": False},
+                )
+                .scalars()
+                .all()
+            )
+            self.db.commit()
+            deleted.extend(ids)
+            if len(ids) < chunk_size:
+                return deleted
+
+    @staticmethod
+    def paginate(
+        query: Query,
+        columns: List[Any],
+        cursor: str,
+        limit: int,
+        keys: List[str] = None,
+    ) -> Page:
+        """Keyset pagination: rows strictly after the cursor in `columns` order.
+
+        `columns` must be unique together and backed by an index so every
+        page is a range scan starting at the cursor. `keys` name the row
+        attributes holding each column's value when they differ from the
+        column keys, e.g. when ordering by a joined table's column.
+        """
+        if cursor:
+            query = query.filter(tuple_(*columns) > tuple_(*decode_cursor(cursor, columns)))
+        rows = query.order_by(*columns).limit(limit + 1).all()
+        if len(rows) <= limit:
+            return Page(rows, None)
+        rows = rows[:limit]
+        last = rows[-1]
+        keys = keys or [column.key for column in columns]
+        return Page(rows, encode_cursor([getattr(last, key) for key in keys]))
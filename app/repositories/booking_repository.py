@@ -1,18 +1,26 @@
 from datetime import datetime
-from typing import List
+from typing import Iterator, List
 from fastapi import HTTPException
+from sqlalchemy import Row, select
 from sqlalchemy.orm import joinedload
-from app.db.models import Booking
-from app.schemas.booking import BookingRequestResponse
+from app.db.models import Booking, BookingSeries, Room, User
+from app.schemas.booking import BookingExport, BookingRequestResponse
+from app.schemas.pagination import Page, PageParams
 from app.repositories.base_repository import BaseRepository
 from app.schemas.times import Times
+from app.services.availability_index import availability_index
 
 
 class BookingRepository(BaseRepository):
     """Booking repository containing methods for interacting with bookings in the database"""
 
-    def get_all_your_bookings(self, user_id: str) -> List[Booking]:
-        return self.db.query(Booking).filter(Booking.user_id == user_id).all()
+    def get_all_your_bookings(self, user_id: str, page: PageParams) -> Page:
+        return self.paginate(
+            self.db.query(Booking).filter(Booking.user_id == user_id),
+            [Booking.start_time, Booking.id],
+            page.cursor,
+            page.limit,
+        )
 
     def get_your_booking(self, user_id: int, id: int) -> Booking:
         return (
@@ -25,6 +33,10 @@ class BookingRepository(BaseRepository):
         booking.start_time = desired_times.start_datetime
         booking.end_time = desired_times.end_datetime
         self.db.commit()
+        if booking.accepted:
+            availability_index.add(
+                booking.id, booking.room_number, booking.start_time, booking.end_time
+            )
         return booking
 
     def get_any_booking(self, id: int) -> Booking:
@@ -36,27 +48,132 @@ class BookingRepository(BaseRepository):
 
         self.db.commit()
         self.db.refresh(booking)
+        availability_index.add(
+            booking.id, booking.room_number, booking.start_time, booking.end_time
+        )
         return booking
 
     def create_booking_in_db(self, booking: Booking) -> Booking:
         self.db.add(booking)
         self.db.commit()
         self.db.refresh(booking)
+        if booking.accepted:
+            availability_index.add(
+                booking.id, booking.room_number, booking.start_time, booking.end_time
+            )
         return booking
 
-    def get_all_requests(self) -> List[Booking]:
-        return (
+    def create_bookings_in_db(self, bookings: List[Booking]) -> List[int]:
+        """Insert several bookings in one transaction and return their ids"""
+        self.db.add_all(bookings)
+        self.db.flush()
+        created = [
+            (booking.id, booking.room_number, booking.start_time, booking.end_time)
+            for booking in bookings
+            if booking.accepted
+        ]
+        booking_ids = [booking.id for booking in bookings]
+        self.db.commit()
+        for booking_id, room_number, start_time, end_time in created:
+            availability_index.add(booking_id, room_number, start_time, end_time)
+        return booking_ids
+
+    def create_series_in_db(
+        self, series: BookingSeries, bookings: List[Booking]
+    ) -> BookingSeries:
+        """Insert a series and its occurrences in one transaction"""
+        series.bookings = bookings
+        self.db.add(series)
+        self.db.commit()
+        self.db.refresh(series)
+        for booking in series.bookings:
+            if booking.accepted:
+                availability_index.add(
+                    booking.id, booking.room_number, booking.start_time, booking.end_time
+                )
+        return series
+
+    def get_all_requests(self, page: PageParams) -> Page:
+        return self.paginate(
             self.db.query(Booking)
             .options(joinedload(Booking.user))
+            .filter(Booking.accepted == False),
+            [Booking.start_time, Booking.id],
+            page.cursor,
+            page.limit,
+        )
+
+    def get_requests_with_user_roles(self) -> List[Booking]:
+        return (
+            self.db.query(Booking)
+            .options(joinedload(Booking.user).selectinload(User.roles))
             .filter(Booking.accepted == False)
-            .order_by(Booking.start_time)
+            .order_by(Booking.room_number, Booking.start_time)
             .all()
         )
 
+    def resolve_requests(
+        self, approve: List[Booking], decline: List[Booking]
+    ) -> datetime:
+        """Approve and decline (delete) requests in a single transaction,
+        returning the time the approvals were made at"""
+        now = datetime.now()
+        approved = [
+            (booking.id, booking.room_number, booking.start_time, booking.end_time)
+            for booking in approve
+        ]
+        if approve:
+            self.db.query(Booking).filter(
+                Booking.id.in_([booking.id for booking in approve])
+            ).update(
+                {Booking.accepted: True, Booking.datetime_made: now},
+                synchronize_session=False,
+            )
+        if decline:
+            self.db.query(Booking).filter(
+                Booking.id.in_([booking.id for booking in decline])
+            ).delete(synchronize_session=False)
+        self.db.commit()
+        for booking_id, room_number, start_time, end_time in approved:
+            availability_index.add(booking_id, room_number, start_time, end_time)
+        return now
+
+    def stream_bookings(self, filters: BookingExport, batch_size: int) -> Iterator[Row]:
+        """Stream bookings joined to their user and room, batch_size rows at a time"""
+        query = (
+            select(
+                Booking.id,
+                Booking.room_number,
+                Room.capacity.label("room_capacity"),
+                Booking.user_id,
+                User.username,
+                User.name.label("user_name"),
+                Booking.start_time,
+                Booking.end_time,
+                Booking.accepted,
+                Booking.datetime_made,
+                Booking.series_id,
+            )
+            .join(User, Booking.user_id == User.id)
+            .join(Room, Booking.room_number == Room.room_number)
+            .order_by(Booking.id)
+        )
+        if filters.start_datetime is not None:
+            query = query.where(Booking.end_time > filters.start_datetime)
+        if filters.end_datetime is not None:
+            query = query.where(Booking.start_time < filters.end_datetime)
+        if filters.room_number is not None:
+            query = query.where(Booking.room_number == filters.room_number)
+        if filters.status != "all":
+            query = query.where(Booking.accepted == (filters.status == "accepted"))
+
+        return self.db.execute(query.execution_options(yield_per=batch_size))
+
     def delete_booking(self, booking: Booking) -> List[Booking]:
         try:
             self.db.delete(booking)
             self.db.commit()
+            availability_index.remove(booking.id)
             return {
                 "id": booking.id,
                 "message": f"Successfully deleted booking with id {booking.id}",
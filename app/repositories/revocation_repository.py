@@ -0,0 +1,69 @@
+import time
+from typing import Iterable, List, Tuple
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from app.db.models import RevokedToken, UserRevocation
+from app.repositories.base_repository import BaseRepository
+
+
+class RevocationRepository(BaseRepository):
+    """Revoked tokens and user revocation cutoffs shared by every worker"""
+
+    def revoke_token(self, jti: str, expires_at: float):
+        self.db.execute(
+            insert(RevokedToken)
+            .values(jti=jti, expires_at=expires_at, revoked_at=time.time())
+            .on_conflict_do_nothing()
+        )
+        self.db.commit()
+
+    def revoke_users(self, usernames: Iterable[str], before: float):
+        """Revoke the tokens of every user issued up to `before`, keeping any
+        later cutoff a user already has"""
+        rows = [
+            {"username": username, "revoked_before": before} for username in usernames
+        ]
+        if not rows:
+            return
+        statement = insert(UserRevocation)
+        self.db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[UserRevocation.username],
+                set_={
+                    "revoked_before": func.max(
+                        UserRevocation.revoked_before,
+                        statement.excluded.revoked_before,
+                    )
+                },
+            ),
+            rows,
+        )
+        self.db.commit()
+
+    def get_revocations(
+        self, since: float, now: float
+    ) -> Tuple[List[Tuple[str, float]], List[Tuple[str, float]]]:
+        """(jti, expires_at) of unexpired tokens and (username, revoked_before)
+        of cutoffs, in both cases those recorded at or after `since`"""
+        tokens = (
+            self.db.query(RevokedToken.jti, RevokedToken.expires_at)
+            .filter(RevokedToken.revoked_at >= since, RevokedToken.expires_at > now)
+            .all()
+        )
+        users = (
+            self.db.query(UserRevocation.username, UserRevocation.revoked_before)
+            .filter(UserRevocation.revoked_before >= since)
+            .all()
+        )
+        return [tuple(row) for row in tokens], [tuple(row) for row in users]
+
+    def prune(self, now: float, token_lifetime: float):
+        """Delete revoked tokens that have expired, and cutoffs older than any
+        token still valid, which by then revoke nothing"""
+        self.db.query(RevokedToken).filter(RevokedToken.expires_at <= now).delete(
+            synchronize_session=False
+        )
+        self.db.query(UserRevocation).filter(
+            UserRevocation.revoked_before <= now - token_lifetime
+        ).delete(synchronize_session=False)
+        self.db.commit()
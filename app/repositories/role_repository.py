@@ -1,5 +1,6 @@
-from typing import List
-from app.db.models import Role, User
+from typing import Iterable, List
+from sqlalchemy.dialects.sqlite import insert
+from app.db.models import Role, User, user_role_table
 from app.repositories.base_repository import BaseRepository
 from app.services.exception_wrapper import handle_db_exceptions
 
@@ -14,7 +15,24 @@ class RoleRepository(BaseRepository):
     def get_role(self, role: str) -> Role:
         return self.db.query(Role).filter(Role.role == role).first()
 
+    def get_roles(self, roles: Iterable[str]) -> List[Role]:
+        return self.db.query(Role).filter(Role.role.in_(set(roles))).all()
+
     def update_roles(self, user: User, roles: List[Role]):
         user.roles = roles
         self.db.commit()
         return user
+
+    def assign_roles(self, user_ids: List[int], roles: List[str], replace: bool):
+        """Give every user every role in one transaction, replacing their
+        existing roles when `replace` is set"""
+        if replace:
+            self.db.execute(
+                user_role_table.delete().where(user_role_table.c.user_id.in_(user_ids))
+            )
+        rows = [
+            {"role": role, "user_id": user_id} for user_id in user_ids for role in roles
+        ]
+        if rows:
+            self.db.execute(insert(user_role_table).on_conflict_do_nothing(), rows)
+        self.db.commit()
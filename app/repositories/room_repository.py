@@ -1,42 +1,294 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from datetime import datetime
-from app.db.models import Booking, Room
-from app.repositories.base_repository import BaseRepository
+import re
+from sqlalchemy import and_, delete, func, literal_column, select, tuple_
+from sqlalchemy.orm import selectinload
+from app.db.models import (
+    Booking,
+    BookingChange,
+    BookingSeries,
+    Room,
+    room_role_table,
+    room_search_table,
+    user_role_table,
+)
+from app.repositories.base_repository import (
+    BaseRepository,
+    decode_cursor,
+    encode_cursor,
+)
+from app.schemas.pagination import Page
+from app.schemas.room import RoomPage
+from app.services.availability_index import availability_index
+from app.services.room_catalog import CatalogSnapshot, RoomRecord, room_catalog
+
+ROLE_SEPARATOR = ","
+ROOM_ROWID = literal_column("room_table.rowid")
+
+
+def to_match_query(q: str) -> str:
+    """FTS5 query matching each word of q as a prefix, leaving no syntax to inject"""
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", q))
 
 
 class RoomRepository(BaseRepository):
     """Room repository containing methods for interacting with rooms in the database"""
 
-    def get_all_rooms(self) -> List[Room]:
-        return self.db.query(Room).all()
+    def get_room_records(self) -> List[RoomRecord]:
+        """Load every room with its allowed roles for the room catalog"""
+        return [
+            RoomRecord(
+                room_number=room.room_number,
+                capacity=room.capacity,
+                description=room.description,
+                request_only=room.request_only,
+                allowed_role_names=tuple(sorted(room.allowed_role_names)),
+            )
+            for room in self.db.query(Room).options(selectinload(Room.allowed_roles))
+        ]
+
+    def get_catalog(self) -> CatalogSnapshot:
+        """The cached room catalog, reloaded only after rooms have changed"""
+        return room_catalog.get(self.get_room_records)
+
+    def search_rooms(
+        self, q: str, after: Tuple[float, str] = None, limit: int = None
+    ) -> List[Tuple[str, float]]:
+        """(room_number, rank) of the rooms whose number or description match q,
+        ranked by the room_search index best first.
+
+        With `after` only the matches past that (rank, room_number) keyset are
+        returned, at most `limit` of them.
+        """
+        query = (
+            self.db.query(Room.room_number, room_search_table.c.rank)
+            .join(room_search_table, room_search_table.c.rowid == ROOM_ROWID)
+            .filter(room_search_table.c.room_search.match(to_match_query(q)))
+            .order_by(room_search_table.c.rank, Room.room_number)
+        )
+        if after:
+            query = query.filter(
+                tuple_(room_search_table.c.rank, Room.room_number) > tuple_(*after)
+            )
+        if limit:
+            query = query.limit(limit)
+        return [tuple(row) for row in query.all()]
+
+    def get_all_rooms(self, page: RoomPage) -> Page:
+        if page.q:
+            return self._search_all_rooms(page)
+        after = None
+        if page.cursor:
+            (after,) = decode_cursor(page.cursor, [Room.room_number])
+        rooms = self.get_catalog().page(after, page.limit + 1)
+        if len(rooms) <= page.limit:
+            return Page(rooms, None)
+        rooms = rooms[: page.limit]
+        return Page(rooms, encode_cursor([rooms[-1].room_number]))
+
+    def _search_all_rooms(self, page: RoomPage) -> Page:
+        """Matching rooms in rank order, paged by a (rank, room_number) cursor"""
+        after = None
+        if page.cursor:
+            after = decode_cursor(
+                page.cursor, [room_search_table.c.rank, Room.room_number]
+            )
+        matches = self.search_rooms(page.q, after, page.limit + 1)
+        catalog = self.get_catalog()
+        rooms = [
+            (catalog.get(room_number), rank)
+            for room_number, rank in matches
+            if catalog.get(room_number)
+        ]
+        if len(matches) <= page.limit:
+            return Page([room for room, _ in rooms], None)
+        rooms = rooms[: page.limit]
+        last, rank = rooms[-1]
+        return Page(
+            [room for room, _ in rooms], encode_cursor([rank, last.room_number])
+        )
 
     def get_room(self, room_number: str) -> Room:
         return self.db.query(Room).filter(Room.room_number == room_number).first()
 
+    def get_rooms(self, room_numbers: List[str]) -> List[Room]:
+        """Get the given rooms with their allowed roles loaded"""
+        return (
+            self.db.query(Room)
+            .options(selectinload(Room.allowed_roles))
+            .filter(Room.room_number.in_(room_numbers))
+            .all()
+        )
+
     def create_room_in_db(self, room: Room) -> Room:
         self.db.add(room)
         self.db.commit()
         self.db.refresh(room)
+        room_catalog.bump()
         return room
 
-    def delete_room_in_db(self, room: Room) -> Room:
-        self.db.delete(room)
+    def delete_room_in_db(self, room: Room, chunk_size: int = None) -> Room:
+        """Delete a room and its history with set-based DELETEs rather than
+        loading every booking through the ORM cascade.
+
+        With chunk_size the bookings are first deleted a chunk per transaction;
+        whatever remains goes with the room in one final transaction.
+        """
+        room_number = room.room_number
+        if chunk_size:
+            self.delete_in_chunks(
+                Booking, Booking.room_number == room_number, chunk_size
+            )
+        no_sync = {"synchronize_session": False}
+        self.db.execute(
+            delete(Booking).where(Booking.room_number == room_number),
+            execution_options=no_sync,
+        )
+        self.db.execute(
+            delete(BookingSeries).where(BookingSeries.room_number == room_number),
+            execution_options=no_sync,
+        )
+        self.db.execute(
+            room_role_table.delete().where(room_role_table.c.room_number == room_number)
+        )
+        self.db.execute(
+            delete(Room).where(Room.room_number == room_number),
+            execution_options=no_sync,
+        )
         self.db.commit()
+        availability_index.remove_room(room_number)
+        room_catalog.bump()
         return room
 
-    def get_rooms_capacity(self, min_capacity: int):
-        return self.db.query(Room).filter(Room.capacity >= min_capacity)
+    def get_rooms_capacity(self, min_capacity: int) -> List[RoomRecord]:
+        """Rooms holding at least min_capacity people, smallest first"""
+        return self.get_catalog().with_capacity(min_capacity)
 
-    def get_rooms_with_availability_check(
-        self, min_capacity: int, desired_start: datetime, desired_end: datetime
-    ):
-        """Get all rooms with sufficient capacity (returns query, not executed)"""
-        return self.get_rooms_capacity(min_capacity)
+    def get_rooms_with_availability(
+        self,
+        min_capacity: int,
+        desired_start: datetime,
+        desired_end: datetime,
+        user_id: int,
+        role_mask: int,
+        q: str = None,
+    ) -> List[Tuple[RoomRecord, bool, bool]]:
+        """Get (room, available, sufficient_roles) for every room holding at least
+        min_capacity, available rooms first.
+
+        Answered from the room catalog and availability index while the index
+        is warm, otherwise in a single statement: an anti-join against
+        booking_table for availability and an aggregated outer join of
+        room_role_table against the user's rows in user_role_table for roles.
+        With `q` only rooms matching it in the room_search index are returned,
+        in rank order within each group.
+        """
+        if self.sync_availability_index():
+            conflicting = availability_index.conflicting_room_numbers(
+                desired_start, desired_end
+            )
+            catalog = self.get_catalog()
+            bookable = catalog.bookable_by(role_mask)
+            rooms = catalog.with_capacity(min_capacity)
+            if q:
+                ranks = {
+                    room_number: position
+                    for position, (room_number, _) in enumerate(self.search_rooms(q))
+                }
+                rooms = [room for room in rooms if room.room_number in ranks]
+            rows = [
+                (
+                    room,
+                    room.room_number not in conflicting,
+                    room.room_number in bookable,
+                )
+                for room in rooms
+            ]
+            if q:
+                rows.sort(key=lambda row: (not row[1], ranks[row[0].room_number]))
+            else:
+                rows.sort(key=lambda row: (not row[1], row[0].room_number))
+            return rows
+
+        conflict = (
+            select(Booking.id)
+            .where(
+                Booking.room_number == Room.room_number,
+                Booking.accepted == True,
+                Booking.start_time < desired_end,
+                Booking.end_time > desired_start,
+            )
+            .exists()
+        )
+        available = (~conflict).label("available")
+        user_role = user_role_table.alias("user_role")
+        query = (
+            self.db.query(
+                Room.room_number,
+                Room.capacity,
+                Room.description,
+                Room.request_only,
+                available,
+                func.group_concat(room_role_table.c.role, ROLE_SEPARATOR),
+                (
+                    (func.count(room_role_table.c.role) == 0)
+                    | (func.count(user_role.c.user_id) > 0)
+                ).label("sufficient_roles"),
+            )
+            .outerjoin(
+                room_role_table, room_role_table.c.room_number == Room.room_number
+            )
+            .outerjoin(
+                user_role,
+                and_(
+                    user_role.c.role == room_role_table.c.role,
+                    user_role.c.user_id == user_id,
+                ),
+            )
+            .filter(Room.capacity >= min_capacity)
+            .group_by(Room.room_number)
+        )
+        if q:
+            query = (
+                query.join(room_search_table, room_search_table.c.rowid == ROOM_ROWID)
+                .filter(room_search_table.c.room_search.match(to_match_query(q)))
+                .order_by(available.desc(), room_search_table.c.rank, Room.room_number)
+            )
+        else:
+            query = query.order_by(available.desc(), Room.room_number)
+        return [
+            (
+                RoomRecord(
+                    room_number=room_number,
+                    capacity=capacity,
+                    description=description,
+                    request_only=request_only,
+                    allowed_role_names=tuple(
+                        sorted(roles.split(ROLE_SEPARATOR)) if roles else ()
+                    ),
+                ),
+                bool(is_available),
+                bool(sufficient_roles),
+            )
+            for (
+                room_number,
+                capacity,
+                description,
+                request_only,
+                is_available,
+                roles,
+                sufficient_roles,
+            ) in query.all()
+        ]
 
     def get_conflicting_room_numbers(
         self, desired_start: datetime, desired_end: datetime
     ):
         """Get room numbers that have conflicting bookings"""
+        if self.sync_availability_index():
+            return availability_index.conflicting_room_numbers(
+                desired_start, desired_end
+            )
         return set(
             room_number
             for (room_number,) in self.db.query(Booking.room_number)
@@ -56,6 +308,10 @@ class RoomRepository(BaseRepository):
         desired_end: datetime,
         booking_id: int = None,
     ) -> bool:
+        if self.sync_availability_index():
+            return availability_index.room_is_available(
+                room_number, desired_start, desired_end, booking_id
+            )
         conflicting_bookings = (
             self.db.query(Booking)
             .filter(
@@ -68,3 +324,56 @@ class RoomRepository(BaseRepository):
             .first()
         )
         return conflicting_bookings is None
+
+    def load_availability_index(self):
+        """Fill the availability index from booking_table"""
+        # writes committed while the snapshot is read are replayed by load
+        availability_index.begin_load()
+        # read first, so that changes made during the read are replayed later
+        last_change = self.db.query(func.max(BookingChange.seq)).scalar() or 0
+        availability_index.load(self.get_accepted_intervals(), last_change)
+
+    def sync_availability_index(self) -> bool:
+        """Apply bookings written by any process since the availability index
+        last looked, returning False while the index is cold.
+
+        Other workers, the CLI and the seeder never touch this process's
+        index, so their writes are only seen through booking_change_table.
+        """
+        if not availability_index.is_warm:
+            return False
+        changes = self.db.query(
+            BookingChange.seq,
+            BookingChange.booking_id,
+            BookingChange.room_number,
+            BookingChange.start_time,
+            BookingChange.end_time,
+            BookingChange.accepted,
+        ).filter(BookingChange.seq > availability_index.last_change)
+        if availability_index.apply_changes(changes.order_by(BookingChange.seq)):
+            return True
+        # the log was pruned past what the index has seen
+        self.load_availability_index()
+        return True
+
+    def get_accepted_intervals(
+        self,
+        desired_start: datetime = None,
+        desired_end: datetime = None,
+        room_numbers: List[str] = None,
+    ) -> List[Tuple[int, str, datetime, datetime]]:
+        """Get (id, room_number, start, end) for accepted bookings ordered by room
+        and start time, optionally only those overlapping the desired window"""
+        query = self.db.query(
+            Booking.id, Booking.room_number, Booking.start_time, Booking.end_time
+        ).filter(Booking.accepted == True)
+        if desired_start is not None:
+            query = query.filter(Booking.end_time > desired_start)
+        if desired_end is not None:
+            query = query.filter(Booking.start_time < desired_end)
+        if room_numbers is not None:
+            query = query.filter(Booking.room_number.in_(room_numbers))
+        return [
+            tuple(row)
+            for row in query.order_by(Booking.room_number, Booking.start_time).all()
+        ]
@@ -1,6 +1,22 @@
-from typing import List
+from typing import Dict, Iterable, List
+from sqlalchemy import delete, func, insert, or_
+from sqlalchemy.orm import Query, joinedload, selectinload
 from app.repositories.base_repository import BaseRepository
-from app.db.models import User
+from app.db.models import Booking, BookingSeries, User, user_role_table
+from app.schemas.pagination import Page
+from app.schemas.user import UserFilter, UserPage
+from app.services.availability_index import availability_index
+
+LIKE_ESCAPE = "/"
+
+
+def to_prefix_pattern(prefix: str) -> str:
+    """LIKE pattern matching values starting with `prefix` literally. It is
+    bound as a plain parameter, which sqlite can turn into an index range."""
+    for char in (LIKE_ESCAPE, "%", "_"):
+        prefix = prefix.replace(char, LIKE_ESCAPE + char)
+    return prefix + "%"
+
 
 class UserRepository(BaseRepository):
     """User repository containing methods for interacting with users in the database"""
@@ -14,7 +30,104 @@ class UserRepository(BaseRepository):
     def get_user_by_username(self, username: str) -> User | None:
         return self.db.query(User).filter(User.username == username).first()
 
-    def get_all_users_from_db(self) -> List[User]:
-        return self.db.query(User).all()
-    
-    
\ No newline at end of file
+    def get_user_ids(self, usernames: Iterable[str]) -> Dict[str, int]:
+        rows = self.db.query(User.username, User.id).filter(
+            User.username.in_(set(usernames))
+        )
+        return dict(rows.all())
+
+    def create_users(
+        self, users: List[Dict], roles: Dict[str, List[str]]
+    ) -> Dict[str, int]:
+        """Insert user rows and their `roles` by username with executemany
+        inserts in one transaction, returning the new ids by username"""
+        created = self.db.execute(
+            insert(User).returning(User.username, User.id), users
+        ).all()
+        user_ids = dict(created)
+        role_rows = [
+            {"role": role, "user_id": user_ids[username]}
+            for username, user_roles in roles.items()
+            for role in user_roles
+        ]
+        if role_rows:
+            self.db.execute(insert(user_role_table), role_rows)
+        self.db.commit()
+        return user_ids
+
+    def update_password_hash(self, user: User, hashed_password: str) -> User:
+        user.hashed_password = hashed_password
+        self.db.commit()
+        return user
+
+    def get_user_with_roles(self, username: str) -> User | None:
+        return (
+            self.db.query(User)
+            .options(joinedload(User.roles))
+            .filter(User.username == username)
+            .first()
+        )
+
+    def _filter_users(self, filters: UserFilter) -> Query:
+        query = self.db.query(User)
+        if filters.role:
+            query = query.join(user_role_table).filter(
+                user_role_table.c.role == filters.role
+            )
+        if filters.prefix:
+            pattern = to_prefix_pattern(filters.prefix)
+            query = query.filter(
+                or_(
+                    User.name.like(pattern, escape=LIKE_ESCAPE),
+                    User.username.like(pattern, escape=LIKE_ESCAPE),
+                )
+            )
+        return query
+
+    def get_all_users_from_db(self, page: UserPage) -> Page:
+        query = self._filter_users(page).options(selectinload(User.roles))
+        if page.role:
+            # walk the (role, user_id) primary key in order rather than sorting
+            # every user holding the role
+            return self.paginate(
+                query, [user_role_table.c.user_id], page.cursor, page.limit, ["id"]
+            )
+        return self.paginate(query, [User.id], page.cursor, page.limit)
+
+    def count_users(self, filters: UserFilter) -> int:
+        return self._filter_users(filters).with_entities(func.count(User.id)).scalar()
+
+    def delete_user_in_db(self, user: User, chunk_size: int = None) -> User:
+        """Delete a user and their bookings with set-based DELETEs, optionally
+        deleting the bookings a chunk per transaction first"""
+        user_id = user.id
+        booking_ids = []
+        if chunk_size:
+            booking_ids = self.delete_in_chunks(
+                Booking, Booking.user_id == user_id, chunk_size
+            )
+        no_sync = {"synchronize_session": False}
+        booking_ids += (
+            self.db.execute(
+                delete(Booking)
+                .where(Booking.user_id == user_id)
+                .returning(Booking.id),
+                execution_options=no_sync,
+            )
+            .scalars()
+            .all()
+        )
+        self.db.execute(
+            delete(BookingSeries).where(BookingSeries.user_id == user_id),
+            execution_options=no_sync,
+        )
+        self.db.execute(
+            user_role_table.delete().where(user_role_table.c.user_id == user_id)
+        )
+        self.db.execute(
+            delete(User).where(User.id == user_id), execution_options=no_sync
+        )
+        self.db.commit()
+        for booking_id in booking_ids:
+            availability_index.remove(booking_id)
+        return user
@@ -1,6 +1,6 @@
 from datetime import datetime
-from pydantic import BaseModel, Field
-from typing import Annotated
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Dict, List, Literal
 from app.schemas.times import Times
 
 
@@ -20,3 +20,51 @@ class BookingRequestResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class BookingBatch(BaseModel):
+    """Several bookings validated and made together"""
+
+    bookings: Annotated[List[BookingCreate], Field(min_length=1, max_length=200)]
+    mode: Literal["all_or_nothing", "best_effort"] = "all_or_nothing"
+    is_request: bool = False
+
+
+class BookingSeriesCreate(BookingCreate):
+    """First occurrence plus an RRULE style recurrence ending on a date or count"""
+
+    frequency: Literal["daily", "weekly", "monthly"]
+    interval: int = Field(default=1, ge=1, le=52)
+    count: int | None = Field(default=None, ge=1)
+    until: datetime | None = Field(default=None)
+    is_request: bool = False
+    skip_conflicts: bool = False
+
+    @model_validator(mode="after")
+    def validate_recurrence_end(self):
+        """Exactly one of count or until ends the series"""
+        if (self.count is None) == (self.until is None):
+            raise ValueError("Exactly one of count or until must be provided")
+        if self.until is not None and self.until.replace(
+            tzinfo=None
+        ) < self.start_datetime.replace(tzinfo=None):
+            raise ValueError("Until must be after the first occurrence")
+        return self
+
+
+class ResolveRequests(BaseModel):
+    """How to weigh pending requests when resolving the queue"""
+
+    weight_by: Literal["count", "age", "duration"] = "count"
+    role_weights: Dict[str, Annotated[float, Field(ge=0)]] = Field(default_factory=dict)
+    dry_run: bool = False
+
+
+class BookingExport(BaseModel):
+    """Filters for exporting bookings; unlike Times, past ranges are allowed"""
+
+    format: Literal["ndjson", "csv"] = "ndjson"
+    start_datetime: datetime | None = Field(default=None)
+    end_datetime: datetime | None = Field(default=None)
+    room_number: str | None = Field(default=None)
+    status: Literal["all", "accepted", "pending"] = "all"
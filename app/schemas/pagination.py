@@ -0,0 +1,15 @@
+from typing import Any, List, NamedTuple, Optional
+from pydantic import BaseModel, Field
+import app.config as Config
+
+
+class PageParams(BaseModel):
+    """Keyset pagination parameters; cursor is the X-Next-Cursor of the previous page"""
+
+    cursor: str | None = Field(default=None)
+    limit: int = Field(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE)
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
@@ -1,15 +1,63 @@
-from pydantic import BaseModel, Field
+from datetime import date, timedelta
+import re
+from pydantic import BaseModel, Field, field_validator, model_validator
 from typing import List, Optional
+from app.schemas.pagination import PageParams
 from app.schemas.times import Times
 
 
-class GetRooms(Times):
+class RoomSearch(BaseModel):
+    """Full-text search over room numbers and descriptions, best matches first"""
+
+    q: str | None = Field(default=None, max_length=200)
+
+    @field_validator("q")
+    @classmethod
+    def validate_q(cls, q: str | None) -> str | None:
+        if q is not None and not re.search(r"\w", q):
+            raise ValueError("Search must contain at least one word")
+        return q
+
+
+class GetRooms(Times, RoomSearch):
     min_capacity: int = 0
 
 
+class RoomPage(PageParams, RoomSearch):
+    """Page of rooms in room number order, or in rank order when searching"""
+
+
 class RoomCreate(BaseModel):
     room_number: str
     capacity: int
     description: str | None = Field(default=None)
     request_only: bool | None = Field(default=None)
     roles: List[str] | None = Field(default=None)
+
+
+class AvailabilityGrid(BaseModel):
+    """Day (or week) to build the free/busy grid for"""
+
+    date: date
+    days: int = Field(default=1, ge=1, le=7)
+    min_capacity: int = 0
+
+
+class FreeSlots(Times):
+    """Search horizon runs from start_datetime to end_datetime"""
+
+    duration_minutes: int = Field(gt=0, multiple_of=15)
+    min_capacity: int = 0
+    room_numbers: List[str] | None = Field(default=None)
+    limit: int = Field(default=3, ge=1, le=20)
+    include_request_only: bool = False
+
+    @model_validator(mode="after")
+    def validate_horizon(self):
+        """Keep the search horizon bounded and long enough for one slot"""
+        horizon = self.end_datetime - self.start_datetime
+        if horizon > timedelta(days=31):
+            raise ValueError("Search horizon must be at most 31 days")
+        if horizon < timedelta(minutes=self.duration_minutes):
+            raise ValueError("Search horizon must be at least the duration")
+        return self
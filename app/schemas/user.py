@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Annotated, List
+from app.schemas.pagination import PageParams
+import app.config as Config
 
 
 class UserCreate(BaseModel):
@@ -20,3 +22,31 @@ class UserOut(BaseModel):
 class PutRoles(BaseModel):
     username: Annotated[str, Field(min_length=1)]
     roles: List[str]
+
+
+class UserFilter(BaseModel):
+    """Admin user listing filters; prefix matches the start of the name or
+    username, ignoring ASCII case"""
+
+    role: str | None = Field(default=None, min_length=1)
+    prefix: str | None = Field(default=None, min_length=1, max_length=100)
+
+
+class UserPage(PageParams, UserFilter):
+    """Page of users in id order"""
+
+
+class UserImport(UserCreate):
+    """One row of a bulk user import"""
+
+    roles: List[str] = Field(default_factory=list)
+
+
+class BulkRoles(BaseModel):
+    """Roles given to many users at once, added to or replacing their own"""
+
+    usernames: Annotated[
+        List[str], Field(min_length=1, max_length=Config.MAX_BULK_USERS)
+    ]
+    roles: List[str]
+    replace: bool = False
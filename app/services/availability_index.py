@@ -0,0 +1,224 @@
+"""In-memory per-room index of accepted bookings used for conflict detection"""
+
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from threading import RLock
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def to_naive(value: datetime) -> datetime:
+    """Drop tzinfo the same way the sqlite DateTime column does when storing"""
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+class _RoomIntervals:
+    """Accepted bookings for a single room sorted by start time"""
+
+    __slots__ = ("starts", "entries", "max_length")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.entries: List[Tuple[datetime, int, datetime]] = []
+        self.max_length = timedelta(0)
+
+    def add(self, booking_id: int, start: datetime, end: datetime):
+        entry = (start, booking_id, end)
+        index = bisect_left(self.entries, entry)
+        self.entries.insert(index, entry)
+        self.starts.insert(index, start)
+        self.max_length = max(self.max_length, end - start)
+
+    def remove(self, booking_id: int, start: datetime, end: datetime) -> bool:
+        entry = (start, booking_id, end)
+        index = bisect_left(self.entries, entry)
+        if index < len(self.entries) and self.entries[index] == entry:
+            del self.entries[index]
+            del self.starts[index]
+            if end - start == self.max_length:
+                # the longest booking may be gone, so shrink the overlap scan
+                self.max_length = max(
+                    (end - start for start, _, end in self.entries),
+                    default=timedelta(0),
+                )
+            return True
+        return False
+
+    def overlaps(
+        self, desired_start: datetime, desired_end: datetime, exclude_id: int = None
+    ) -> bool:
+        # every booking starting before desired_end sits left of this index, and
+        # none starting more than max_length before desired_start can reach it
+        index = bisect_left(self.starts, desired_end) - 1
+        earliest = desired_start - self.max_length
+        while index >= 0 and self.starts[index] >= earliest:
+            _, booking_id, end = self.entries[index]
+            if end > desired_start and booking_id != exclude_id:
+                return True
+            index -= 1
+        return False
+
+
+class AvailabilityIndex:
+    """Per-room sorted interval lists of accepted bookings.
+
+    The index is cold until `load` is called; callers must fall back to SQL
+    while `is_warm` is False. Writes made through the repositories keep it in
+    sync after they have been committed, and `apply_changes` replays those
+    made by other processes from booking_change_table before each lookup.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._rooms: Dict[str, _RoomIntervals] = {}
+        self._bookings: Dict[int, Tuple[str, datetime, datetime]] = {}
+        self._warm = False
+        # seq of the last booking_change_table row reflected in the index
+        self._last_change = 0
+        # writes seen between begin_load and load, replayed onto the loaded rows
+        self._pending: Optional[List[Tuple[Callable, tuple]]] = None
+
+    @property
+    def is_warm(self) -> bool:
+        return self._warm
+
+    @property
+    def last_change(self) -> int:
+        return self._last_change
+
+    def begin_load(self):
+        """Start recording writes so that a `load` from a snapshot read after
+        this point misses none that commit while the snapshot is being read"""
+        with self._lock:
+            self._pending = []
+
+    def load(
+        self,
+        intervals: Iterable[Tuple[int, str, datetime, datetime]],
+        last_change: int = 0,
+    ):
+        """Replace the index contents with (id, room_number, start, end) rows,
+        read after booking_change_table had reached seq `last_change`"""
+        rooms: Dict[str, _RoomIntervals] = {}
+        bookings = {}
+        rows = sorted(
+            (to_naive(start), booking_id, room_number, to_naive(end))
+            for booking_id, room_number, start, end in intervals
+        )
+        for start, booking_id, room_number, end in rows:
+            room = rooms.setdefault(room_number, _RoomIntervals())
+            room.entries.append((start, booking_id, end))
+            room.starts.append(start)
+            room.max_length = max(room.max_length, end - start)
+            bookings[booking_id] = (room_number, start, end)
+        with self._lock:
+            self._rooms = rooms
+            self._bookings = bookings
+            # writes are idempotent, so replaying one the snapshot saw is harmless
+            for write, args in self._pending or []:
+                write(*args)
+            self._pending = None
+            self._last_change = last_change
+            self._warm = True
+
+    def invalidate(self):
+        """Mark the index cold so that lookups go back to SQL until reloaded"""
+        with self._lock:
+            self._rooms = {}
+            self._bookings = {}
+            self._pending = None
+            self._last_change = 0
+            self._warm = False
+
+    def apply_changes(
+        self,
+        changes: Iterable[Tuple[int, int, str, datetime, datetime, bool]],
+    ) -> bool:
+        """Apply (seq, id, room_number, start, end, accepted) rows of
+        booking_change_table newer than `last_change`, in seq order.
+
+        Returns False, leaving the index cold, when the oldest change is not
+        the one right after `last_change` because the log has been pruned past
+        it; the index must then be reloaded.
+        """
+        with self._lock:
+            if not self._warm:
+                return False
+            for seq, booking_id, room_number, start, end, accepted in changes:
+                if seq <= self._last_change:
+                    continue
+                if seq != self._last_change + 1:
+                    self.invalidate()
+                    return False
+                if accepted:
+                    self._add(booking_id, room_number, start, end)
+                else:
+                    self._discard(booking_id)
+                self._last_change = seq
+            return True
+
+    def add(self, booking_id: int, room_number: str, start: datetime, end: datetime):
+        self._write(self._add, booking_id, room_number, start, end)
+
+    def remove(self, booking_id: int):
+        self._write(self._discard, booking_id)
+
+    def remove_room(self, room_number: str):
+        self._write(self._remove_room, room_number)
+
+    def _write(self, write: Callable, *args):
+        if not self._warm and self._pending is None:
+            return
+        with self._lock:
+            if self._warm:
+                write(*args)
+            elif self._pending is not None:
+                self._pending.append((write, args))
+
+    def _add(self, booking_id: int, room_number: str, start: datetime, end: datetime):
+        self._discard(booking_id)
+        start, end = to_naive(start), to_naive(end)
+        self._rooms.setdefault(room_number, _RoomIntervals()).add(
+            booking_id, start, end
+        )
+        self._bookings[booking_id] = (room_number, start, end)
+
+    def _remove_room(self, room_number: str):
+        room = self._rooms.pop(room_number, None)
+        if room:
+            for _, booking_id, _ in room.entries:
+                self._bookings.pop(booking_id, None)
+
+    def _discard(self, booking_id: int):
+        existing = self._bookings.pop(booking_id, None)
+        if existing:
+            room_number, start, end = existing
+            self._rooms[room_number].remove(booking_id, start, end)
+
+    def room_is_available(
+        self,
+        room_number: str,
+        desired_start: datetime,
+        desired_end: datetime,
+        booking_id: int = None,
+    ) -> bool:
+        with self._lock:
+            room = self._rooms.get(room_number)
+            if not room:
+                return True
+            return not room.overlaps(
+                to_naive(desired_start), to_naive(desired_end), booking_id
+            )
+
+    def conflicting_room_numbers(
+        self, desired_start: datetime, desired_end: datetime
+    ) -> Set[str]:
+        desired_start, desired_end = to_naive(desired_start), to_naive(desired_end)
+        with self._lock:
+            return {
+                room_number
+                for room_number, room in self._rooms.items()
+                if room.overlaps(desired_start, desired_end)
+            }
+
+
+availability_index = AvailabilityIndex()
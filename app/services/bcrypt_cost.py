@@ -0,0 +1,112 @@
+"""Choose the bcrypt cost for this machine and benchmark each cost"""
+
+import argparse
+import logging
+import time
+from typing import Iterator, Tuple
+import bcrypt
+from passlib.context import CryptContext
+import app.config as Config
+
+logger = logging.getLogger("app.bcrypt_cost")
+
+SAMPLE_PASSWORD = b"calibration-password"
+# Hashes timed per cost, a single one is easily slowed by other work on the machine
+CALIBRATION_SAMPLES = 3
+
+
+def time_hash(rounds: int) -> float:
+    """Seconds taken by a single bcrypt hash at `rounds`"""
+    salt = bcrypt.gensalt(rounds)
+    started = time.perf_counter()
+    bcrypt.hashpw(SAMPLE_PASSWORD, salt)
+    return time.perf_counter() - started
+
+
+def within_budget(rounds: int, budget_seconds: float, samples: int) -> bool:
+    """Whether the fastest of `samples` hashes at `rounds` fits the budget.
+
+    The fastest sample is the one least disturbed by other load, and sampling
+    stops at the first hash within budget since the rest cannot change that.
+    """
+    return any(time_hash(rounds) <= budget_seconds for _ in range(samples))
+
+
+def calibrate_rounds(
+    budget_seconds: float,
+    min_rounds: int,
+    max_rounds: int,
+    samples: int = CALIBRATION_SAMPLES,
+) -> int:
+    """Highest cost from min_rounds to max_rounds hashing within budget_seconds.
+
+    Each extra round doubles the work, so the search stops at the first cost
+    over budget, which costs at most `samples` hashes of twice the budget.
+    Never returns less than min_rounds, even on hardware too slow to meet it.
+    """
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        if not within_budget(rounds, budget_seconds, samples):
+            break
+        chosen = rounds
+    return chosen
+
+
+def apply_rounds(context: CryptContext, rounds: int):
+    """Hash at `rounds` and flag hashes below it for rehashing.
+
+    There is no upper bound, so hashes made at a higher cost, for instance by
+    a worker that calibrated at a quieter moment, are kept as they are.
+    """
+    context.update(bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds)
+
+
+def configure_bcrypt_cost(context: CryptContext) -> int:
+    """Apply BCRYPT_ROUNDS if set, otherwise calibrate against the latency budget"""
+    rounds = Config.BCRYPT_ROUNDS
+    if rounds is None:
+        rounds = calibrate_rounds(
+            Config.HASH_LATENCY_BUDGET_MS / 1000,
+            Config.BCRYPT_MIN_ROUNDS,
+            Config.BCRYPT_MAX_ROUNDS,
+        )
+        logger.info(
+            f"Calibrated bcrypt cost {rounds} for a {Config.HASH_LATENCY_BUDGET_MS}ms budget"
+        )
+    apply_rounds(context, rounds)
+    return rounds
+
+
+def benchmark(
+    min_rounds: int, max_rounds: int, seconds: float
+) -> Iterator[Tuple[int, int, float]]:
+    """Yield (rounds, hashes, hashes per second) hashing for about `seconds` per cost"""
+    for rounds in range(min_rounds, max_rounds + 1):
+        hashes, elapsed = 0, 0.0
+        while elapsed < seconds or hashes == 0:
+            elapsed += time_hash(rounds)
+            hashes += 1
+        yield rounds, hashes, hashes / elapsed
+
+
+# For CLI usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark bcrypt hashes per second")
+    parser.add_argument("--min-rounds", type=int, default=4)
+    parser.add_argument("--max-rounds", type=int, default=Config.BCRYPT_MAX_ROUNDS)
+    parser.add_argument(
+        "--seconds", type=float, default=1.0, help="time spent at each cost"
+    )
+    args = parser.parse_args()
+
+    print(f"{'cost':>4} {'hashes/s':>10} {'ms/hash':>9}")
+    for rounds, hashes, per_second in benchmark(
+        args.min_rounds, args.max_rounds, args.seconds
+    ):
+        print(f"{rounds:>4} {per_second:>10.2f} {1000 / per_second:>9.1f}")
+    chosen = calibrate_rounds(
+        Config.HASH_LATENCY_BUDGET_MS / 1000,
+        Config.BCRYPT_MIN_ROUNDS,
+        Config.BCRYPT_MAX_ROUNDS,
+    )
+    print(f"Chosen cost {chosen} for a {Config.HASH_LATENCY_BUDGET_MS}ms budget")
@@ -1,13 +1,40 @@
-from typing import List
+import csv
+import io
+import json
+from itertools import groupby
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterator, List
 from fastapi import Depends, HTTPException, status
-from app.db.models import Booking, User
+from fastapi.encoders import jsonable_encoder
+from app.auth.role_bits import has_any_role
+from app.db.database import SessionLocal
+from app.db.models import Booking, BookingSeries, Room, User
 from app.repositories.booking_repository import BookingRepository
 from app.repositories.room_repository import RoomRepository
-from app.schemas.booking import BookingCreate, BookingRequestResponse
+from app.schemas.booking import (
+    BookingBatch,
+    BookingCreate,
+    BookingExport,
+    BookingRequestResponse,
+    BookingSeriesCreate,
+    ResolveRequests,
+)
+from app.schemas.pagination import Page, PageParams
 from app.schemas.times import Times
+from app.services.availability_index import AvailabilityIndex, to_naive
 from app.services.exception_wrapper import handle_db_exceptions
+from app.services.scheduling import (
+    ensure_disjoint,
+    expand_occurrences,
+    find_conflicts,
+    take_occurrences,
+    weighted_interval_schedule,
+)
 from datetime import datetime
 
+MAX_SERIES_OCCURRENCES = 366
+EXPORT_BATCH_SIZE = 1000
+
 
 class BookingService:
     """Service injects repositories (which contains DB connections)"""
@@ -20,6 +47,20 @@ class BookingService:
         self.booking_repo = booking_repo
         self.room_repo = room_repo
 
+    @staticmethod
+    def check_room_bookable(room: Room, is_request: bool, current_user: User):
+        """Raise if the user may not book (or request) this room"""
+        if room.request_only and is_request == False:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Room is request only"
+            )
+
+        # Check user has at least 1 of the allowed roles to book the room if the room has allowed roles
+        if not has_any_role(current_user.role_mask, room.allowed_role_mask):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
+            )
+
     @handle_db_exceptions
     def booking_logic(
         self, booking: BookingCreate, is_request: bool, current_user: User
@@ -30,18 +71,7 @@ class BookingService:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, detail="Room does not exist"
             )
-        if room.request_only and is_request == False:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST, detail="Room is request only"
-            )
-
-        # Check user has at least 1 of the allowed roles to book the room if the room has allowed roles
-        if room.allowed_role_names and not any(
-            role in current_user.role_names for role in room.allowed_role_names
-        ):
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN, detail="Insufficient permissions"
-            )
+        BookingService.check_room_bookable(room, is_request, current_user)
 
         # check the room is available
         if not self.room_repo.room_is_available(
@@ -66,8 +96,194 @@ class BookingService:
         return self.booking_repo.create_booking_in_db(new_booking)
 
     @handle_db_exceptions
-    def get_all_your_bookings(self, user_id: str) -> List[Booking]:
-        return self.booking_repo.get_all_your_bookings(user_id)
+    def batch_booking_logic(self, batch: BookingBatch, current_user: User):
+        room_numbers = list({booking.room_number for booking in batch.bookings})
+        rooms = {room.room_number: room for room in self.room_repo.get_rooms(room_numbers)}
+
+        # one query for every accepted booking that could clash with the batch,
+        # loaded into a scratch index that also tracks the batch's own bookings
+        scratch = AvailabilityIndex()
+        scratch.load(
+            self.room_repo.get_accepted_intervals(
+                min(to_naive(booking.start_datetime) for booking in batch.bookings),
+                max(to_naive(booking.end_datetime) for booking in batch.bookings),
+                room_numbers,
+            )
+        )
+
+        results = []
+        new_bookings = []
+        for index, booking in enumerate(batch.bookings):
+            result = {
+                "index": index,
+                "room_number": booking.room_number,
+                "start_datetime": booking.start_datetime,
+                "end_datetime": booking.end_datetime,
+                "created": False,
+                "booking_id": None,
+                "detail": None,
+            }
+            results.append(result)
+
+            room = rooms.get(booking.room_number)
+            try:
+                if not room:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Room does not exist",
+                    )
+                BookingService.check_room_bookable(room, batch.is_request, current_user)
+            except HTTPException as e:
+                result["detail"] = e.detail
+                continue
+
+            if not scratch.room_is_available(
+                booking.room_number, booking.start_datetime, booking.end_datetime
+            ):
+                result["detail"] = "Room is unavailable"
+                continue
+
+            # requests are not accepted yet so they don't block each other
+            if not batch.is_request:
+                scratch.add(
+                    -(index + 1),
+                    booking.room_number,
+                    booking.start_datetime,
+                    booking.end_datetime,
+                )
+            new_bookings.append(
+                (
+                    result,
+                    Booking(
+                        user_id=current_user.id,
+                        room_number=booking.room_number,
+                        start_time=booking.start_datetime,
+                        end_time=booking.end_datetime,
+                        accepted=not batch.is_request,
+                        datetime_made=datetime.now(),
+                    ),
+                )
+            )
+
+        failed = len(results) - len(new_bookings)
+        if failed and batch.mode == "all_or_nothing":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": f"No bookings were made as {failed} of {len(results)} failed",
+                    "results": jsonable_encoder(results),
+                },
+            )
+
+        if new_bookings:
+            booking_ids = self.booking_repo.create_bookings_in_db(
+                [new_booking for _, new_booking in new_bookings]
+            )
+            for (result, _), booking_id in zip(new_bookings, booking_ids):
+                result["created"] = True
+                result["booking_id"] = booking_id
+
+        return {
+            "created": len(new_bookings),
+            "failed": failed,
+            "results": results,
+        }
+
+    @handle_db_exceptions
+    def create_series(self, series: BookingSeriesCreate, current_user: User):
+        room = self.room_repo.get_room(series.room_number)
+        if not room:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Room does not exist"
+            )
+        BookingService.check_room_bookable(room, series.is_request, current_user)
+
+        try:
+            occurrences = take_occurrences(
+                expand_occurrences(
+                    series.start_datetime,
+                    series.end_datetime,
+                    series.frequency,
+                    series.interval,
+                    series.count,
+                    series.until,
+                ),
+                MAX_SERIES_OCCURRENCES,
+            )
+            ensure_disjoint(occurrences)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+        # one query for the whole span, then every occurrence checked at once
+        conflicts = find_conflicts(
+            self.room_repo.get_accepted_intervals(
+                occurrences[0][0], occurrences[-1][1], [series.room_number]
+            ),
+            occurrences,
+        )
+        conflicting = [
+            {"start_datetime": start, "end_datetime": end}
+            for (start, end), conflict in zip(occurrences, conflicts)
+            if conflict
+        ]
+        if conflicting and not series.skip_conflicts:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail={
+                    "message": f"{len(conflicting)} of {len(occurrences)} occurrences conflict with existing bookings",
+                    "conflicts": jsonable_encoder(conflicting),
+                },
+            )
+        if len(conflicting) == len(occurrences):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Every occurrence conflicts with existing bookings",
+            )
+
+        now = datetime.now()
+        new_series = BookingSeries(
+            user_id=current_user.id,
+            room_number=series.room_number,
+            frequency=series.frequency,
+            interval=series.interval,
+            count=series.count,
+            until=series.until,
+            start_time=series.start_datetime,
+            end_time=series.end_datetime,
+            datetime_made=now,
+        )
+        bookings = [
+            Booking(
+                user_id=current_user.id,
+                room_number=series.room_number,
+                start_time=start,
+                end_time=end,
+                accepted=not series.is_request,
+                datetime_made=now,
+            )
+            for (start, end), conflict in zip(occurrences, conflicts)
+            if not conflict
+        ]
+        new_series = self.booking_repo.create_series_in_db(new_series, bookings)
+
+        return {
+            "series_id": new_series.id,
+            "created": len(bookings),
+            "skipped": conflicting,
+            "bookings": [
+                {
+                    "id": booking.id,
+                    "start_time": booking.start_time,
+                    "end_time": booking.end_time,
+                    "accepted": booking.accepted,
+                }
+                for booking in new_series.bookings
+            ],
+        }
+
+    @handle_db_exceptions
+    def get_all_your_bookings(self, user_id: str, page: PageParams) -> Page:
+        return self.booking_repo.get_all_your_bookings(user_id, page)
 
     @handle_db_exceptions
     def get_your_booking(self, user_id: int, booking_id: int) -> Booking:
@@ -91,22 +307,131 @@ class BookingService:
     def get_any_booking(self, booking_id: int) -> Booking:
         return self.booking_repo.get_any_booking(booking_id)
 
+    @staticmethod
+    def to_request_response(booking: Booking) -> BookingRequestResponse:
+        return BookingRequestResponse(
+            id=booking.id,
+            user_id=booking.user_id,
+            username=booking.user.username,
+            start_time=booking.start_time,
+            end_time=booking.end_time,
+            accepted=booking.accepted,
+            datetime_made=booking.datetime_made,
+            room_number=booking.room_number,
+        )
+
     @handle_db_exceptions
-    def get_all_requests(self) -> List[BookingRequestResponse]:
-        bookings = self.booking_repo.get_all_requests()
-        return [
-            BookingRequestResponse(
-                id=booking.id,
-                user_id=booking.user_id,
-                username=booking.user.username,
-                start_time=booking.start_time,
-                end_time=booking.end_time,
-                accepted=booking.accepted,
-                datetime_made=booking.datetime_made,
-                room_number=booking.room_number,
-            )
-            for booking in bookings
-        ]
+    def get_all_requests(self, page: PageParams) -> Page:
+        bookings, next_cursor = self.booking_repo.get_all_requests(page)
+        return Page(
+            [BookingService.to_request_response(booking) for booking in bookings],
+            next_cursor,
+        )
+
+    @staticmethod
+    def request_weight(
+        booking: Booking, options: ResolveRequests, now: datetime
+    ) -> float:
+        """Weight of a pending request when resolving the queue"""
+        if options.weight_by == "age":
+            # hours spent waiting, so the oldest requests win ties
+            weight = max((now - booking.datetime_made).total_seconds(), 0) / 3600 + 1
+        elif options.weight_by == "duration":
+            weight = (booking.end_time - booking.start_time).total_seconds() / 60
+        else:
+            weight = 1.0
+        role_bonus = max(
+            (options.role_weights.get(role, 0) for role in booking.user.role_names),
+            default=0,
+        )
+        return weight * (1 + role_bonus)
+
+    @handle_db_exceptions
+    def resolve_requests(self, options: ResolveRequests) -> Dict[str, Any]:
+        requests = self.booking_repo.get_requests_with_user_roles()
+        approve, decline = [], []
+
+        if requests:
+            room_numbers = list({booking.room_number for booking in requests})
+            accepted = self.room_repo.get_accepted_intervals(
+                min(booking.start_time for booking in requests),
+                max(booking.end_time for booking in requests),
+                room_numbers,
+            )
+            accepted_by_room = {
+                room_number: list(intervals)
+                for room_number, intervals in groupby(accepted, key=itemgetter(1))
+            }
+
+            now = datetime.now()
+            for room_number, room_requests in groupby(
+                requests, key=attrgetter("room_number")
+            ):
+                room_requests = list(room_requests)
+                # requests clashing with accepted bookings can never be approved
+                clashes = find_conflicts(
+                    accepted_by_room.get(room_number, []),
+                    [(booking.start_time, booking.end_time) for booking in room_requests],
+                )
+                candidates = [
+                    booking
+                    for booking, clash in zip(room_requests, clashes)
+                    if not clash
+                ]
+                chosen = set(
+                    weighted_interval_schedule(
+                        [
+                            (
+                                booking.id,
+                                booking.start_time,
+                                booking.end_time,
+                                BookingService.request_weight(booking, options, now),
+                            )
+                            for booking in candidates
+                        ]
+                    )
+                )
+                for booking in room_requests:
+                    (approve if booking.id in chosen else decline).append(booking)
+
+        approved = [BookingService.to_request_response(b) for b in approve]
+        declined = [BookingService.to_request_response(b) for b in decline]
+        if not options.dry_run:
+            # built before the write, which deletes the declined bookings
+            approved_at = self.booking_repo.resolve_requests(approve, decline)
+            approved = [
+                response.model_copy(
+                    update={"accepted": True, "datetime_made": approved_at}
+                )
+                for response in approved
+            ]
+        return {"dry_run": options.dry_run, "approved": approved, "declined": declined}
+
+    @staticmethod
+    def export_bookings(filters: BookingExport) -> Iterator[str]:
+        """Yield the filtered bookings as NDJSON or CSV text in batches.
+
+        The response is streamed after the request's own session has been
+        closed, so the export opens a session of its own for its lifetime.
+        """
+        with SessionLocal() as db:
+            rows = BookingRepository(db).stream_bookings(filters, EXPORT_BATCH_SIZE)
+            buffer = io.StringIO()
+            if filters.format == "csv":
+                writer = csv.writer(buffer)
+                writer.writerow(rows.keys())
+            for partition in rows.partitions():
+                for row in partition:
+                    if filters.format == "csv":
+                        writer.writerow(row)
+                    else:
+                        buffer.write(json.dumps(row._asdict(), default=datetime.isoformat))
+                        buffer.write("\n")
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if filters.format == "csv" and buffer.tell():
+                yield buffer.getvalue()
 
     @handle_db_exceptions
     def accept_booking(self, booking: Booking):
@@ -4,6 +4,7 @@ from fastapi import HTTPException, status
 from functools import wraps
 from fastapi import HTTPException, status
 from sqlalchemy.exc import SQLAlchemyError
+from app.services.metrics import db_errors
 
 
 def handle_db_exceptions(func):
@@ -14,12 +15,14 @@ def handle_db_exceptions(func):
         except HTTPException:
             # Re-raise HTTPException without modification
             raise
-        except SQLAlchemyError:
+        except SQLAlchemyError as e:
+            db_errors.inc(type(e).__name__)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error occurred",
             )
-        except Exception:
+        except Exception as e:
+            db_errors.inc(type(e).__name__)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="An unexpected error occurred",
@@ -0,0 +1,223 @@
+"""Per-process metrics rendered in the Prometheus text exposition format.
+
+Counters and histograms are recorded on hot paths, so each thread records
+into its own shard, which only that thread writes. Recording therefore never
+takes a lock. A scrape sums the shards and folds in those of threads that
+have exited. Gauges are read from their source when scraped.
+"""
+
+from bisect import bisect_left
+from threading import Lock, Thread, current_thread, local
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# seconds, from a cached lookup up to a slow export
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _sample(
+    name: str, labels: Sequence[Tuple[str, str]], value: float
+) -> str:
+    if not labels:
+        return f"{name} {_format_value(value)}"
+    rendered = ",".join(f'{label}="{_escape(str(item))}"' for label, item in labels)
+    return f"{name}{{{rendered}}} {_format_value(value)}"
+
+
+class _ThreadShards:
+    """One dict per recording thread, merged with `merge` when collected"""
+
+    def __init__(self, merge: Callable[[Dict, Dict], None]):
+        self._merge = merge
+        self._local = local()
+        self._lock = Lock()
+        self._live: List[Tuple[Thread, Dict]] = []
+        self._retired: Dict = {}
+
+    def get(self) -> Dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._live.append((current_thread(), shard))
+            return shard
+
+    def collect(self) -> Dict:
+        with self._lock:
+            live = []
+            for thread, shard in self._live:
+                if thread.is_alive():
+                    live.append((thread, shard))
+                else:
+                    # fold exited worker threads in so their shards can go
+                    self._merge(self._retired, shard)
+            self._live = live
+            total = {}
+            self._merge(total, self._retired)
+            for _, shard in live:
+                self._merge(total, shard)
+        return total
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        registry: Registry = registry,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._shards = _ThreadShards(self._merge)
+        registry.register(self)
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        shard = self._shards.get()
+        shard[label_values] = shard.get(label_values, 0.0) + amount
+
+    @staticmethod
+    def _merge(into: Dict, shard: Dict):
+        # dict() copies in one step, so a shard growing meanwhile is safe
+        for key, value in dict(shard).items():
+            into[key] = into.get(key, 0.0) + value
+
+    def values(self) -> Dict[LabelValues, float]:
+        return self._shards.collect()
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in sorted(self.values().items()):
+            yield _sample(self.name, list(zip(self.labels, label_values)), value)
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        registry: Registry = registry,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._shards = _ThreadShards(self._merge)
+        registry.register(self)
+
+    def observe(self, value: float, *label_values: str):
+        shard = self._shards.get()
+        # a count per bucket plus one for above the last bucket, then the sum
+        counts = shard.get(label_values)
+        if counts is None:
+            counts = shard[label_values] = [0.0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def _merge(self, into: Dict, shard: Dict):
+        for key, counts in dict(shard).items():
+            total = into.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for index, count in enumerate(list(counts)):
+                total[index] += count
+
+    def values(self) -> Dict[LabelValues, List[float]]:
+        return self._shards.collect()
+
+    def samples(self) -> Iterator[str]:
+        for label_values, counts in sorted(self.values().items()):
+            labels = list(zip(self.labels, label_values))
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield _sample(
+                    f"{self.name}_bucket",
+                    labels + [("le", _format_value(bound))],
+                    cumulative,
+                )
+            yield _sample(f"{self.name}_sum", labels, counts[-1])
+            yield _sample(f"{self.name}_count", labels, cumulative)
+
+
+class Gauge:
+    """Reads its current values from `read` at scrape time"""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        read: Callable[[], Dict[LabelValues, float]],
+        labels: Sequence[str] = (),
+        registry: Registry = registry,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.read = read
+        registry.register(self)
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in sorted(self.read().items()):
+            yield _sample(self.name, list(zip(self.labels, label_values)), value)
+
+
+http_requests = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status",
+    ["method", "route", "status"],
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency until the response body was sent",
+    ["method", "route"],
+)
+db_errors = Counter(
+    "db_errors_total",
+    "Errors turned into 500 responses by handle_db_exceptions",
+    ["exception"],
+)
+password_hash_queue_seconds = Histogram(
+    "password_hash_queue_seconds",
+    "Time bcrypt jobs waited for a hashing worker, by pool",
+    ["pool"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
@@ -0,0 +1,69 @@
+"""Slot bitmap occupancy matrix for rooms built with numpy"""
+
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from app.services.availability_index import to_naive
+
+# Times.validate_15_minute_intervals keeps every booking on these boundaries
+SLOT_MINUTES = 15
+SLOT = timedelta(minutes=SLOT_MINUTES)
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+
+def slot_count(start: datetime, end: datetime) -> int:
+    return int((end - start) // SLOT)
+
+
+def build_occupancy(
+    room_numbers: List[str],
+    intervals: Iterable[Tuple[int, str, datetime, datetime]],
+    start: datetime,
+    slots: int,
+) -> np.ndarray:
+    """Build a rooms x slots boolean matrix where True marks a busy slot.
+
+    Each (id, room_number, start, end) interval is OR-ed into its room's row
+    by adding +1/-1 at its slot boundaries and taking a cumulative sum, so the
+    whole matrix is produced in a few vectorized passes.
+    """
+    rows_by_room: Dict[str, int] = {room: row for row, room in enumerate(room_numbers)}
+    rows, firsts, lasts = [], [], []
+    for _, room_number, booking_start, booking_end in intervals:
+        row = rows_by_room.get(room_number)
+        if row is None:
+            continue
+        rows.append(row)
+        firsts.append((to_naive(booking_start) - start) / SLOT)
+        lasts.append((to_naive(booking_end) - start) / SLOT)
+
+    boundaries = np.zeros((len(room_numbers), slots + 1), dtype=np.int32)
+    if rows:
+        rows = np.asarray(rows, dtype=np.intp)
+        # round outwards so bookings off the 15 minute grid still mark their slots
+        firsts = np.clip(np.floor(firsts), 0, slots).astype(np.intp)
+        lasts = np.clip(np.ceil(lasts), 0, slots).astype(np.intp)
+        np.add.at(boundaries, (rows, firsts), 1)
+        np.add.at(boundaries, (rows, lasts), -1)
+    return np.cumsum(boundaries, axis=1)[:, :slots] > 0
+
+
+def to_bitstring(row: np.ndarray) -> str:
+    """Render a boolean slot row as a string of '0' and '1' characters"""
+    return (row.astype(np.uint8) + ord("0")).tobytes().decode("ascii")
+
+
+def summarise_occupancy(busy: np.ndarray) -> Dict[str, object]:
+    """Aggregate a busy matrix across rooms for the heatmap view"""
+    if busy.shape[0] == 0:
+        free_counts = np.zeros(busy.shape[1], dtype=np.int64)
+        return {
+            "free_rooms_per_slot": free_counts.tolist(),
+            "any_free": to_bitstring(free_counts > 0),
+            "all_free": to_bitstring(free_counts > 0),
+        }
+    return {
+        "free_rooms_per_slot": (~busy).sum(axis=0).tolist(),
+        "any_free": to_bitstring(~np.logical_and.reduce(busy, axis=0)),
+        "all_free": to_bitstring(~np.logical_or.reduce(busy, axis=0)),
+    }
@@ -0,0 +1,196 @@
+"""Bounded worker pool for bcrypt hashing with fast-fail backpressure"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import BoundedSemaphore, Lock
+import time
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple, TypeVar
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+import app.config as Config
+from app.services.metrics import password_hash_queue_seconds
+
+T = TypeVar("T")
+
+LATENCY_SAMPLES = 1000
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class PasswordHasher:
+    """Runs bcrypt on a dedicated pool of `workers` threads.
+
+    bcrypt releases the GIL, so threads hash in parallel. At most `workers`
+    hashes run and `queue_depth` more wait; beyond that callers get a 503
+    immediately instead of tying up another request thread. Batches from
+    `hash_many` queue on their own `bulk_workers` threads, so an import never
+    holds the workers that logins wait for.
+
+    Async endpoints should use the `*_async` methods, which await the hash on
+    the event loop; the blocking ones hold the calling thread, and from a sync
+    endpoint that is one of the AnyIO threadpool tokens every request shares.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        queue_depth: int,
+        bulk_workers: int = 1,
+        context: CryptContext = pwd_context,
+    ):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.bulk_workers = bulk_workers
+        self.context = context
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="bcrypt"
+        )
+        self._bulk_executor = ThreadPoolExecutor(
+            max_workers=bulk_workers, thread_name_prefix="bcrypt-bulk"
+        )
+        self._slots = BoundedSemaphore(workers + queue_depth)
+        self._lock = Lock()
+        # per pool, "interactive" or "bulk"
+        self._in_flight = {"interactive": 0, "bulk": 0}
+        self._running = {"interactive": 0, "bulk": 0}
+        self._completed = {"interactive": 0, "bulk": 0}
+        self._rejected = 0
+        self._wait_seconds: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._hash_seconds: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def hash(self, password: str) -> str:
+        return self._run(self.context.hash, password)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._run(self.context.verify, password, hashed_password)
+
+    def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify, returning a replacement hash when the stored cost is out of date"""
+        return self._run(self.context.verify_and_update, password, hashed_password)
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run_async(self.context.hash, password)
+
+    async def verify_and_update_async(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """`verify_and_update` awaited without holding a thread while it waits"""
+        return await self._run_async(
+            self.context.verify_and_update, password, hashed_password
+        )
+
+    def hash_many(self, passwords: Iterable[str]) -> List[str]:
+        """Hash a batch on the bulk workers, waiting for them rather than failing"""
+        passwords = list(passwords)
+        with self._lock:
+            self._in_flight["bulk"] += len(passwords)
+        submitted = time.perf_counter()
+        futures = [
+            self._bulk_executor.submit(
+                self._timed, "bulk", self.context.hash, submitted, password
+            )
+            for password in passwords
+        ]
+        try:
+            return [future.result() for future in futures]
+        finally:
+            cancelled = sum(future.cancel() for future in futures)
+            with self._lock:
+                self._in_flight["bulk"] -= cancelled
+
+    def _run(self, func: Callable[..., T], *args) -> T:
+        return self._submit(func, *args).result()
+
+    async def _run_async(self, func: Callable[..., T], *args) -> T:
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def _submit(self, func: Callable[..., T], *args) -> "Future[T]":
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        with self._lock:
+            self._in_flight["interactive"] += 1
+        submitted = time.perf_counter()
+        try:
+            future = self._executor.submit(
+                self._timed, "interactive", func, submitted, *args
+            )
+        except BaseException:
+            self._release(None)
+            raise
+        # released once the hash is done, even if the caller stopped waiting
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Optional[Future]):
+        with self._lock:
+            self._in_flight["interactive"] -= 1
+        self._slots.release()
+
+    def _timed(self, pool: str, func: Callable[..., T], submitted: float, *args) -> T:
+        started = time.perf_counter()
+        with self._lock:
+            self._running[pool] += 1
+            if pool == "interactive":
+                self._wait_seconds.append(started - submitted)
+        password_hash_queue_seconds.observe(started - submitted, pool)
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running[pool] -= 1
+                self._completed[pool] += 1
+                if pool == "bulk":
+                    # interactive jobs are released by _submit's done callback
+                    self._in_flight[pool] -= 1
+                else:
+                    self._hash_seconds.append(time.perf_counter() - started)
+
+    def metrics(self) -> Dict[str, object]:
+        with self._lock:
+            wait_seconds = list(self._wait_seconds)
+            hash_seconds = list(self._hash_seconds)
+            return {
+                "workers": self.workers,
+                "queue_depth_limit": self.queue_depth,
+                "running": self._running["interactive"],
+                "queued": self._in_flight["interactive"] - self._running["interactive"],
+                "completed": self._completed["interactive"],
+                "rejected": self._rejected,
+                "queue_wait_seconds": {
+                    "p50": _percentile(wait_seconds, 0.5),
+                    "p95": _percentile(wait_seconds, 0.95),
+                    "max": max(wait_seconds, default=0.0),
+                },
+                "hash_seconds": {
+                    "p50": _percentile(hash_seconds, 0.5),
+                    "p95": _percentile(hash_seconds, 0.95),
+                    "max": max(hash_seconds, default=0.0),
+                },
+                "bulk": {
+                    "workers": self.bulk_workers,
+                    "running": self._running["bulk"],
+                    "queued": self._in_flight["bulk"] - self._running["bulk"],
+                    "completed": self._completed["bulk"],
+                },
+            }
+
+
+password_hasher = PasswordHasher(
+    Config.HASH_WORKERS, Config.HASH_QUEUE_DEPTH, Config.HASH_BULK_WORKERS
+)
@@ -0,0 +1,54 @@
+"""Loads revocations recorded in the database into this worker's store"""
+
+import logging
+from threading import Event
+import time
+from typing import Optional
+from app.auth.revocation import RevocationStore, revocation_store
+from app.db.database import SessionLocal
+from app.repositories.revocation_repository import RevocationRepository
+import app.config as Config
+
+logger = logging.getLogger("app.revocation_sync")
+
+
+class RevocationSync:
+    """Copies revocations made by any worker into `store`.
+
+    The first load reads every revocation still in force; later loads read
+    those recorded since the previous one, overlapping it by `interval_seconds`
+    so a revocation stamped just before a load but committed just after it is
+    still picked up. Loading a revocation twice is harmless.
+    """
+
+    def __init__(self, store: RevocationStore, interval_seconds: float):
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self._loaded_at: Optional[float] = None
+
+    def load(self):
+        """Prune expired revocations and load those made since the last load"""
+        started = time.time()
+        since = 0.0
+        if self._loaded_at is not None:
+            since = self._loaded_at - self.interval_seconds
+        with SessionLocal() as db:
+            repo = RevocationRepository(db)
+            repo.prune(started, Config.ACCESS_TOKEN_EXPIRE_SECONDS)
+            tokens, users = repo.get_revocations(since, started)
+        for jti, expires_at in tokens:
+            self.store.revoke(jti, expires_at)
+        for username, revoked_before in users:
+            self.store.revoke_user(username, revoked_before)
+        self._loaded_at = started
+
+    def run(self, stop: Event):
+        """Load every `interval_seconds` until `stop` is set"""
+        while not stop.wait(self.interval_seconds):
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Loading revocations failed: {str(e)}")
+
+
+revocation_sync = RevocationSync(revocation_store, Config.REVOCATION_SYNC_SECONDS)
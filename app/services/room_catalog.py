@@ -0,0 +1,117 @@
+"""In-process cache of every room and its allowed roles"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from threading import Lock
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from app.auth.role_bits import has_any_role, role_registry
+import app.config as Config
+
+
+@dataclass(frozen=True)
+class RoomRecord:
+    """Immutable copy of a Room row with the names of its allowed roles"""
+
+    room_number: str
+    capacity: int
+    description: str
+    request_only: bool
+    allowed_role_names: Tuple[str, ...]
+    allowed_role_mask: int = field(init=False)
+
+    def __post_init__(self):
+        object.__setattr__(
+            self, "allowed_role_mask", role_registry.mask(self.allowed_role_names)
+        )
+
+
+class CatalogSnapshot:
+    """Every room at one generation, indexed by number and by capacity"""
+
+    def __init__(self, generation: int, rooms: Iterable[RoomRecord]):
+        self.generation = generation
+        self.loaded_at = time.monotonic()
+        self.by_number: Dict[str, RoomRecord] = {
+            room.room_number: room for room in rooms
+        }
+        self.room_numbers = sorted(self.by_number)
+        self.by_capacity = sorted(
+            self.by_number.values(), key=lambda room: (room.capacity, room.room_number)
+        )
+        self.capacities = [room.capacity for room in self.by_capacity]
+        self._bookable: Dict[int, FrozenSet[str]] = {}
+
+    def get(self, room_number: str) -> Optional[RoomRecord]:
+        return self.by_number.get(room_number)
+
+    def with_capacity(self, min_capacity: int) -> List[RoomRecord]:
+        """Rooms holding at least `min_capacity`, smallest first"""
+        return self.by_capacity[bisect_left(self.capacities, min_capacity) :]
+
+    def bookable_by(self, role_mask: int) -> FrozenSet[str]:
+        """Numbers of the rooms a user with `role_mask` has the roles to book.
+
+        Users share a handful of role combinations, so each is computed once
+        per snapshot.
+        """
+        bookable = self._bookable.get(role_mask)
+        if bookable is None:
+            bookable = frozenset(
+                room.room_number
+                for room in self.by_capacity
+                if has_any_role(role_mask, room.allowed_role_mask)
+            )
+            self._bookable[role_mask] = bookable
+        return bookable
+
+    def page(self, after: Optional[str], limit: int) -> List[RoomRecord]:
+        """Up to `limit` rooms in room number order following `after`"""
+        start = bisect_right(self.room_numbers, after) if after is not None else 0
+        return [
+            self.by_number[room_number]
+            for room_number in self.room_numbers[start : start + limit]
+        ]
+
+
+class RoomCatalog:
+    """Rooms cached under a generation counter.
+
+    Room writes bump the generation after they commit, which makes the next
+    read reload the catalog; a snapshot loaded while a write was in flight is
+    tagged with the older generation and so is never reused. Snapshots also
+    expire after `ttl_seconds` to pick up writes made by other workers.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._lock = Lock()
+        self._generation = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def bump(self):
+        with self._lock:
+            self._generation += 1
+
+    def get(self, load: Callable[[], Iterable[RoomRecord]]) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if (
+            snapshot is not None
+            and snapshot.generation == self._generation
+            and time.monotonic() - snapshot.loaded_at < self.ttl_seconds
+        ):
+            return snapshot
+
+        generation = self._generation
+        snapshot = CatalogSnapshot(generation, load())
+        with self._lock:
+            if generation == self._generation:
+                self._snapshot = snapshot
+        return snapshot
+
+
+room_catalog = RoomCatalog(Config.ROOM_CATALOG_TTL_SECONDS)
@@ -1,11 +1,22 @@
 from typing import Any, Dict, List
-from datetime import datetime
+from datetime import date, datetime, time, timedelta
 from fastapi import Depends, HTTPException, status
+from app.auth.role_bits import has_any_role
 from app.db.models import Room, User
 from app.repositories.role_repository import RoleRepository
 from app.repositories.room_repository import RoomRepository
-from app.schemas.room import RoomCreate
+from app.schemas.pagination import Page
+from app.schemas.room import FreeSlots, RoomCreate, RoomPage
 from app.services.exception_wrapper import handle_db_exceptions
+from app.services.room_catalog import RoomRecord
+from app.services.occupancy import (
+    SLOT_MINUTES,
+    SLOTS_PER_DAY,
+    build_occupancy,
+    summarise_occupancy,
+    to_bitstring,
+)
+from app.services.scheduling import find_free_slots
 
 
 class RoomService:
@@ -20,54 +31,132 @@ class RoomService:
         self.role_repo = role_repo
 
     @staticmethod
-    def room_to_dict(room: Room, available: bool = True) -> Dict[str, Any]:
-        """Convert Room object to dictionary including relationships"""
+    def room_to_dict(
+        room: Room | RoomRecord, available: bool = True
+    ) -> Dict[str, Any]:
+        """Convert a Room or cached RoomRecord to a dictionary including its roles"""
         return {
             "room_number": room.room_number,
             "capacity": room.capacity,
             "description": room.description,
             "request_only": room.request_only,
-            "allowed_roles": room.allowed_role_names,
+            "allowed_roles": list(room.allowed_role_names),
             "available": available,
         }
 
     @staticmethod
-    def check_user_has_room_permissions(room_dict: Dict[str, Any], user: User) -> bool:
-        """Check if user has sufficient roles to book this room"""
-        allowed_roles = room_dict.get("allowed_roles", [])
-
-        # If no role restrictions, anyone can book
-        if not allowed_roles:
-            return True
-
-        # Check if user has any of the required roles
-        return any(role in user.role_names for role in allowed_roles)
+    def check_user_has_room_permissions(room: Room | RoomRecord, user: User) -> bool:
+        """Check if user has at least one of the roles the room is restricted to"""
+        return has_any_role(user.role_mask, room.allowed_role_mask)
 
     @handle_db_exceptions
     def get_available_rooms_time(
-        self, min_capacity: int, desired_start: datetime, desired_end: datetime
+        self,
+        min_capacity: int,
+        desired_start: datetime,
+        desired_end: datetime,
+        user: User,
+        q: str = None,
     ) -> List[Dict[str, Any]]:
-        # Get all rooms with sufficient capacity (with relationships loaded)
-        all_rooms = self.room_repo.get_rooms_with_availability_check(
-            min_capacity, desired_start, desired_end
-        ).all()
-
-        # Get room numbers that have conflicting bookings
-        conflicting_rooms = self.room_repo.get_conflicting_room_numbers(
-            desired_start, desired_end
+        """Rooms with enough capacity (matching q if given), available ones first,
+        flagged with whether the user holds one of the roles needed to book them"""
+        rows = self.room_repo.get_rooms_with_availability(
+            min_capacity, desired_start, desired_end, user.id, user.role_mask, q
+        )
+        rooms = []
+        for room, available, sufficient_roles in rows:
+            room_dict = RoomService.room_to_dict(room, available=available)
+            room_dict["sufficient_roles"] = sufficient_roles
+            rooms.append(room_dict)
+        return rooms
+
+    @handle_db_exceptions
+    def get_availability_grid(
+        self, min_capacity: int, start_date: date, days: int
+    ) -> Dict[str, Any]:
+        grid_start = datetime.combine(start_date, time.min)
+        grid_end = grid_start + timedelta(days=days)
+        slots = SLOTS_PER_DAY * days
+
+        rooms = sorted(
+            self.room_repo.get_rooms_capacity(min_capacity),
+            key=lambda room: room.room_number,
+        )
+        room_numbers = [room.room_number for room in rooms]
+        busy = build_occupancy(
+            room_numbers,
+            self.room_repo.get_accepted_intervals(grid_start, grid_end),
+            grid_start,
+            slots,
         )
 
-        available_rooms = []
-        unavailable_rooms = []
+        return {
+            "start": grid_start,
+            "end": grid_end,
+            "slot_minutes": SLOT_MINUTES,
+            "slots": slots,
+            "rooms": [
+                {
+                    "room_number": room.room_number,
+                    "capacity": room.capacity,
+                    "request_only": room.request_only,
+                    "busy": to_bitstring(busy[row]),
+                    "busy_slots": int(busy[row].sum()),
+                }
+                for row, room in enumerate(rooms)
+            ],
+            **summarise_occupancy(busy),
+        }
+
+    @handle_db_exceptions
+    def get_free_slots(self, filters: FreeSlots, user: User) -> List[Dict[str, Any]]:
+        catalog = self.room_repo.get_catalog()
+        # only rooms the user could actually book or request
+        bookable = catalog.bookable_by(user.role_mask)
+        if filters.room_numbers:
+            bookable = bookable.intersection(filters.room_numbers)
+        bookable_rooms = [
+            room
+            for room in catalog.with_capacity(filters.min_capacity)
+            if room.room_number in bookable
+            and (filters.include_request_only or not room.request_only)
+        ]
+        if not bookable_rooms:
+            return []
 
-        for room in all_rooms:
-            if room.room_number not in conflicting_rooms:
-                available_rooms.append(RoomService.room_to_dict(room, available=True))
-            else:
-                unavailable_rooms.append(
-                    RoomService.room_to_dict(room, available=False)
-                )
-        return available_rooms + unavailable_rooms
+        room_numbers = [room.room_number for room in bookable_rooms]
+        free_slots = find_free_slots(
+            self.room_repo.get_accepted_intervals(
+                filters.start_datetime, filters.end_datetime, room_numbers
+            ),
+            room_numbers,
+            filters.start_datetime,
+            filters.end_datetime,
+            timedelta(minutes=filters.duration_minutes),
+            filters.limit,
+        )
+
+        results = [
+            {
+                "room_number": room.room_number,
+                "capacity": room.capacity,
+                "request_only": room.request_only,
+                "free_slots": [
+                    {"start_datetime": start, "end_datetime": end}
+                    for start, end in free_slots[room.room_number]
+                ],
+            }
+            for room in bookable_rooms
+            if free_slots[room.room_number]
+        ]
+        # rooms free soonest first
+        results.sort(
+            key=lambda room: (
+                room["free_slots"][0]["start_datetime"],
+                room["room_number"],
+            )
+        )
+        return results
 
     @handle_db_exceptions
     def create_room(self, room: RoomCreate):
@@ -99,7 +188,7 @@ class RoomService:
         return new_room
 
     @handle_db_exceptions
-    def delete_room(self, room_number: str):
+    def delete_room(self, room_number: str, chunk_size: int = None):
         room = self.room_repo.get_room(room_number)
         if not room:
             raise HTTPException(
@@ -107,13 +196,13 @@ class RoomService:
                 detail=f"Room with room number {room_number} not found",
             )
 
-        self.room_repo.delete_room_in_db(room)
+        self.room_repo.delete_room_in_db(room, chunk_size=chunk_size)
         return {
             "message": f"Room {room_number} deleted successfully",
             "room_number": room_number,
         }
 
     @handle_db_exceptions
-    def get_all_rooms(self) -> List[Dict[str, Any]]:
-        rooms = self.room_repo.get_all_rooms()
-        return (RoomService.room_to_dict(room) for room in rooms)
+    def get_all_rooms(self, page: RoomPage) -> Page:
+        rooms, next_cursor = self.room_repo.get_all_rooms(page)
+        return Page([RoomService.room_to_dict(room) for room in rooms], next_cursor)
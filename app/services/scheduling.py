@@ -0,0 +1,145 @@
+"""Interval algorithms used to plan bookings"""
+
+from datetime import datetime, timedelta
+from bisect import bisect_right
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import Dict, Hashable, Iterable, Iterator, List, Tuple
+from dateutil.rrule import DAILY, MONTHLY, WEEKLY, rrule
+import numpy as np
+from app.services.availability_index import to_naive
+
+FREQUENCIES = {"daily": DAILY, "weekly": WEEKLY, "monthly": MONTHLY}
+
+
+def find_free_slots(
+    intervals: Iterable[Tuple[int, str, datetime, datetime]],
+    room_numbers: Iterable[str],
+    window_start: datetime,
+    window_end: datetime,
+    duration: timedelta,
+    limit: int,
+) -> Dict[str, List[Tuple[datetime, datetime]]]:
+    """Find the earliest free windows of at least `duration` for each room.
+
+    `intervals` are (id, room_number, start, end) rows ordered by room and
+    start time, so a single sweep per room merges overlapping bookings and
+    emits the gaps between them.
+    """
+    window_start, window_end = to_naive(window_start), to_naive(window_end)
+    busy_by_room = {
+        room_number: [(to_naive(start), to_naive(end)) for _, _, start, end in rows]
+        for room_number, rows in groupby(intervals, key=itemgetter(1))
+    }
+
+    free_slots = {}
+    for room_number in room_numbers:
+        slots = []
+        cursor = window_start
+        for start, end in busy_by_room.get(room_number, []):
+            if len(slots) >= limit or start >= window_end:
+                break
+            if start - cursor >= duration:
+                slots.append((cursor, start))
+            cursor = max(cursor, end)
+        if len(slots) < limit and window_end - cursor >= duration:
+            slots.append((cursor, window_end))
+        free_slots[room_number] = slots
+    return free_slots
+
+
+def expand_occurrences(
+    start: datetime,
+    end: datetime,
+    frequency: str,
+    interval: int = 1,
+    count: int = None,
+    until: datetime = None,
+) -> Iterator[Tuple[datetime, datetime]]:
+    """Lazily yield (start, end) for each occurrence of a recurring booking"""
+    duration = end - start
+    starts = rrule(
+        FREQUENCIES[frequency],
+        dtstart=to_naive(start),
+        interval=interval,
+        count=count,
+        until=to_naive(until) if until is not None else None,
+    )
+    return ((occurrence, occurrence + duration) for occurrence in starts)
+
+
+def take_occurrences(
+    occurrences: Iterator[Tuple[datetime, datetime]], limit: int
+) -> List[Tuple[datetime, datetime]]:
+    """Materialise at most `limit` occurrences, raising if there are more"""
+    taken = list(islice(occurrences, limit + 1))
+    if len(taken) > limit:
+        raise ValueError(f"Series has more than {limit} occurrences")
+    return taken
+
+
+def ensure_disjoint(occurrences: List[Tuple[datetime, datetime]]):
+    """Raise if any occurrence overlaps the next one, which happens when a
+    booking lasts longer than the gap between its occurrences"""
+    for (_, end), (next_start, _) in zip(occurrences, occurrences[1:]):
+        if next_start < end:
+            raise ValueError(
+                f"Occurrences overlap each other: the occurrence starting at "
+                f"{next_start.isoformat()} begins before the previous one ends"
+            )
+
+
+def find_conflicts(
+    existing: Iterable[Tuple[int, str, datetime, datetime]],
+    candidates: List[Tuple[datetime, datetime]],
+) -> np.ndarray:
+    """Flag which candidate (start, end) intervals overlap an existing booking.
+
+    Existing bookings are sorted by start with a running maximum of their
+    ends, so each candidate needs one binary search: the bookings starting
+    before it ends are a prefix, and it conflicts if any of them ends after
+    it starts.
+    """
+    existing = sorted((to_naive(start), to_naive(end)) for _, _, start, end in existing)
+    if not existing or not candidates:
+        return np.zeros(len(candidates), dtype=bool)
+
+    existing_starts = np.array([start for start, _ in existing], dtype="datetime64[s]")
+    latest_ends = np.maximum.accumulate(
+        np.array([end for _, end in existing], dtype="datetime64[s]")
+    )
+    starts = np.array([to_naive(start) for start, _ in candidates], dtype="datetime64[s]")
+    ends = np.array([to_naive(end) for _, end in candidates], dtype="datetime64[s]")
+
+    before = np.searchsorted(existing_starts, ends, side="left")
+    return (before > 0) & (latest_ends[np.maximum(before - 1, 0)] > starts)
+
+
+def weighted_interval_schedule(
+    intervals: List[Tuple[Hashable, datetime, datetime, float]],
+) -> List[Hashable]:
+    """Pick the keys of the non-overlapping (key, start, end, weight) intervals
+    with the highest total weight"""
+    intervals = sorted(
+        ((to_naive(start), to_naive(end), weight, key) for key, start, end, weight in intervals),
+        key=lambda interval: (interval[1], interval[0]),
+    )
+    ends = [end for _, end, _, _ in intervals]
+    # previous[j] is how many intervals finish by the time interval j starts
+    previous = [bisect_right(ends, start, 0, j) for j, (start, _, _, _) in enumerate(intervals)]
+
+    best = [0.0] * (len(intervals) + 1)
+    for j, (_, _, weight, _) in enumerate(intervals):
+        best[j + 1] = max(best[j], best[previous[j]] + weight)
+
+    chosen = []
+    j = len(intervals)
+    while j > 0:
+        _, _, weight, key = intervals[j - 1]
+        if best[previous[j - 1]] + weight >= best[j - 1] and weight > 0:
+            chosen.append(key)
+            j = previous[j - 1]
+        else:
+            j -= 1
+    chosen.reverse()
+    return chosen
@@ -1,21 +1,40 @@
-from datetime import datetime, timedelta
-from typing import List
+import csv
+from datetime import datetime, timedelta, timezone
+import io
+import json
+import time
+from typing import Iterable, List
 import uuid
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
 from app.auth.oauth_password_bearer import OAuth2PasswordBearerWithCookie
-from app.db.models import User
+from app.auth.principal_cache import principal_cache
+from app.auth.revocation import revocation_store
+from app.auth.token_cache import token_cache
+from app.db.models import Role, User
+from app.repositories.revocation_repository import RevocationRepository
 from app.repositories.role_repository import RoleRepository
 from app.repositories.user_repository import UserRepository
 import app.config as Config
 import jwt
 
-from app.schemas.user import PutRoles, UserCreate
+from app.schemas.pagination import Page
+from app.schemas.user import (
+    BulkRoles,
+    PutRoles,
+    UserCreate,
+    UserFilter,
+    UserImport,
+    UserPage,
+)
 from app.services.exception_wrapper import handle_db_exceptions
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.password_hasher import password_hasher
 
 oauth2_scheme = OAuth2PasswordBearerWithCookie(tokenUrl="token")
+optional_oauth2_scheme = OAuth2PasswordBearerWithCookie(
+    tokenUrl="token", auto_error=False
+)
 
 
 class UserService:
@@ -25,25 +44,68 @@ class UserService:
         self,
         user_repo: UserRepository = Depends(),
         role_repo: RoleRepository = Depends(),
+        revocation_repo: RevocationRepository = Depends(),
     ):
         self.user_repo = user_repo
         self.role_repo = role_repo
+        self.revocation_repo = revocation_repo
 
     @staticmethod
     def verify_password(plain_password, hashed_password):
-        return pwd_context.verify(plain_password, hashed_password)
+        return password_hasher.verify(plain_password, hashed_password)
+
+    @staticmethod
+    async def hash_password(password: str):
+        return await password_hasher.hash_async(password)
 
     @staticmethod
-    def hash_password(password: str):
-        return pwd_context.hash(password)
+    def decode_token(token: str) -> dict:
+        payload = token_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(
+                token, Config.SECRET_KEY, algorithms=[Config.ALGORITHM]
+            )
+            token_cache.put(token, payload)
+        return payload
+
+    @handle_db_exceptions
+    def revoke_token(self, token: str):
+        """Revoke a token until it expires, ignoring tokens that are already invalid"""
+        try:
+            payload = UserService.decode_token(token)
+        except jwt.PyJWTError:
+            return
+        self.revocation_repo.revoke_token(payload["jti"], payload["exp"])
+        revocation_store.revoke(payload["jti"], payload["exp"])
+        token_cache.evict(payload["jti"])
+
+    def _revoke_users(self, usernames: Iterable[str]):
+        """Revoke every token issued so far to the users, in this worker at
+        once and in the others when they next load revocations"""
+        usernames = list(usernames)
+        before = time.time()
+        self.revocation_repo.revoke_users(usernames, before)
+        for username in usernames:
+            principal_cache.invalidate(username)
+            revocation_store.revoke_user(username, before)
 
     @staticmethod
     def get_username_from_jwt(token: str) -> str:
-        payload = jwt.decode(token, Config.SECRET_KEY, algorithms=[Config.ALGORITHM])
+        payload = UserService.decode_token(token)
         user = payload.get("user")
         username = user.get("username")
         return username
 
+    @staticmethod
+    def token_claims(user: User) -> dict:
+        """User claims to sign into a token, including roles when enabled"""
+        claims = {"username": user.username}
+        if Config.JWT_ROLE_CLAIMS:
+            claims["id"] = user.id
+            claims["name"] = user.name
+            claims["roles"] = list(user.role_names)
+        return claims
+
     @staticmethod
     def create_token(user_data: dict, expiry: timedelta = None):
         payload = {}
@@ -53,6 +115,8 @@ class UserService:
             if expiry is not None
             else timedelta(seconds=Config.ACCESS_TOKEN_EXPIRE_SECONDS)
         )
+        # fractional so revocations within the same second can be ordered
+        payload["iat"] = datetime.now(timezone.utc).timestamp()
         payload["jti"] = str(uuid.uuid4())
         token = jwt.encode(
             payload=payload, key=Config.SECRET_KEY, algorithm=Config.ALGORITHM
@@ -67,22 +131,46 @@ class UserService:
     def get_user_by_username(self, username: str):
         return self.user_repo.get_user_by_username(username)
 
-    @handle_db_exceptions
-    def authenticate_user(self, username: str, password: str):
-        user = self.user_repo.get_user_by_username(username)
+    async def authenticate_user(self, username: str, password: str):
+        """The user if the password matches, else None. Only the database calls
+        take a threadpool thread; bcrypt is awaited on its own pool."""
+        user = await run_in_threadpool(self.get_user_with_roles, username)
         if not user:
             return None
-        if not UserService.verify_password(password, user.hashed_password):
+        verified, new_hash = await password_hasher.verify_and_update_async(
+            password, user.hashed_password
+        )
+        if not verified:
             return None
+        if new_hash:
+            # stored with a different bcrypt cost, upgrade while we have the password
+            user = await run_in_threadpool(self.update_password_hash, user, new_hash)
         return user
 
+    @handle_db_exceptions
+    def get_user_with_roles(self, username: str):
+        return self.user_repo.get_user_with_roles(username)
+
+    @handle_db_exceptions
+    def update_password_hash(self, user: User, hashed_password: str) -> User:
+        user = self.user_repo.update_password_hash(user, hashed_password)
+        # the commit expired the roles; reload them here rather than lazily on
+        # the event loop when the async login endpoint builds its response
+        return self.user_repo.get_user_with_roles(user.username)
+
     @handle_db_exceptions
     def create_user(self, user: User):
-        return self.user_repo.create_user(user)
+        user = self.user_repo.create_user(user)
+        # loaded with its roles for the async register endpoint, as above
+        return self.user_repo.get_user_with_roles(user.username)
 
     @handle_db_exceptions
-    def get_all_users_from_db(self) -> List[User]:
-        return self.user_repo.get_all_users_from_db()
+    def get_all_users_from_db(self, page: UserPage) -> Page:
+        return self.user_repo.get_all_users_from_db(page)
+
+    @handle_db_exceptions
+    def count_users(self, filters: UserFilter) -> int:
+        return self.user_repo.count_users(filters)
 
     @handle_db_exceptions
     def put_roles(self, user_roles: PutRoles) -> User:
@@ -92,14 +180,163 @@ class UserService:
                 status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
             )
 
-        role_list = []
-        for role_name in user_roles.roles:
-            role = self.role_repo.get_role(role_name)
-            if not role:
+        user = self.role_repo.update_roles(user, self._get_roles(user_roles.roles))
+        self._revoke_users([user.username])
+        return user
+
+    def _get_roles(self, role_names: List[str]) -> List[Role]:
+        """Resolve role names with a single query, 404 on the first unknown one"""
+        roles = {role.role: role for role in self.role_repo.get_roles(role_names)}
+        for role_name in role_names:
+            if role_name not in roles:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Role '{role_name}' not found",
                 )
-            role_list.append(role)
+        return [roles[role_name] for role_name in dict.fromkeys(role_names)]
+
+    @handle_db_exceptions
+    def assign_roles(self, bulk: BulkRoles) -> dict:
+        """Give the roles to every existing user in one transaction, reporting
+        usernames that do not exist rather than failing the others"""
+        roles = self._get_roles(bulk.roles)
+        user_ids = self.user_repo.get_user_ids(bulk.usernames)
+        results = [
+            {
+                "username": username,
+                "updated": username in user_ids,
+                "detail": None if username in user_ids else "User not found",
+            }
+            for username in dict.fromkeys(bulk.usernames)
+        ]
+
+        if user_ids:
+            self.role_repo.assign_roles(
+                list(user_ids.values()), [role.role for role in roles], bulk.replace
+            )
+        self._revoke_users(user_ids)
+        return {
+            "updated": len(user_ids),
+            "failed": len(results) - len(user_ids),
+            "results": results,
+        }
+
+    @staticmethod
+    def read_import_rows(content: bytes, is_csv: bool) -> List[dict]:
+        """Parse an uploaded JSON array of users, or a CSV file with name,
+        username, password and roles columns where roles are separated by ';'"""
+        try:
+            text = content.decode("utf-8-sig")
+            if is_csv:
+                rows = [
+                    {key: value for key, value in row.items() if key is not None}
+                    for row in csv.DictReader(io.StringIO(text))
+                ]
+                for row in rows:
+                    row["roles"] = [
+                        role.strip()
+                        for role in (row.get("roles") or "").split(";")
+                        if role.strip()
+                    ]
+            else:
+                rows = json.loads(text)
+        except (ValueError, csv.Error) as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Could not parse the uploaded file",
+            ) from e
+
+        if not isinstance(rows, list) or not rows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Expected a non-empty list of users",
+            )
+        if len(rows) > Config.MAX_BULK_USERS:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"At most {Config.MAX_BULK_USERS} users can be imported at once",
+            )
+        return rows
+
+    @handle_db_exceptions
+    def import_users(self, rows: List[dict]) -> dict:
+        """Create users from import rows in one transaction.
+
+        Rows that fail validation, repeat an existing or earlier username or
+        name an unknown role are reported in the results and skipped. The
+        remaining passwords are hashed in parallel on the hashing pool.
+        """
+        results, users = [], []
+        for index, row in enumerate(rows):
+            result = {
+                "row": index,
+                "username": row.get("username") if isinstance(row, dict) else None,
+                "created": False,
+                "user_id": None,
+                "detail": None,
+            }
+            results.append(result)
+            try:
+                users.append((result, UserImport.model_validate(row)))
+            except ValidationError as e:
+                result["detail"] = e.errors(
+                    include_url=False, include_context=False, include_input=False
+                )
+
+        taken = set(self.user_repo.get_user_ids(user.username for _, user in users))
+        known_roles = {
+            role.role
+            for role in self.role_repo.get_roles(
+                role for _, user in users for role in user.roles
+            )
+        }
+        new_users = []
+        for result, user in users:
+            unknown_roles = [role for role in user.roles if role not in known_roles]
+            if user.username in taken:
+                result["detail"] = "Username already registered"
+            elif unknown_roles:
+                result["detail"] = f"Role '{unknown_roles[0]}' not found"
+            else:
+                taken.add(user.username)
+                new_users.append((result, user))
 
-        return self.role_repo.update_roles(user, role_list)
+        if new_users:
+            hashed_passwords = password_hasher.hash_many(
+                user.password for _, user in new_users
+            )
+            user_ids = self.user_repo.create_users(
+                [
+                    {
+                        "name": user.name,
+                        "username": user.username,
+                        "hashed_password": hashed_password,
+                    }
+                    for (_, user), hashed_password in zip(new_users, hashed_passwords)
+                ],
+                {
+                    user.username: list(dict.fromkeys(user.roles))
+                    for _, user in new_users
+                },
+            )
+            for result, user in new_users:
+                result["created"] = True
+                result["user_id"] = user_ids[user.username]
+
+        return {
+            "created": len(new_users),
+            "failed": len(results) - len(new_users),
+            "results": results,
+        }
+
+    @handle_db_exceptions
+    def delete_user(self, username: str, chunk_size: int = None) -> User:
+        user = self.user_repo.get_user_by_username(username)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+
+        user = self.user_repo.delete_user_in_db(user, chunk_size=chunk_size)
+        self._revoke_users([username])
+        return user
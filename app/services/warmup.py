@@ -0,0 +1,72 @@
+"""Post-startup warmup tracked for the readiness probe"""
+
+import logging
+from threading import Lock
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from fastapi import FastAPI
+from app.db.database import SessionLocal
+from app.repositories.room_repository import RoomRepository
+from app.services.bcrypt_cost import configure_bcrypt_cost
+from app.services.password_hasher import pwd_context
+import app.config as Config
+
+logger = logging.getLogger("app.warmup")
+
+
+class Readiness:
+    """Whether warmup has finished, with how long each step took"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.ready = False
+        self.error: Optional[str] = None
+        self.steps: Dict[str, float] = {}
+
+    def record(self, step: str, seconds: float):
+        with self._lock:
+            self.steps[step] = round(seconds, 3)
+
+    def snapshot(self) -> Dict[str, object]:
+        with self._lock:
+            return {"ready": self.ready, "error": self.error, "steps": dict(self.steps)}
+
+
+readiness = Readiness()
+
+
+def _load_room_catalog():
+    with SessionLocal() as db:
+        RoomRepository(db).get_catalog()
+
+
+def _load_availability_index():
+    with SessionLocal() as db:
+        RoomRepository(db).load_availability_index()
+
+
+def warmup_steps(app: FastAPI) -> List[Tuple[str, Callable[[], object]]]:
+    steps = [
+        ("bcrypt_cost", lambda: configure_bcrypt_cost(pwd_context)),
+        # generates every request and response model's schema
+        ("openapi_schema", app.openapi),
+        # the room list and availability search read rooms from the catalog
+        ("room_catalog", _load_room_catalog),
+    ]
+    if Config.AVAILABILITY_INDEX_ENABLED:
+        steps.append(("availability_index", _load_availability_index))
+    return steps
+
+
+def warm_up(app: FastAPI):
+    """Run each warmup step and mark the process ready once all have succeeded"""
+    try:
+        for step, run in warmup_steps(app):
+            started = time.perf_counter()
+            run()
+            readiness.record(step, time.perf_counter() - started)
+        readiness.ready = True
+        logger.info(f"Warmup finished: {readiness.snapshot()['steps']}")
+    except Exception as e:
+        readiness.error = str(e)
+        logger.error(f"Warmup failed: {str(e)}")
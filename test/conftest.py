@@ -1,21 +1,123 @@
+from datetime import datetime, timedelta
+import re
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import pytest
 from unittest.mock import Mock
-from app.db.models import User
+from app.auth.role_bits import role_registry
+from app.db.database import create_db_engine, create_session_factory
+from app.db.migrations import run_migrations
+from app.api.dependencies import get_current_user
+from app.db.models import Booking, BookingSeries, Role, Room, User
+from app.repositories.base_repository import get_db
+from app.services.availability_index import availability_index
+from app.services.room_catalog import room_catalog
 from app.api.booking_controller import booking_router
 from app.api.room_controller import room_router
 from app.api.user_controller import user_router
 from app.api.role_controller import role_router
+from app.api.admin_controller import admin_router
+from app.api.metrics import metrics_router
+from app.api.timing import RequestTimingMiddleware
 
 app = FastAPI()
+app.add_middleware(RequestTimingMiddleware)
 app.include_router(booking_router)
 app.include_router(room_router)
 app.include_router(user_router)
 app.include_router(role_router)
+app.include_router(admin_router)
+app.include_router(metrics_router)
 client = TestClient(app)
 
 
+@pytest.fixture
+def db_sessions(tmp_path):
+    """Session factory for a freshly migrated sqlite file, which the app is
+    given as get_db in place of the mocked services"""
+    db_engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    run_migrations(bind=db_engine)
+    sessions = create_session_factory(db_engine)
+
+    def get_test_db():
+        db = sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides.clear()
+    app.dependency_overrides[get_db] = get_test_db
+    # process-wide caches may hold rooms and bookings from another database
+    room_catalog.bump()
+    availability_index.invalidate()
+    yield sessions
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(overrides)
+    room_catalog.bump()
+    availability_index.invalidate()
+    db_engine.dispose()
+
+
+def seed(db):
+    """Two roles, a restricted room with a series and a booking, and a user"""
+    employee, manager = Role(role="employee"), Role(role="manager")
+    room = Room(
+        room_number="R1",
+        capacity=4,
+        description="Huddle room",
+        request_only=False,
+        allowed_roles=[manager],
+    )
+    user = User(
+        name="Test User", username="testuser", hashed_password="x", roles=[employee]
+    )
+    start = datetime(2030, 1, 7, 10)
+    series = BookingSeries(
+        user=user,
+        room=room,
+        frequency="daily",
+        count=2,
+        start_time=start,
+        end_time=start + timedelta(hours=1),
+        datetime_made=start,
+    )
+    for day in range(2):
+        db.add(
+            Booking(
+                user=user,
+                room=room,
+                series=series,
+                start_time=start + timedelta(days=day),
+                end_time=start + timedelta(days=day, hours=1),
+                accepted=day == 0,
+                datetime_made=start,
+            )
+        )
+    db.add_all([room, user])
+    db.commit()
+
+
+def timing(response) -> dict:
+    """The db entry of the Server-Timing header"""
+    db = re.search(
+        r'db;dur=[\d.]+;desc="(\d+) queries, (\d+) rows, (\d+) lazy loads"',
+        response.headers["server-timing"],
+    )
+    queries, rows, lazy_loads = map(int, db.groups())
+    return {"queries": queries, "rows": rows, "lazy_loads": lazy_loads}
+
+
+@pytest.fixture
+def seeded(db_sessions, mock_admin_user):
+    """The seeded database's session factory, with requests made as the admin"""
+    with db_sessions() as db:
+        seed(db)
+    app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+    return db_sessions
+
+
 @pytest.fixture
 def mock_user():
     """Mock user object for testing"""
@@ -24,6 +126,7 @@ def mock_user():
     user.username = "testuser"
     user.name = "Test User"
     user.role_names = ["user"]
+    user.role_mask = role_registry.mask(user.role_names)
     return user
 
 
@@ -35,6 +138,7 @@ def mock_admin_user():
     user.username = "admin"
     user.name = "Admin User"
     user.role_names = ["admin"]
+    user.role_mask = role_registry.mask(user.role_names)
     return user
 
 
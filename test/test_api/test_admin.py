@@ -0,0 +1,70 @@
+import sqlite3
+from app.db.slow_queries import slow_query_log
+from test.conftest import app, client
+
+
+def record_query(statement, parameters):
+    connection = sqlite3.connect(":memory:")
+    connection.execute(
+        "CREATE TABLE booking_table (id INTEGER PRIMARY KEY, room_number TEXT)"
+    )
+    slow_query_log.record(connection.cursor(), statement, parameters, 0.5, False)
+
+
+class TestSlowQueriesEndpoint:
+    """Tests for GET and DELETE /admin/slow-queries"""
+
+    def test_get_slow_queries(self, mock_admin_user):
+        """Test slow statements are listed with redacted parameters and plans"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+        slow_query_log.clear()
+        record_query("SELECT * FROM booking_table WHERE id = ?", (7,))
+        record_query("SELECT * FROM booking_table WHERE room_number = ?", ("101",))
+
+        response = client.get("/admin/slow-queries")
+
+        assert response.status_code == 200
+        scan, search = response.json()
+        assert scan["parameters"] == ["<str>"]
+        assert scan["full_scan"] is True
+        assert search["parameters"] == [7]
+        assert search["full_scan"] is False
+        assert search["duration_ms"] == 500
+
+    def test_full_scans_only(self, mock_admin_user):
+        """Test filtering to plans that scan booking_table"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+        slow_query_log.clear()
+        record_query("SELECT * FROM booking_table WHERE id = ?", (7,))
+        record_query("SELECT count(*) FROM booking_table", ())
+
+        response = client.get("/admin/slow-queries?full_scans_only=true")
+
+        assert response.status_code == 200
+        assert [entry["plan"] for entry in response.json()] == [["SCAN booking_table"]]
+
+    def test_clear_slow_queries(self, mock_admin_user):
+        """Test the log can be cleared"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+        record_query("SELECT count(*) FROM booking_table", ())
+
+        response = client.delete("/admin/slow-queries")
+
+        assert response.status_code == 200
+        assert client.get("/admin/slow-queries").json() == []
+
+    def test_requires_admin(self, mock_user):
+        """Test a non-admin cannot read the log"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get("/admin/slow-queries")
+
+        assert response.status_code == 403
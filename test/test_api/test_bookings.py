@@ -1,4 +1,7 @@
-from unittest.mock import Mock
+from datetime import datetime, timedelta
+from unittest.mock import ANY, Mock, patch
+from app.db.models import Booking
+from app.schemas.pagination import Page
 from app.services.booking_service import BookingService
 from test.conftest import app, client
 
@@ -59,6 +62,121 @@ class TestCreateBookingRequestEndpoint:
         assert call_args[1]["current_user"] == mock_user
 
 
+class TestCreateBookingBatchEndpoint:
+    """Tests for POST /bookings/batch"""
+
+    def test_create_booking_batch_success(self, mock_user):
+        """Test successful batch booking creation"""
+        from app.api.dependencies import get_current_user
+
+        start = (datetime.now() + timedelta(days=1)).replace(
+            hour=10, minute=0, second=0, microsecond=0
+        )
+        mock_service = Mock(spec=BookingService)
+        mock_service.batch_booking_logic.return_value = {
+            "created": 2,
+            "failed": 0,
+            "results": [],
+        }
+
+        app.dependency_overrides[BookingService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        batch_data = {
+            "bookings": [
+                {
+                    "room_number": room_number,
+                    "start_datetime": start.isoformat(),
+                    "end_datetime": (start + timedelta(hours=1)).isoformat(),
+                }
+                for room_number in ["101", "102"]
+            ],
+            "mode": "best_effort",
+        }
+        response = client.post("/bookings/batch", json=batch_data)
+
+        assert response.status_code == 200
+        assert response.json()["created"] == 2
+        batch = mock_service.batch_booking_logic.call_args[0][0]
+        assert len(batch.bookings) == 2
+        assert batch.mode == "best_effort"
+        assert mock_service.batch_booking_logic.call_args[1]["current_user"] == mock_user
+
+    def test_create_booking_batch_empty(self, mock_user):
+        """Test that an empty batch is rejected"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock(spec=BookingService)
+
+        app.dependency_overrides[BookingService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.post("/bookings/batch", json={"bookings": []})
+
+        assert response.status_code == 422
+        mock_service.batch_booking_logic.assert_not_called()
+
+
+class TestCreateBookingSeriesEndpoint:
+    """Tests for POST /bookings/series"""
+
+    def test_create_booking_series_success(self, mock_user):
+        """Test successful recurring booking creation"""
+        from app.api.dependencies import get_current_user
+
+        start = (datetime.now() + timedelta(days=1)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+        mock_service = Mock(spec=BookingService)
+        mock_service.create_series.return_value = {
+            "series_id": 1,
+            "created": 52,
+            "skipped": [],
+            "bookings": [],
+        }
+
+        app.dependency_overrides[BookingService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        series_data = {
+            "room_number": "101",
+            "start_datetime": start.isoformat(),
+            "end_datetime": (start + timedelta(minutes=15)).isoformat(),
+            "frequency": "weekly",
+            "count": 52,
+        }
+        response = client.post("/bookings/series", json=series_data)
+
+        assert response.status_code == 200
+        assert response.json()["created"] == 52
+        series = mock_service.create_series.call_args[0][0]
+        assert series.frequency == "weekly"
+        assert series.skip_conflicts is False
+
+    def test_create_booking_series_without_end(self, mock_user):
+        """Test that a series without count or until is rejected"""
+        from app.api.dependencies import get_current_user
+
+        start = (datetime.now() + timedelta(days=1)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+        mock_service = Mock(spec=BookingService)
+
+        app.dependency_overrides[BookingService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        series_data = {
+            "room_number": "101",
+            "start_datetime": start.isoformat(),
+            "end_datetime": (start + timedelta(minutes=15)).isoformat(),
+            "frequency": "daily",
+        }
+        response = client.post("/bookings/series", json=series_data)
+
+        assert response.status_code == 422
+        mock_service.create_series.assert_not_called()
+
+
 class TestGetBookingsEndpoint:
     """Tests for GET /bookings"""
 
@@ -67,7 +185,7 @@ class TestGetBookingsEndpoint:
         from app.api.dependencies import get_current_user
 
         mock_service = Mock(spec=BookingService)
-        mock_service.get_all_your_bookings.return_value = [mock_booking]
+        mock_service.get_all_your_bookings.return_value = Page([mock_booking], None)
 
         app.dependency_overrides[BookingService] = lambda: mock_service
         app.dependency_overrides[get_current_user] = lambda: mock_user
@@ -76,14 +194,14 @@ class TestGetBookingsEndpoint:
 
         assert response.status_code == 200
         assert len(response.json()) == 1
-        mock_service.get_all_your_bookings.assert_called_once_with(mock_user.id)
+        mock_service.get_all_your_bookings.assert_called_once_with(mock_user.id, ANY)
 
     def test_get_bookings_empty(self, mock_user):
         """Test retrieval of bookings when user has none"""
         from app.api.dependencies import get_current_user
 
         mock_service = Mock(spec=BookingService)
-        mock_service.get_all_your_bookings.return_value = []
+        mock_service.get_all_your_bookings.return_value = Page([], None)
 
         app.dependency_overrides[BookingService] = lambda: mock_service
         app.dependency_overrides[get_current_user] = lambda: mock_user
@@ -92,7 +210,78 @@ class TestGetBookingsEndpoint:
 
         assert response.status_code == 200
         assert len(response.json()) == 0
-        mock_service.get_all_your_bookings.assert_called_once_with(mock_user.id)
+        mock_service.get_all_your_bookings.assert_called_once_with(mock_user.id, ANY)
+
+    def test_get_bookings_next_page(self, mock_user, mock_booking):
+        """Test that the cursor is passed through and the next one returned"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock(spec=BookingService)
+        mock_service.get_all_your_bookings.return_value = Page(
+            [mock_booking], "next-cursor"
+        )
+
+        app.dependency_overrides[BookingService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get("/bookings", params={"cursor": "abc", "limit": 1})
+
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "next-cursor"
+        page = mock_service.get_all_your_bookings.call_args[0][1]
+        assert page.cursor == "abc"
+        assert page.limit == 1
+
+    def test_get_bookings_limit_too_large(self, mock_user):
+        """Test that page sizes above the maximum are rejected"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock(spec=BookingService)
+
+        app.dependency_overrides[BookingService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get("/bookings", params={"limit": 100000})
+
+        assert response.status_code == 422
+        mock_service.get_all_your_bookings.assert_not_called()
+
+
+class TestExportBookingsEndpoint:
+    """Tests for GET /bookings/export"""
+
+    def test_export_bookings_csv(self, mock_admin_user):
+        """Test streaming a CSV export of bookings"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        with patch.object(
+            BookingService,
+            "export_bookings",
+            return_value=iter(["id,room_number\n", "1,101\n"]),
+        ) as mock_export:
+            response = client.get(
+                "/bookings/export",
+                params={"format": "csv", "room_number": "101", "status": "pending"},
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text == "id,room_number\n1,101\n"
+        filters = mock_export.call_args[0][0]
+        assert filters.room_number == "101"
+        assert filters.status == "pending"
+
+    def test_export_bookings_unauthorized(self, mock_user):
+        """Test export by non-admin user"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get("/bookings/export")
+
+        assert response.status_code == 403
 
 
 class TestDeleteBookingEndpoint:
@@ -143,7 +332,7 @@ class TestGetAllBookingRequestsEndpoint:
         from app.api.dependencies import get_current_user
 
         mock_service = Mock(spec=BookingService)
-        mock_service.get_all_requests.return_value = [mock_booking]
+        mock_service.get_all_requests.return_value = Page([mock_booking], None)
 
         app.dependency_overrides[BookingService] = lambda: mock_service
         app.dependency_overrides[get_current_user] = lambda: mock_admin_user
@@ -165,6 +354,67 @@ class TestGetAllBookingRequestsEndpoint:
         assert response.status_code == 403
 
 
+class TestResolveBookingRequestsEndpoint:
+    """Tests for POST /bookings/request/resolve"""
+
+    def test_resolve_booking_requests_dry_run(self, mock_admin_user):
+        """Test a dry run of resolving the request queue"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock(spec=BookingService)
+        mock_service.resolve_requests.return_value = {
+            "dry_run": True,
+            "approved": [],
+            "declined": [],
+        }
+
+        app.dependency_overrides[BookingService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.post(
+            "/bookings/request/resolve",
+            json={"weight_by": "age", "role_weights": {"manager": 1}, "dry_run": True},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["dry_run"] is True
+        options = mock_service.resolve_requests.call_args[0][0]
+        assert options.weight_by == "age"
+        assert options.role_weights == {"manager": 1}
+
+    def test_resolve_booking_requests_unauthorized(self, mock_user):
+        """Test resolving the request queue by non-admin user"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.post("/bookings/request/resolve", json={})
+
+        assert response.status_code == 403
+
+    def test_resolve_requests(self, seeded):
+        """Test resolving the request queue for real"""
+        response = client.post("/bookings/request/resolve", json={"dry_run": False})
+
+        assert response.status_code == 200
+        approved = response.json()["approved"]
+        assert [booking["accepted"] for booking in approved] == [True]
+        with seeded() as db:
+            assert db.query(Booking).filter(Booking.accepted.is_(False)).count() == 0
+            booking = db.get(Booking, approved[0]["id"])
+            assert booking.datetime_made.isoformat() == approved[0]["datetime_made"]
+
+    def test_resolve_requests_dry_run(self, seeded):
+        """Test a dry run reports the requests it would approve as still pending"""
+        response = client.post("/bookings/request/resolve", json={"dry_run": True})
+
+        assert response.status_code == 200
+        approved = response.json()["approved"]
+        assert [booking["accepted"] for booking in approved] == [False]
+        with seeded() as db:
+            assert db.query(Booking).filter(Booking.accepted.is_(False)).count() == 1
+
+
 class TestApproveBookingRequestEndpoint:
     """Tests for PUT /bookings/{booking_id}/approve"""
 
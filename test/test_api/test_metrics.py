@@ -0,0 +1,42 @@
+from unittest.mock import Mock
+from app.services.room_service import RoomService
+from test.conftest import app, client
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics"""
+
+    def test_metrics_format(self):
+        """Test metrics are served in the Prometheus text format"""
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE http_requests_total counter" in response.text
+        assert "# TYPE http_request_duration_seconds histogram" in response.text
+        assert "# TYPE threadpool_threads gauge" in response.text
+
+    def test_requests_counted_by_route(self, mock_user):
+        """Test requests are counted under their route template, not their path"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.delete_room.return_value = {"message": "Room deleted successfully"}
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        client.delete("/rooms/404-metrics")
+        response = client.get("/metrics")
+
+        assert (
+            'http_requests_total{method="DELETE",route="/rooms/{room_number}",'
+            'status="403"}' in response.text
+        )
+        assert "/rooms/404-metrics" not in response.text
+
+    def test_server_timing_header(self):
+        """Test responses carry a Server-Timing header"""
+        response = client.get("/metrics")
+
+        assert response.headers["server-timing"].startswith("total;dur=")
@@ -1,6 +1,10 @@
+from datetime import date, datetime, timedelta
 from unittest.mock import Mock, patch
+import pytest
+from app.db.models import Booking, BookingSeries, Room
+from app.schemas.pagination import Page
 from app.services.room_service import RoomService
-from test.conftest import app, client
+from test.conftest import app, client, timing
 
 
 class TestGetAvailableRoomsEndpoint:
@@ -33,6 +37,182 @@ class TestGetAvailableRoomsEndpoint:
         assert response.json()["rooms"][0]["room_number"] == "101"
         mock_service.get_available_rooms_time.assert_called_once()
 
+    def test_get_available_rooms_permissions_from_service(
+        self, mock_user, mock_room_data
+    ):
+        """Test that the service decides sufficient_roles for the current user"""
+        from app.api.dependencies import get_current_user
+
+        start = (datetime.now() + timedelta(days=1)).replace(
+            hour=10, minute=0, second=0, microsecond=0
+        )
+        mock_service = Mock()
+        mock_service.get_available_rooms_time.return_value = [
+            {**mock_room_data, "sufficient_roles": False}
+        ]
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get(
+            "/rooms",
+            params={
+                "min_capacity": 5,
+                "start_datetime": start.isoformat(),
+                "end_datetime": (start + timedelta(hours=2)).isoformat(),
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["rooms"][0]["sufficient_roles"] is False
+        min_capacity, _, _, user, q = (
+            mock_service.get_available_rooms_time.call_args[0]
+        )
+        assert min_capacity == 5
+        assert user == mock_user
+        assert q is None
+
+    def test_get_available_rooms_search(self, mock_user, mock_room_data):
+        """Test that the search text is passed through to the service"""
+        from app.api.dependencies import get_current_user
+
+        start = (datetime.now() + timedelta(days=1)).replace(
+            hour=10, minute=0, second=0, microsecond=0
+        )
+        mock_service = Mock()
+        mock_service.get_available_rooms_time.return_value = [mock_room_data]
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get(
+            "/rooms",
+            params={
+                "q": "video conferencing",
+                "start_datetime": start.isoformat(),
+                "end_datetime": (start + timedelta(hours=2)).isoformat(),
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["filters"]["q"] == "video conferencing"
+        assert mock_service.get_available_rooms_time.call_args[0][4] == (
+            "video conferencing"
+        )
+
+
+class TestGetAvailabilityGridEndpoint:
+    """Tests for GET /rooms/availability-grid"""
+
+    def test_get_availability_grid_success(self, mock_user):
+        """Test successful retrieval of the availability grid"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.get_availability_grid.return_value = {
+            "slot_minutes": 15,
+            "slots": 96,
+            "rooms": [{"room_number": "101", "busy": "0" * 96, "busy_slots": 0}],
+            "free_rooms_per_slot": [1] * 96,
+        }
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get(
+            "/rooms/availability-grid",
+            params={"date": "2026-01-01", "days": 1, "min_capacity": 5},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["rooms"][0]["room_number"] == "101"
+        mock_service.get_availability_grid.assert_called_once_with(
+            5, date(2026, 1, 1), 1
+        )
+
+    def test_get_availability_grid_too_many_days(self, mock_user):
+        """Test that grids longer than a week are rejected"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get(
+            "/rooms/availability-grid", params={"date": "2026-01-01", "days": 8}
+        )
+
+        assert response.status_code == 422
+        mock_service.get_availability_grid.assert_not_called()
+
+
+class TestGetFreeSlotsEndpoint:
+    """Tests for GET /rooms/free-slots"""
+
+    def test_get_free_slots_success(self, mock_user):
+        """Test successful free slot search"""
+        from app.api.dependencies import get_current_user
+
+        start = (datetime.now() + timedelta(days=1)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+        mock_service = Mock()
+        mock_service.get_free_slots.return_value = [
+            {
+                "room_number": "101",
+                "free_slots": [
+                    {
+                        "start_datetime": start.isoformat(),
+                        "end_datetime": (start + timedelta(hours=1)).isoformat(),
+                    }
+                ],
+            }
+        ]
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get(
+            "/rooms/free-slots",
+            params={
+                "start_datetime": start.isoformat(),
+                "end_datetime": (start + timedelta(hours=8)).isoformat(),
+                "duration_minutes": 60,
+                "room_numbers": ["101", "102"],
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json()["rooms"][0]["room_number"] == "101"
+        filters, user = mock_service.get_free_slots.call_args[0]
+        assert filters.room_numbers == ["101", "102"]
+        assert user == mock_user
+
+    def test_get_free_slots_invalid_duration(self, mock_user):
+        """Test that durations off the 15 minute grid are rejected"""
+        from app.api.dependencies import get_current_user
+
+        start = (datetime.now() + timedelta(days=1)).replace(
+            hour=9, minute=0, second=0, microsecond=0
+        )
+        mock_service = Mock()
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get(
+            "/rooms/free-slots",
+            params={
+                "start_datetime": start.isoformat(),
+                "end_datetime": (start + timedelta(hours=8)).isoformat(),
+                "duration_minutes": 20,
+            },
+        )
+
+        assert response.status_code == 422
+        mock_service.get_free_slots.assert_not_called()
+
 
 class TestGetAllRoomsEndpoint:
     """Tests for GET /rooms/all"""
@@ -42,7 +222,7 @@ class TestGetAllRoomsEndpoint:
         from app.api.dependencies import get_current_user
 
         mock_service = Mock()
-        mock_service.get_all_rooms.return_value = [mock_room_data]
+        mock_service.get_all_rooms.return_value = Page([mock_room_data], None)
 
         app.dependency_overrides[RoomService] = lambda: mock_service
         app.dependency_overrides[get_current_user] = lambda: mock_user
@@ -104,4 +284,32 @@ class TestDeleteRoomEndpoint:
 
         assert response.status_code == 200
         assert "Room deleted successfully" in response.json()["message"]
-        mock_service.delete_room.assert_called_once_with("101")
+        mock_service.delete_room.assert_called_once_with("101", chunk_size=None)
+
+    def test_delete_room_in_chunks(self, mock_admin_user):
+        """Test the chunk size is passed through to the service"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.delete_room.return_value = {"message": "Room deleted successfully"}
+
+        app.dependency_overrides[RoomService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.delete("/rooms/101?chunk_size=1000")
+
+        assert response.status_code == 200
+        mock_service.delete_room.assert_called_once_with("101", chunk_size=1000)
+
+    @pytest.mark.parametrize("url", ["/rooms/R1", "/rooms/R1?chunk_size=1"])
+    def test_delete_room_with_history(self, seeded, url):
+        """Test the room goes with its bookings and series, in one transaction
+        or in chunks, and the query accounting hooks do not get in the way"""
+        response = client.delete(url)
+
+        assert response.status_code == 200
+        assert timing(response)["queries"] > 0
+        with seeded() as db:
+            assert db.query(Room).count() == 0
+            assert db.query(Booking).count() == 0
+            assert db.query(BookingSeries).count() == 0
@@ -0,0 +1,33 @@
+from test.conftest import client, timing
+
+
+class TestRequestTimingWithDatabase:
+    """Requests run against a real database with the timing middleware"""
+
+    def test_server_timing_counts(self, seeded):
+        """Test query, row and lazy load counts of a request"""
+        response = client.get("/rooms/all")
+
+        counts = timing(response)
+        assert response.status_code == 200
+        # the rooms, then their allowed roles with selectinload
+        assert counts == {"queries": 2, "rows": 2, "lazy_loads": 0}
+
+    def test_register_loads_roles_up_front(self, seeded):
+        """Test the async register endpoint does no lazy loads on the event loop"""
+        response = client.post(
+            "/users", json={"username": "new", "password": "pw", "name": "New User"}
+        )
+
+        assert response.status_code == 200
+        assert timing(response)["lazy_loads"] == 0
+
+    def test_server_timing_lazy_loads(self, seeded):
+        """Test lazy loads are counted, here the user's roles before and after
+        they are replaced"""
+        response = client.put(
+            "/users/roles", json={"username": "testuser", "roles": ["manager"]}
+        )
+
+        assert response.status_code == 200
+        assert timing(response)["lazy_loads"] == 2
@@ -1,5 +1,8 @@
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from fastapi import HTTPException, status
+from app.auth.principal_cache import principal_cache
+from app.db.models import Booking, User
+from app.schemas.pagination import Page
 from app.services.user_service import UserService
 from test.conftest import app, client
 
@@ -10,7 +13,7 @@ class TestLoginEndpoint:
     def test_login_success(self, mock_user):
         """Test successful login"""
         mock_service = Mock()
-        mock_service.authenticate_user.return_value = mock_user
+        mock_service.authenticate_user = AsyncMock(return_value=mock_user)
 
         app.dependency_overrides[UserService] = lambda: mock_service
 
@@ -29,7 +32,7 @@ class TestLoginEndpoint:
     def test_login_invalid_credentials(self):
         """Test login with invalid credentials"""
         mock_service = Mock()
-        mock_service.authenticate_user.return_value = None
+        mock_service.authenticate_user = AsyncMock(return_value=None)
 
         app.dependency_overrides[UserService] = lambda: mock_service
 
@@ -43,6 +46,26 @@ class TestLoginEndpoint:
             "testuser", "wrongpassword"
         )
 
+    def test_login_hashing_pool_saturated(self):
+        """Test login fast-fails when the password hashing queue is full"""
+        mock_service = Mock()
+        mock_service.authenticate_user = AsyncMock(
+            side_effect=HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent authentication requests, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+        )
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+
+        response = client.post(
+            "/users/token", data={"username": "testuser", "password": "password123"}
+        )
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
 
 class TestRegisterEndpoint:
     """Tests for POST /users"""
@@ -51,7 +74,7 @@ class TestRegisterEndpoint:
         """Test successful user registration"""
         mock_service = Mock()
         mock_service.get_user_by_username.return_value = None
-        mock_service.hash_password.return_value = "hashed_password"
+        mock_service.hash_password = AsyncMock(return_value="hashed_password")
         mock_service.create_user.return_value = mock_user
 
         app.dependency_overrides[UserService] = lambda: mock_service
@@ -116,6 +139,28 @@ class TestGetMeEndpoint:
 
         assert response.status_code == 401
 
+    def test_get_me_caches_principal(self, mock_user):
+        """Test the user is looked up once per token and again after a role change"""
+        from app.api.dependencies import get_current_user
+        from app.repositories.user_repository import UserRepository
+
+        app.dependency_overrides.pop(get_current_user, None)
+        mock_repo = Mock()
+        mock_repo.get_user_with_roles.return_value = mock_user
+        app.dependency_overrides[UserRepository] = lambda: mock_repo
+        token = UserService.create_token(user_data={"username": "testuser"})
+        headers = {"Cookie": f'access_token="bearer {token}"'}
+
+        first = client.get("/users/me", headers=headers)
+        second = client.get("/users/me", headers=headers)
+        principal_cache.invalidate("testuser")
+        third = client.get("/users/me", headers=headers)
+        app.dependency_overrides.pop(UserRepository)
+
+        assert first.json() == second.json() == third.json()
+        assert first.json()["role_names"] == ["user"]
+        assert mock_repo.get_user_with_roles.call_count == 2
+
 
 class TestGetAllUsersEndpoint:
     """Tests for GET /users/all"""
@@ -125,7 +170,9 @@ class TestGetAllUsersEndpoint:
         from app.api.dependencies import get_current_user
 
         mock_service = Mock()
-        mock_service.get_all_users_from_db.return_value = [mock_user, mock_admin_user]
+        mock_service.get_all_users_from_db.return_value = Page(
+            [mock_user, mock_admin_user], None
+        )
 
         app.dependency_overrides[UserService] = lambda: mock_service
         app.dependency_overrides[get_current_user] = lambda: mock_admin_user
@@ -151,6 +198,53 @@ class TestGetAllUsersEndpoint:
         assert response.status_code == 500
         assert response.json()["detail"] == "Error retrieving users"
 
+    def test_get_all_users_filtered(self, mock_admin_user, mock_user):
+        """Test role and prefix filters are passed to the service"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.get_all_users_from_db.return_value = Page([mock_user], "next")
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.get("/users/all?role=manager&prefix=test&limit=1")
+
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == "next"
+        page = mock_service.get_all_users_from_db.call_args.args[0]
+        assert (page.role, page.prefix, page.limit) == ("manager", "test", 1)
+
+
+class TestCountUsersEndpoint:
+    """Tests for GET /users/count"""
+
+    def test_count_users(self, mock_admin_user):
+        """Test counting users matching the filters"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.count_users.return_value = 42
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.get("/users/count?role=employee")
+
+        assert response.status_code == 200
+        assert response.json() == {"count": 42}
+        assert mock_service.count_users.call_args.args[0].role == "employee"
+
+    def test_count_users_requires_admin(self, mock_user):
+        """Test a non-admin cannot count users"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.get("/users/count")
+
+        assert response.status_code == 403
+
 
 class TestLogoutEndpoint:
     """Tests for POST /users/logout"""
@@ -170,6 +264,37 @@ class TestLogoutEndpoint:
         assert response.status_code == 200
         assert response.cookies.get("access_token") is None
 
+    def test_logout_revokes_token(self, mock_user):
+        """Test that a token presented at logout is rejected afterwards"""
+        from app.api.dependencies import get_current_user
+        from app.repositories.revocation_repository import RevocationRepository
+        from app.repositories.user_repository import UserRepository
+
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(UserService, None)
+        mock_repo = Mock()
+        mock_repo.get_user_with_roles.return_value = mock_user
+        mock_revocation_repo = Mock()
+        app.dependency_overrides[UserRepository] = lambda: mock_repo
+        app.dependency_overrides[RevocationRepository] = lambda: mock_revocation_repo
+        token = UserService.create_token(user_data={"username": "testuser"})
+        headers = {"Cookie": f'access_token="bearer {token}"'}
+
+        before = client.get("/users/me", headers=headers)
+        logout = client.post("/users/logout", headers=headers)
+        after = client.get("/users/me", headers=headers)
+        app.dependency_overrides.pop(UserRepository)
+        app.dependency_overrides.pop(RevocationRepository)
+
+        assert before.status_code == 200
+        assert logout.status_code == 200
+        assert after.status_code == 403
+        assert after.json()["detail"] == "Token has been revoked"
+        payload = UserService.decode_token(token)
+        mock_revocation_repo.revoke_token.assert_called_once_with(
+            payload["jti"], payload["exp"]
+        )
+
 
 class TestPutRolesEndpoint:
     """Tests for PUT /users/roles"""
@@ -210,3 +335,186 @@ class TestPutRolesEndpoint:
 
         assert response.status_code == 500
         assert response.json()["detail"] == "Error updating user roles"
+
+
+class TestBulkRolesEndpoint:
+    """Tests for PUT /users/roles/bulk"""
+
+    def test_assign_roles(self, mock_admin_user):
+        """Test roles are assigned to many users through the service"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.assign_roles.return_value = {
+            "updated": 2,
+            "failed": 1,
+            "results": [
+                {"username": "a", "updated": True, "detail": None},
+                {"username": "b", "updated": True, "detail": None},
+                {"username": "c", "updated": False, "detail": "User not found"},
+            ],
+        }
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.put(
+            "/users/roles/bulk",
+            json={"usernames": ["a", "b", "c"], "roles": ["manager"], "replace": True},
+        )
+
+        assert response.status_code == 200
+        assert response.json()["failed"] == 1
+        bulk = mock_service.assign_roles.call_args.args[0]
+        assert bulk.usernames == ["a", "b", "c"]
+        assert bulk.replace is True
+
+    def test_assign_roles_requires_usernames(self, mock_admin_user):
+        """Test an empty list of usernames is rejected"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.put(
+            "/users/roles/bulk", json={"usernames": [], "roles": ["manager"]}
+        )
+
+        assert response.status_code == 422
+
+    def test_assign_roles_adds_to_existing(self, seeded):
+        """Test roles assigned in bulk are added to those the user has"""
+        response = client.put(
+            "/users/roles/bulk", json={"usernames": ["testuser"], "roles": ["manager"]}
+        )
+
+        assert response.status_code == 200
+        with seeded() as db:
+            user = db.query(User).filter(User.username == "testuser").one()
+            assert sorted(user.role_names) == ["employee", "manager"]
+
+
+class TestImportUsersEndpoint:
+    """Tests for POST /users/import"""
+
+    def test_import_json(self, mock_admin_user):
+        """Test a JSON array of users is passed to the service"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.import_users.return_value = {
+            "created": 1,
+            "failed": 0,
+            "results": [],
+        }
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        users = '[{"name": "New User", "username": "new", "password": "pw"}]'
+        response = client.post(
+            "/users/import", files={"file": ("users.json", users, "application/json")}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["created"] == 1
+        mock_service.import_users.assert_called_once_with(
+            [{"name": "New User", "username": "new", "password": "pw"}]
+        )
+
+    def test_import_csv(self, mock_admin_user):
+        """Test CSV rows are parsed with roles separated by semicolons"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.import_users.return_value = {
+            "created": 2,
+            "failed": 0,
+            "results": [],
+        }
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        users = (
+            "name,username,password,roles\n"
+            "One,one,pw,employee; manager\n"
+            "Two,two,pw,\n"
+        )
+        response = client.post(
+            "/users/import", files={"file": ("users.csv", users, "text/csv")}
+        )
+
+        assert response.status_code == 200
+        rows = mock_service.import_users.call_args.args[0]
+        assert rows[0]["roles"] == ["employee", "manager"]
+        assert rows[1]["roles"] == []
+
+    def test_import_invalid_file(self, mock_admin_user):
+        """Test a file that cannot be parsed is rejected"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.post(
+            "/users/import", files={"file": ("users.json", "[oops", "application/json")}
+        )
+
+        assert response.status_code == 400
+        mock_service.import_users.assert_not_called()
+
+
+class TestDeleteUserEndpoint:
+    """Tests for DELETE /users/{username}"""
+
+    def test_delete_user_success(self, mock_admin_user):
+        """Test successful user deletion by admin"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.delete("/users/testuser?chunk_size=500")
+
+        assert response.status_code == 200
+        assert response.json()["username"] == "testuser"
+        mock_service.delete_user.assert_called_once_with("testuser", chunk_size=500)
+
+    def test_delete_user_not_found(self, mock_admin_user):
+        """Test deleting a user that does not exist"""
+        from app.api.dependencies import get_current_user
+
+        mock_service = Mock()
+        mock_service.delete_user.side_effect = HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+        app.dependency_overrides[UserService] = lambda: mock_service
+        app.dependency_overrides[get_current_user] = lambda: mock_admin_user
+
+        response = client.delete("/users/nobody")
+
+        assert response.status_code == 404
+
+    def test_delete_user_requires_admin(self, mock_user):
+        """Test a non-admin cannot delete users"""
+        from app.api.dependencies import get_current_user
+
+        app.dependency_overrides[get_current_user] = lambda: mock_user
+
+        response = client.delete("/users/testuser")
+
+        assert response.status_code == 403
+
+    def test_delete_user_with_bookings(self, seeded):
+        """Test deleting a user and their bookings"""
+        response = client.delete("/users/testuser?chunk_size=1")
+
+        assert response.status_code == 200
+        with seeded() as db:
+            assert db.query(User).count() == 0
+            assert db.query(Booking).count() == 0
@@ -0,0 +1,166 @@
+import time
+from fastapi import HTTPException
+import pytest
+from app.api import dependencies
+from app.api.dependencies import get_current_user
+from app.auth.revocation import BloomFilter, RevocationStore
+from app.db.models import Role, User
+from app.repositories.revocation_repository import RevocationRepository
+from app.repositories.role_repository import RoleRepository
+from app.repositories.user_repository import UserRepository
+from app.schemas.user import BulkRoles, PutRoles
+from app.services import user_service
+from app.services.user_service import UserService
+import app.config as Config
+
+
+def false_positive(store: RevocationStore) -> str:
+    """A jti the store's Bloom filter claims to hold but which was never revoked"""
+    for i in range(1_000_000):
+        jti = f"never-revoked-{i}"
+        if jti in store._bloom:
+            return jti
+    raise AssertionError("no false positive found")
+
+
+class TestBloomFilter:
+    """Tests for the Bloom filter in front of the revoked jtis"""
+
+    def test_no_false_negatives(self):
+        """Test every value added is reported as present"""
+        bloom = BloomFilter(capacity=1000)
+        values = [f"jti-{i}" for i in range(1000)]
+        for value in values:
+            bloom.add(value)
+
+        assert all(value in bloom for value in values)
+
+    def test_false_positive_rate(self):
+        """Test a full filter stays near the false positive rate it was sized for"""
+        bloom = BloomFilter(capacity=1000, false_positive_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+
+        hits = sum(f"other-{i}" in bloom for i in range(10_000))
+        assert hits / 10_000 < 0.02
+
+
+class TestRevocationStore:
+    """Tests for the per-process revoked token store"""
+
+    def test_revoked_jti(self):
+        """Test a revoked jti is rejected and others are not"""
+        store = RevocationStore(capacity=100)
+        store.revoke("a", time.time() + 600)
+
+        assert store.is_revoked("a", "testuser", time.time())
+        assert not store.is_revoked("b", "testuser", time.time())
+
+    def test_false_positive_falls_back_to_exact_set(self):
+        """Test a Bloom filter hit for a jti never revoked is not a revocation"""
+        store = RevocationStore(capacity=8)
+        for i in range(8):
+            store.revoke(f"revoked-{i}", time.time() + 600)
+
+        assert not store.is_revoked(false_positive(store), "testuser", time.time())
+
+    def test_prune_drops_expired_and_grows(self):
+        """Test outgrowing the capacity prunes expired jtis and resizes the
+        filter for the ones still in force"""
+        store = RevocationStore(capacity=4)
+        now = time.time()
+        for i in range(3):
+            store.revoke(f"expired-{i}", now - 1)
+        for i in range(3):
+            store.revoke(f"live-{i}", now + 600)
+
+        assert set(store._revoked) == {"live-0", "live-1", "live-2"}
+        assert store.capacity >= 4
+        assert all(store.is_revoked(f"live-{i}", "testuser", now) for i in range(3))
+        assert not store.is_revoked("expired-0", "testuser", now)
+
+    def test_user_cutoff(self):
+        """Test tokens issued up to a user's cutoff are revoked, later ones and
+        other users' are not"""
+        store = RevocationStore(capacity=100)
+        cutoff = time.time()
+        store.revoke_user("testuser", cutoff)
+
+        assert store.is_revoked("a", "testuser", cutoff - 1)
+        assert store.is_revoked("a", "testuser", cutoff)
+        # a token without iat cannot be shown to be newer
+        assert store.is_revoked("a", "testuser", None)
+        assert not store.is_revoked("a", "testuser", cutoff + 1)
+        assert not store.is_revoked("a", "other", cutoff - 1)
+
+    def test_prune_drops_cutoffs_older_than_any_token(self):
+        """Test a cutoff older than the token lifetime is forgotten on prune"""
+        store = RevocationStore(capacity=1)
+        now = time.time()
+        store.revoke_user("old", now - Config.ACCESS_TOKEN_EXPIRE_SECONDS - 1)
+        store.revoke_user("recent", now - 1)
+        store.revoke("a", now + 600)
+        store.revoke("b", now + 600)
+
+        assert set(store._revoked_users) == {"recent"}
+
+
+class TestRevokeOnRoleChange:
+    """Tests for revoking a user's tokens when their roles change"""
+
+    @pytest.fixture
+    def store(self, monkeypatch):
+        store = RevocationStore(capacity=100)
+        monkeypatch.setattr(user_service, "revocation_store", store)
+        monkeypatch.setattr(dependencies, "revocation_store", store)
+        return store
+
+    @pytest.fixture
+    def db(self, db_sessions):
+        with db_sessions() as db:
+            db.add_all(
+                [
+                    Role(role="manager"),
+                    User(name="Test User", username="testuser", hashed_password="x"),
+                    User(name="Other User", username="other", hashed_password="x"),
+                ]
+            )
+            db.commit()
+            yield db
+
+    @pytest.fixture
+    def service(self, db):
+        return UserService(
+            UserRepository(db), RoleRepository(db), RevocationRepository(db)
+        )
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda service: service.put_roles(
+                PutRoles(username="testuser", roles=["manager"])
+            ),
+            lambda service: service.assign_roles(
+                BulkRoles(usernames=["testuser"], roles=["manager"])
+            ),
+        ],
+        ids=["put_roles", "assign_roles"],
+    )
+    def test_existing_tokens_revoked(self, store, db, service, change):
+        """Test tokens issued before a role change are refused, those issued
+        after it and other users' are not"""
+        before = UserService.create_token({"username": "testuser"})
+        other = UserService.create_token({"username": "other"})
+        change(service)
+
+        with pytest.raises(HTTPException) as e:
+            get_current_user(before, UserRepository(db))
+        assert e.value.status_code == 403
+        assert get_current_user(other, UserRepository(db)).username == "other"
+
+        time.sleep(0.01)
+        after = UserService.create_token({"username": "testuser"})
+        assert get_current_user(after, UserRepository(db)).role_names == ("manager",)
+        # recorded for the other workers too
+        _, users = RevocationRepository(db).get_revocations(0, time.time())
+        assert [username for username, _ in users] == ["testuser"]
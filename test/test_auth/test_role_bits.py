@@ -0,0 +1,73 @@
+from concurrent.futures import ThreadPoolExecutor
+from app.auth.role_bits import RoleRegistry, has_all_roles, has_any_role
+
+
+class TestRoleRegistry:
+    """Tests for interning role names as bits"""
+
+    def test_bit(self):
+        """Test each role gets its own bit, the same one every time"""
+        registry = RoleRegistry()
+
+        assert registry.bit("employee") == 1
+        assert registry.bit("manager") == 2
+        assert registry.bit("employee") == 1
+        assert registry.bit("admin") == 4
+
+    def test_mask(self):
+        """Test a mask ORs the bits of its roles, ignoring repeats"""
+        registry = RoleRegistry()
+        registry.mask(["employee", "manager", "admin"])
+
+        assert registry.mask([]) == 0
+        assert registry.mask(["manager"]) == 2
+        assert registry.mask(["admin", "employee", "admin"]) == 5
+
+    def test_round_trip(self):
+        """Test the roles read back from a mask are the ones it was made from"""
+        registry = RoleRegistry()
+        names = ["employee", "manager", "admin", "facilities", "guest"]
+        registry.mask(names)
+
+        for i in range(1 << len(names)):
+            roles = tuple(sorted(name for j, name in enumerate(names) if i >> j & 1))
+            assert registry.roles(registry.mask(roles)) == roles
+
+    def test_unknown_roles(self):
+        """Test an unseen role gets a new bit and unassigned bits are ignored"""
+        registry = RoleRegistry()
+        known = registry.mask(["employee", "manager"])
+
+        assert registry.roles(known | 1 << 10) == ("employee", "manager")
+        assert registry.bit("auditor") == 4
+        assert not has_all_roles(known, registry.mask(["auditor"]))
+
+    def test_concurrent_bits_distinct(self):
+        """Test roles first seen on different threads never share a bit"""
+        registry = RoleRegistry()
+        names = [f"role-{i}" for i in range(200)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            bits = dict(zip(names, pool.map(registry.bit, names)))
+
+        assert sorted(bits.values()) == [1 << i for i in range(200)]
+        assert all(registry.bit(name) == bit for name, bit in bits.items())
+
+
+class TestRoleChecks:
+    """Tests for checking a user's role mask"""
+
+    def test_has_all_roles(self):
+        """Test every required bit must be set"""
+        assert has_all_roles(0b111, 0b101)
+        assert has_all_roles(0b101, 0b101)
+        assert not has_all_roles(0b100, 0b101)
+        assert has_all_roles(0, 0)
+        assert has_all_roles(0b1, 0)
+
+    def test_has_any_role(self):
+        """Test one shared bit is enough and an empty allowed mask admits all"""
+        assert has_any_role(0b010, 0b110)
+        assert not has_any_role(0b001, 0b110)
+        assert has_any_role(0, 0)
+        assert has_any_role(0b1, 0)
+        assert not has_any_role(0, 0b1)
@@ -0,0 +1,70 @@
+import time
+from app.auth.token_cache import VerifiedTokenCache
+
+
+def payload(jti: str, expires_in: float = 600) -> dict:
+    expires_at = time.time() + expires_in
+    return {"user": {"username": "testuser"}, "jti": jti, "exp": expires_at}
+
+
+class TestVerifiedTokenCache:
+    """Tests for the cache of verified token payloads"""
+
+    def test_get_returns_cached_payload(self):
+        """Test only the exact token string put is served"""
+        cache = VerifiedTokenCache(max_size=10)
+        cache.put("token-a", payload("a"))
+
+        assert cache.get("token-a")["jti"] == "a"
+        assert cache.get("token-a ") is None
+        assert cache.get("token-b") is None
+
+    def test_expired_payload_dropped(self):
+        """Test a payload is not served once its token has expired"""
+        cache = VerifiedTokenCache(max_size=10)
+        cache.put("token-a", payload("a", expires_in=-1))
+
+        assert cache.get("token-a") is None
+        # dropped rather than kept around, so its jti no longer maps to it
+        assert cache._tokens_by_jti == {}
+
+    def test_least_recently_used_evicted(self):
+        """Test the least recently read token goes once the cache is full"""
+        cache = VerifiedTokenCache(max_size=2)
+        cache.put("token-a", payload("a"))
+        cache.put("token-b", payload("b"))
+        cache.get("token-a")
+        cache.put("token-c", payload("c"))
+
+        assert cache.get("token-b") is None
+        assert cache.get("token-a") is not None
+        assert cache.get("token-c") is not None
+        assert set(cache._tokens_by_jti) == {"a", "c"}
+
+    def test_evict_by_jti(self):
+        """Test a revoked token can be evicted knowing only its jti"""
+        cache = VerifiedTokenCache(max_size=10)
+        cache.put("token-a", payload("a"))
+        cache.put("token-b", payload("b"))
+        cache.evict("a")
+        cache.evict("unknown")
+
+        assert cache.get("token-a") is None
+        assert cache.get("token-b") is not None
+
+    def test_payload_without_jti_or_expiry_not_cached(self):
+        """Test payloads that could not be evicted or expired are never cached"""
+        cache = VerifiedTokenCache(max_size=10)
+        cache.put("no-jti", {"exp": time.time() + 600})
+        cache.put("no-exp", {"jti": "a"})
+
+        assert cache.get("no-jti") is None
+        assert cache.get("no-exp") is None
+
+    def test_clear(self):
+        """Test clearing drops every payload"""
+        cache = VerifiedTokenCache(max_size=10)
+        cache.put("token-a", payload("a"))
+        cache.clear()
+
+        assert cache.get("token-a") is None
@@ -0,0 +1,91 @@
+from datetime import date, datetime
+from itertools import groupby
+from operator import itemgetter
+import pytest
+from sqlalchemy import create_engine
+from app.db.generate_data import generate
+
+# a Saturday, so the first day has to move to the Monday
+START_DATE = date(2030, 1, 5)
+TABLES = {
+    "role_table": "role",
+    "room_table": "room_number",
+    "room_role_table": "role, room_number",
+    "user_role_table": "role, user_id",
+    "booking_table": "id",
+}
+
+
+def dump(path) -> dict:
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.connect() as connection:
+        tables = {
+            table: connection.exec_driver_sql(
+                f"SELECT * FROM {table} ORDER BY {order}"
+            ).all()
+            for table, order in TABLES.items()
+        }
+        # not the shared password hash, whose salt differs between runs
+        tables["user_table"] = connection.exec_driver_sql(
+            "SELECT id, name, username FROM user_table ORDER BY id"
+        ).all()
+    engine.dispose()
+    return tables
+
+
+@pytest.fixture
+def generated(tmp_path):
+    def generated(name: str, seed: int = 0) -> dict:
+        path = tmp_path / name
+        counts = generate(
+            str(path), rooms=5, users=20, bookings=300, seed=seed, start_date=START_DATE
+        )
+        assert counts["bookings"] == 300
+        return dump(path)
+
+    return generated
+
+
+class TestGenerate:
+    """Tests for the synthetic database generator"""
+
+    def test_same_seed_same_rows(self, generated):
+        """Test the same arguments give the same rows and another seed does not"""
+        first = generated("first.db")
+
+        assert generated("second.db") == first
+        assert generated("other.db", seed=1)["booking_table"] != first["booking_table"]
+
+    def test_bookings_do_not_overlap(self, generated):
+        """Test each room's bookings never overlap and stay in working hours
+        on working days, starting from the first working day"""
+        bookings = generated("bookings.db")["booking_table"]
+        by_room = sorted(
+            (room_number, datetime.fromisoformat(start), datetime.fromisoformat(end))
+            for _, _, room_number, start, end, *_ in bookings
+        )
+        starts = []
+        for _, room_bookings in groupby(by_room, key=itemgetter(0)):
+            room_bookings = list(room_bookings)
+            for previous, booking in zip(room_bookings, room_bookings[1:]):
+                assert booking[1] >= previous[2]
+            starts += [start for _, start, _ in room_bookings]
+        for _, start, end in by_room:
+            assert start.date() == end.date()
+            assert start.weekday() < 5
+            assert 8 <= start.hour and (end.hour, end.minute) <= (18, 0)
+        assert min(starts).date() == date(2030, 1, 7)
+
+    def test_change_log_left_empty_and_armed(self, tmp_path):
+        """Test generated bookings skip booking_change_table, whose triggers
+        are back in place afterwards"""
+        path = tmp_path / "log.db"
+        generate(str(path), rooms=2, users=2, bookings=10, start_date=START_DATE)
+
+        engine = create_engine(f"sqlite:///{path}")
+        with engine.begin() as connection:
+            count = "SELECT count(*) FROM booking_change_table"
+            assert connection.exec_driver_sql(count).scalar() == 0
+            connection.exec_driver_sql("DELETE FROM booking_table WHERE id = 1")
+            assert connection.exec_driver_sql(count).scalar() == 1
+        engine.dispose()
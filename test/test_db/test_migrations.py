@@ -0,0 +1,210 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+import pytest
+from sqlalchemy import inspect
+from app.db import migrations
+from app.db.database import create_db_engine, create_session_factory
+from app.db.migrations import LATEST_VERSION, get_schema_version, run_migrations
+from app.db.models import Room
+
+# the schema created by create_all before versioned migrations existed
+BASELINE_SCHEMA = [
+    """CREATE TABLE room_table (
+        room_number VARCHAR NOT NULL,
+        capacity INTEGER NOT NULL,
+        description VARCHAR NOT NULL,
+        request_only BOOLEAN NOT NULL,
+        PRIMARY KEY (room_number)
+    )""",
+    "CREATE INDEX ix_room_table_room_number ON room_table (room_number)",
+    "CREATE INDEX ix_room_table_capacity ON room_table (capacity)",
+    """CREATE TABLE user_table (
+        id INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        username VARCHAR NOT NULL,
+        hashed_password VARCHAR NOT NULL,
+        PRIMARY KEY (id)
+    )""",
+    "CREATE INDEX ix_user_table_id ON user_table (id)",
+    "CREATE UNIQUE INDEX ix_user_table_username ON user_table (username)",
+    "CREATE TABLE role_table (role VARCHAR NOT NULL, PRIMARY KEY (role))",
+    """CREATE TABLE user_role_table (
+        role VARCHAR NOT NULL,
+        user_id INTEGER NOT NULL,
+        PRIMARY KEY (role, user_id),
+        FOREIGN KEY(role) REFERENCES role_table (role),
+        FOREIGN KEY(user_id) REFERENCES user_table (id)
+    )""",
+    """CREATE TABLE room_role_table (
+        role VARCHAR NOT NULL,
+        room_number INTEGER NOT NULL,
+        PRIMARY KEY (role, room_number),
+        FOREIGN KEY(role) REFERENCES role_table (role),
+        FOREIGN KEY(room_number) REFERENCES room_table (room_number)
+    )""",
+    """CREATE TABLE booking_table (
+        id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        room_number VARCHAR NOT NULL,
+        start_time DATETIME NOT NULL,
+        end_time DATETIME NOT NULL,
+        accepted BOOLEAN NOT NULL,
+        datetime_made DATETIME NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(user_id) REFERENCES user_table (id),
+        FOREIGN KEY(room_number) REFERENCES room_table (room_number)
+    )""",
+    "INSERT INTO role_table VALUES ('manager')",
+    "INSERT INTO room_table VALUES ('101', 10, 'Board room with projector', 0)",
+    "INSERT INTO room_table VALUES ('R2', 4, 'Quiet huddle room', 1)",
+    # the Integer column stored the numeric room number as an integer
+    "INSERT INTO room_role_table VALUES ('manager', '101')",
+    "INSERT INTO room_role_table VALUES ('manager', 'R2')",
+]
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.exec_driver_sql(statement)
+    yield engine
+    engine.dispose()
+
+
+class TestRunMigrations:
+    """Tests for upgrading a database created before versioned migrations"""
+
+    def test_upgrades_baseline_schema(self, baseline_engine):
+        """Test every migration applies and the version is recorded"""
+        with baseline_engine.connect() as connection:
+            assert get_schema_version(connection) == 0
+
+        assert run_migrations(baseline_engine) == LATEST_VERSION
+
+        with baseline_engine.connect() as connection:
+            assert get_schema_version(connection) == LATEST_VERSION
+        schema = inspect(baseline_engine)
+        assert {
+            "booking_series_table",
+            "booking_change_table",
+            "revoked_token_table",
+            "user_revocation_table",
+        } <= set(schema.get_table_names())
+        assert "series_id" in {
+            column["name"] for column in schema.get_columns("booking_table")
+        }
+        assert {
+            "ix_booking_room_accepted_time",
+            "ix_booking_user_start",
+            "ix_booking_pending_start",
+            "ix_booking_table_series_id",
+        } <= {index["name"] for index in schema.get_indexes("booking_table")}
+        assert any(
+            index["name"].endswith("_nocase")
+            for index in schema.get_indexes("user_table")
+        )
+
+    def test_rebuilds_room_role_table(self, baseline_engine):
+        """Test room_number becomes a String and the rows survive the rebuild"""
+        run_migrations(baseline_engine)
+
+        with baseline_engine.connect() as connection:
+            rows = connection.exec_driver_sql(
+                "SELECT role, room_number, typeof(room_number) FROM room_role_table "
+                "ORDER BY room_number"
+            ).all()
+        assert rows == [("manager", "101", "text"), ("manager", "R2", "text")]
+        with create_session_factory(baseline_engine)() as db:
+            room = db.get(Room, "101")
+            assert room.allowed_role_names == ["manager"]
+
+    def test_room_search_indexes_existing_and_new_rooms(self, baseline_engine):
+        """Test the FTS table is filled on upgrade and kept in sync by triggers"""
+        run_migrations(baseline_engine)
+
+        def search(term):
+            with baseline_engine.connect() as connection:
+                return [
+                    room_number
+                    for (room_number,) in connection.exec_driver_sql(
+                        "SELECT room_number FROM room_search WHERE room_search "
+                        "MATCH ? ORDER BY room_number",
+                        (term,),
+                    )
+                ]
+
+        assert search("projector") == ["101"]
+        with baseline_engine.begin() as connection:
+            connection.exec_driver_sql(
+                "INSERT INTO room_table VALUES ('R3', 6, 'Room with projectors', 0)"
+            )
+            connection.exec_driver_sql(
+                "UPDATE room_table SET description = 'Board room' "
+                "WHERE room_number = '101'"
+            )
+            for table in ("room_role_table", "room_table"):
+                connection.exec_driver_sql(
+                    f"DELETE FROM {table} WHERE room_number = 'R2'"
+                )
+        assert search("projector") == ["R3"]
+        assert search("quiet") == []
+
+    def test_up_to_date_database_is_left_alone(self, baseline_engine):
+        """Test re-running migrations changes nothing"""
+        run_migrations(baseline_engine)
+        schema = inspect(baseline_engine)
+        tables = schema.get_table_names()
+
+        assert run_migrations(baseline_engine) == LATEST_VERSION
+        assert inspect(baseline_engine).get_table_names() == tables
+
+    def test_step_applied_by_another_worker_skipped(
+        self, baseline_engine, monkeypatch
+    ):
+        """Test a worker whose first read of the version is stale re-reads it
+        under the write lock and applies nothing twice"""
+        run_migrations(baseline_engine)
+        applied = []
+        monkeypatch.setattr(
+            migrations,
+            "MIGRATIONS",
+            [
+                (version, description, lambda _, v=version: applied.append(v))
+                for version, description, _ in migrations.MIGRATIONS
+            ],
+        )
+        reads = []
+        read = migrations.get_schema_version
+
+        def stale_first_read(connection):
+            reads.append(connection)
+            return 0 if len(reads) == 1 else read(connection)
+
+        monkeypatch.setattr(migrations, "get_schema_version", stale_first_read)
+
+        assert run_migrations(baseline_engine) == LATEST_VERSION
+        assert applied == []
+
+    def test_concurrent_workers(self, baseline_engine):
+        """Test workers migrating the same file at once all end up current"""
+        url = baseline_engine.url
+        workers = 4
+        barrier = Barrier(workers)
+
+        def worker(_):
+            engine = create_db_engine(url)
+            barrier.wait()
+            try:
+                return run_migrations(engine)
+            finally:
+                engine.dispose()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            versions = list(pool.map(worker, range(workers)))
+
+        assert versions == [LATEST_VERSION] * workers
+        with baseline_engine.connect() as connection:
+            rows = connection.execute(migrations.schema_version_table.select()).all()
+        assert rows == [(LATEST_VERSION,)]
@@ -0,0 +1,139 @@
+import sqlite3
+import time
+import pytest
+from sqlalchemy import event, text
+from app.db.database import create_db_engine
+from app.db.query_stats import RequestStats, current_request_stats
+from app.db.slow_queries import FULL_SCAN, SlowQueryLog, slow_query_log
+import app.config as Config
+
+ROW_SECONDS = 0.02
+ROWS = 10
+SLOW_SELECT = (
+    "WITH RECURSIVE n(i) AS "
+    f"(SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < {ROWS}) "
+    "SELECT slow(i) FROM n"
+)
+
+
+def slow(value):
+    time.sleep(ROW_SECONDS)
+    return value
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'stats.db'}")
+    event.listen(
+        engine,
+        "connect",
+        lambda connection, record: connection.create_function("slow", 1, slow),
+    )
+    # slower than producing the first row, faster than producing them all
+    monkeypatch.setattr(Config, "SLOW_QUERY_MS", ROW_SECONDS * 1000 * ROWS / 2)
+    # the dialect's first connect reads a setting with a row of its own
+    engine.connect().close()
+    slow_query_log.clear()
+    yield engine
+    slow_query_log.clear()
+    engine.dispose()
+
+
+@pytest.fixture
+def stats():
+    stats = RequestStats()
+    token = current_request_stats.set(stats)
+    yield stats
+    current_request_stats.reset(token)
+
+
+class TestQueryStats:
+    """Tests for the per-request SQL accounting hooks"""
+
+    @pytest.mark.parametrize(
+        "fetch",
+        [
+            lambda result: result.all(),
+            lambda result: list(result),
+            lambda result: [result.fetchmany(3) for _ in range(4)],
+        ],
+        ids=["all", "iterate", "fetchmany"],
+    )
+    def test_fetch_time_counted(self, engine, stats, fetch):
+        """Test a statement's time includes producing the rows it returns"""
+        with engine.connect() as connection:
+            fetch(connection.execute(text(SLOW_SELECT)))
+
+        ((statement, seconds),) = stats.queries
+        assert statement == SLOW_SELECT
+        assert seconds >= ROW_SECONDS * ROWS
+        assert stats.db_seconds == seconds
+        assert stats.rows == ROWS
+        (entry,) = slow_query_log.entries()
+        assert entry["statement"] == SLOW_SELECT
+        assert entry["duration_ms"] >= ROW_SECONDS * 1000 * ROWS
+
+    def test_recorded_when_closed_early(self, engine, stats):
+        """Test a statement whose rows are not all fetched is recorded on close"""
+        with engine.connect() as connection:
+            result = connection.execute(text(SLOW_SELECT))
+            assert result.fetchone() == (1,)
+            assert stats.queries == []
+            result.close()
+
+        assert len(stats.queries) == 1
+        assert stats.rows == 1
+        assert slow_query_log.entries() == []
+
+    def test_statements_without_rows(self, engine, stats):
+        """Test DDL and DML are recorded once they have run"""
+        with engine.begin() as connection:
+            connection.execute(text("CREATE TABLE t (id INTEGER)"))
+            connection.execute(text("INSERT INTO t VALUES (1)"))
+
+        assert [statement for statement, _ in stats.queries] == [
+            "CREATE TABLE t (id INTEGER)",
+            "INSERT INTO t VALUES (1)",
+        ]
+        assert stats.rows == 0
+
+
+class TestFullScan:
+    """Tests for flagging plans that scan a watched table"""
+
+    @pytest.mark.parametrize(
+        "detail, full_scan",
+        [
+            ("SCAN booking_table", True),
+            ("SCAN booking_table_1", True),
+            ("SCAN booking_table USING INDEX ix_booking_pending_start", False),
+            ("SCAN booking_table USING COVERING INDEX ix_booking_user_start", False),
+            ("SEARCH booking_table USING INDEX ix_booking_room_accepted_time", False),
+            ("SCAN booking_series_table", False),
+            ("SCAN room_table", False),
+        ],
+    )
+    def test_plan_details(self, detail, full_scan):
+        """Test only a bare SCAN of a watched table counts as a full scan"""
+        assert bool(FULL_SCAN.match(detail)) is full_scan
+
+    def test_real_plans(self):
+        """Test the plans sqlite gives for a partial index scan and a table scan"""
+        connection = sqlite3.connect(":memory:")
+        connection.execute(
+            "CREATE TABLE booking_table (id INTEGER PRIMARY KEY, start_time, accepted)"
+        )
+        connection.execute(
+            "CREATE INDEX ix_booking_pending_start ON booking_table (start_time) "
+            "WHERE accepted = 0"
+        )
+
+        def flagged(statement):
+            plan = SlowQueryLog.explain(connection, statement, ())
+            return any(FULL_SCAN.match(detail) for detail in plan)
+
+        assert not flagged(
+            "SELECT * FROM booking_table WHERE accepted = 0 ORDER BY start_time"
+        )
+        assert flagged("SELECT * FROM booking_table WHERE accepted = 1")
+        connection.close()
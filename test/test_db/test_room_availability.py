@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+import pytest
+from app.auth.role_bits import role_registry
+from app.db.models import Booking, Role, Room, User
+from app.repositories.room_repository import RoomRepository
+from app.services.availability_index import availability_index
+
+NINE = datetime(2030, 1, 7, 9)
+HOUR = timedelta(hours=1)
+
+
+@pytest.fixture
+def db(db_sessions):
+    with db_sessions() as db:
+        employee, manager = Role(role="employee"), Role(role="manager")
+        user = User(
+            id=1,
+            name="Test User",
+            username="testuser",
+            hashed_password="x",
+            roles=[employee],
+        )
+        rooms = {
+            room_number: Room(
+                room_number=room_number,
+                capacity=capacity,
+                description=description,
+                request_only=False,
+                allowed_roles=roles,
+            )
+            for room_number, capacity, description, roles in [
+                ("R1", 4, "Huddle room", [manager]),
+                ("R2", 8, "Projector room", []),
+                ("R3", 2, "Phone booth", [employee]),
+                ("R4", 10, "Boardroom with a projector", [employee, manager]),
+                ("R5", 6, "Training room", []),
+            ]
+        }
+        for room_number, start, end, accepted in [
+            ("R1", NINE, NINE + HOUR, True),
+            # pending bookings do not take the room
+            ("R2", NINE, NINE + HOUR, False),
+            # touching the window is not a conflict
+            ("R4", NINE - HOUR, NINE, True),
+            ("R5", NINE + HOUR / 2, NINE + 2 * HOUR, True),
+        ]:
+            db.add(
+                Booking(
+                    user=user,
+                    room=rooms[room_number],
+                    start_time=start,
+                    end_time=end,
+                    accepted=accepted,
+                    datetime_made=NINE - HOUR,
+                )
+            )
+        db.add_all([user, *rooms.values()])
+        db.commit()
+        yield db
+
+
+def availability(db, q: str = None) -> list:
+    rows = RoomRepository(db).get_rooms_with_availability(
+        3, NINE, NINE + HOUR, 1, role_registry.mask(["employee"]), q
+    )
+    return [
+        (room.room_number, room.allowed_role_names, available, sufficient_roles)
+        for room, available, sufficient_roles in rows
+    ]
+
+
+class TestRoomsWithAvailability:
+    """Tests for listing rooms with availability and roles from SQL"""
+
+    def test_cold_sql_path(self, db):
+        """Test the single statement used while the index is cold"""
+        assert not availability_index.is_warm
+        assert availability(db) == [
+            ("R2", (), True, True),
+            ("R4", ("employee", "manager"), True, True),
+            ("R1", ("manager",), False, False),
+            ("R5", (), False, True),
+        ]
+        assert not availability_index.is_warm
+
+    def test_cold_sql_path_search(self, db):
+        """Test searching on the cold path keeps rank order within each group"""
+        assert availability(db, "projector") == [
+            ("R2", (), True, True),
+            ("R4", ("employee", "manager"), True, True),
+        ]
+        assert availability(db, "room") == [
+            ("R2", (), True, True),
+            ("R1", ("manager",), False, False),
+            ("R5", (), False, True),
+        ]
+
+    def test_warm_index_agrees(self, db):
+        """Test the catalog and index answer the same as the cold SQL path"""
+        cold = availability(db), availability(db, "room")
+        RoomRepository(db).load_availability_index()
+
+        assert availability_index.is_warm
+        assert (availability(db), availability(db, "room")) == cold
@@ -0,0 +1,80 @@
+import pytest
+from app.db.models import Room
+from app.repositories.room_repository import RoomRepository
+from app.schemas.room import RoomPage
+from app.services.room_catalog import room_catalog
+
+
+def search(db, q: str, limit: int = 10) -> list:
+    """Room numbers of every page of the search for q, page by page"""
+    repository = RoomRepository(db)
+    pages, cursor = [], None
+    while True:
+        page = repository.get_all_rooms(RoomPage(q=q, limit=limit, cursor=cursor))
+        pages.append([room.room_number for room in page.items])
+        cursor = page.next_cursor
+        if not cursor:
+            return pages
+
+
+@pytest.fixture
+def db(db_sessions):
+    with db_sessions() as db:
+        repository = RoomRepository(db)
+        for room_number, description in [
+            ("R1", "Quiet room with a projector"),
+            ("R2", "Projector room"),
+            ("R3", "Projector"),
+            ("R4", "Projector"),
+            ("R5", "Kitchen"),
+        ]:
+            repository.create_room_in_db(
+                Room(room_number=room_number, capacity=4, description=description)
+            )
+        yield db
+
+
+class TestSearchRooms:
+    """Tests for the room_search full-text index against a real database"""
+
+    def test_pages_in_rank_order(self, db):
+        """Test paging through tied ranks gives every match once, in rank order"""
+        (everything,) = search(db, "projector")
+        assert sorted(everything) == ["R1", "R2", "R3", "R4"]
+        # shorter descriptions rank better, ties go by room number
+        assert everything[:2] == ["R3", "R4"]
+        for limit in (1, 2, 3):
+            pages = search(db, "projector", limit)
+            assert sum(pages, []) == everything
+            assert all(len(page) == limit for page in pages[:-1])
+
+    def test_cursor_bounded_in_sql(self, db):
+        """Test a page after a cursor only fetches the matches past it"""
+        repository = RoomRepository(db)
+        (first, rank), second = repository.search_rooms("projector")[:2]
+
+        assert repository.search_rooms("projector", (rank, first), 1) == [second]
+
+    def test_insert_update_delete(self, db):
+        """Test rooms added, edited and removed are found or dropped by search"""
+        repository = RoomRepository(db)
+        repository.create_room_in_db(
+            Room(room_number="R6", capacity=4, description="Whiteboard")
+        )
+        assert search(db, "whiteboard") == [["R6"]]
+
+        room = repository.get_room("R5")
+        room.description = "Kitchen with a whiteboard"
+        db.commit()
+        room_catalog.bump()
+        assert sorted(sum(search(db, "whiteboard"), [])) == ["R5", "R6"]
+        assert search(db, "kitchen") == [["R5"]]
+
+        room.description = "Break room"
+        db.commit()
+        room_catalog.bump()
+        assert search(db, "kitchen") == [[]]
+
+        repository.delete_room_in_db(repository.get_room("R6"))
+        assert search(db, "whiteboard") == [[]]
+        assert search(db, "R6") == [[]]
@@ -1,7 +1,14 @@
 import pytest
 from datetime import datetime, timezone, timedelta
 from pydantic import ValidationError
-from app.schemas.booking import BookingCreate, BookingRequestResponse
+from app.schemas.booking import (
+    BookingBatch,
+    BookingCreate,
+    BookingExport,
+    BookingRequestResponse,
+    BookingSeriesCreate,
+    ResolveRequests,
+)
 
 
 class TestBookingCreate:
@@ -121,3 +128,139 @@ class TestBookingRequestResponse:
 
         with pytest.raises(ValidationError):
             BookingRequestResponse(**booking_data)
+
+
+class TestBookingBatch:
+    """Test the BookingBatch schema"""
+
+    def test_defaults(self):
+        """Test that batches default to all-or-nothing bookings"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        batch = BookingBatch(
+            bookings=[
+                BookingCreate(
+                    start_datetime=future_time,
+                    end_datetime=future_time + timedelta(hours=1),
+                    room_number="A101",
+                )
+            ]
+        )
+
+        assert batch.mode == "all_or_nothing"
+        assert batch.is_request is False
+
+    def test_invalid_mode(self):
+        """Test that unknown modes raise ValidationError"""
+        with pytest.raises(ValidationError):
+            BookingBatch(bookings=[], mode="sometimes")
+
+    def test_empty_batch(self):
+        """Test that a batch needs at least one booking"""
+        with pytest.raises(ValidationError):
+            BookingBatch(bookings=[])
+
+
+class TestBookingSeriesCreate:
+    """Test the BookingSeriesCreate schema"""
+
+    def test_valid_series_with_until(self):
+        """Test a series ending on a date"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        series = BookingSeriesCreate(
+            start_datetime=future_time,
+            end_datetime=future_time + timedelta(hours=1),
+            room_number="A101",
+            frequency="monthly",
+            until=future_time + timedelta(days=365),
+        )
+
+        assert series.interval == 1
+        assert series.count is None
+
+    def test_count_and_until(self):
+        """Test that count and until cannot both be provided"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        with pytest.raises(ValidationError) as exc_info:
+            BookingSeriesCreate(
+                start_datetime=future_time,
+                end_datetime=future_time + timedelta(hours=1),
+                room_number="A101",
+                frequency="daily",
+                count=5,
+                until=future_time + timedelta(days=5),
+            )
+
+        assert "Exactly one of count or until must be provided" in str(exc_info.value)
+
+    def test_until_before_start(self):
+        """Test that until must not be before the first occurrence"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        with pytest.raises(ValidationError) as exc_info:
+            BookingSeriesCreate(
+                start_datetime=future_time,
+                end_datetime=future_time + timedelta(hours=1),
+                room_number="A101",
+                frequency="daily",
+                until=future_time - timedelta(days=1),
+            )
+
+        assert "Until must be after the first occurrence" in str(exc_info.value)
+
+    def test_invalid_frequency(self):
+        """Test that unsupported frequencies raise ValidationError"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        with pytest.raises(ValidationError):
+            BookingSeriesCreate(
+                start_datetime=future_time,
+                end_datetime=future_time + timedelta(hours=1),
+                room_number="A101",
+                frequency="hourly",
+                count=3,
+            )
+
+
+class TestResolveRequests:
+    """Test the ResolveRequests schema"""
+
+    def test_defaults(self):
+        """Test that requests are weighed equally by default"""
+        options = ResolveRequests()
+
+        assert options.weight_by == "count"
+        assert options.role_weights == {}
+        assert options.dry_run is False
+
+    def test_negative_role_weight(self):
+        """Test that role weights cannot be negative"""
+        with pytest.raises(ValidationError):
+            ResolveRequests(role_weights={"manager": -1})
+
+
+class TestBookingExport:
+    """Test the BookingExport schema"""
+
+    def test_past_range_allowed(self):
+        """Test that exports can cover past bookings"""
+        now = datetime.now(timezone.utc)
+
+        export = BookingExport(
+            start_datetime=now - timedelta(days=365), end_datetime=now
+        )
+
+        assert export.format == "ndjson"
+        assert export.status == "all"
+
+    def test_invalid_format(self):
+        """Test that unsupported formats raise ValidationError"""
+        with pytest.raises(ValidationError):
+            BookingExport(format="xlsx")
@@ -0,0 +1,21 @@
+import pytest
+from pydantic import ValidationError
+from app.schemas.pagination import PageParams
+import app.config as Config
+
+
+class TestPageParams:
+    """Test the PageParams schema"""
+
+    def test_defaults(self):
+        """Test that the first page uses the configured page size"""
+        page = PageParams()
+
+        assert page.cursor is None
+        assert page.limit == Config.DEFAULT_PAGE_SIZE
+
+    @pytest.mark.parametrize("limit", [0, Config.MAX_PAGE_SIZE + 1])
+    def test_limit_out_of_range(self, limit):
+        """Test that page sizes must be between 1 and the maximum"""
+        with pytest.raises(ValidationError):
+            PageParams(limit=limit)
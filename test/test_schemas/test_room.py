@@ -1,7 +1,13 @@
 import pytest
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 from pydantic import ValidationError
-from app.schemas.room import GetRooms, RoomCreate
+from app.schemas.room import (
+    AvailabilityGrid,
+    FreeSlots,
+    GetRooms,
+    RoomCreate,
+    RoomPage,
+)
 
 
 class TestGetRooms:
@@ -43,6 +49,36 @@ class TestGetRooms:
 
         assert get_rooms.min_capacity == -1
 
+    def test_search_text(self):
+        """Test that q is optional and must contain a word"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+        end_time = future_time + timedelta(hours=1)
+
+        assert GetRooms(start_datetime=future_time, end_datetime=end_time).q is None
+        get_rooms = GetRooms(
+            start_datetime=future_time, end_datetime=end_time, q="projector"
+        )
+        assert get_rooms.q == "projector"
+
+        with pytest.raises(ValidationError):
+            GetRooms(start_datetime=future_time, end_datetime=end_time, q='" * (')
+
+
+class TestRoomPage:
+    """Test the RoomPage schema"""
+
+    def test_defaults(self):
+        """Test that searching is optional on the room list"""
+        page = RoomPage()
+        assert page.q is None
+        assert page.cursor is None
+
+    def test_search_without_words(self):
+        """Test that search text without any words is rejected"""
+        with pytest.raises(ValidationError):
+            RoomPage(q="   ")
+
 
 class TestRoomCreate:
     """Test the RoomCreate schema"""
@@ -108,3 +144,67 @@ class TestRoomCreate:
 
         with pytest.raises(ValidationError):
             RoomCreate(room_number="A101", description="Test")
+
+
+class TestAvailabilityGrid:
+    """Test the AvailabilityGrid schema"""
+
+    def test_defaults(self):
+        """Test that days defaults to a single day and capacity to 0"""
+        grid = AvailabilityGrid(date=date(2026, 1, 1))
+
+        assert grid.days == 1
+        assert grid.min_capacity == 0
+
+    @pytest.mark.parametrize("days", [0, 8])
+    def test_days_out_of_range(self, days):
+        """Test that grids must cover between one day and a week"""
+        with pytest.raises(ValidationError):
+            AvailabilityGrid(date=date(2026, 1, 1), days=days)
+
+
+class TestFreeSlots:
+    """Test the FreeSlots schema"""
+
+    def test_valid_free_slots(self):
+        """Test valid FreeSlots creation with defaults"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        free_slots = FreeSlots(
+            start_datetime=future_time,
+            end_datetime=future_time + timedelta(days=1),
+            duration_minutes=45,
+        )
+
+        assert free_slots.limit == 3
+        assert free_slots.room_numbers is None
+        assert free_slots.include_request_only is False
+
+    def test_horizon_shorter_than_duration(self):
+        """Test that the horizon must fit at least one slot"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        with pytest.raises(ValidationError) as exc_info:
+            FreeSlots(
+                start_datetime=future_time,
+                end_datetime=future_time + timedelta(hours=1),
+                duration_minutes=90,
+            )
+
+        assert "Search horizon must be at least the duration" in str(exc_info.value)
+
+    def test_horizon_too_long(self):
+        """Test that the horizon is capped"""
+        future_time = datetime.now(timezone.utc) + timedelta(hours=1)
+        future_time = future_time.replace(minute=0, second=0, microsecond=0)
+
+        with pytest.raises(ValidationError) as exc_info:
+            FreeSlots(
+                start_datetime=future_time,
+                end_datetime=future_time + timedelta(days=32),
+                duration_minutes=60,
+            )
+
+        assert "Search horizon must be at most 31 days" in str(exc_info.value)
@@ -1,6 +1,13 @@
 import pytest
 from pydantic import ValidationError
-from app.schemas.user import UserCreate, UserOut, PutRoles
+from app.schemas.user import (
+    BulkRoles,
+    PutRoles,
+    UserCreate,
+    UserImport,
+    UserOut,
+    UserPage,
+)
 
 
 class TestUserCreate:
@@ -115,3 +122,53 @@ class TestPutRoles:
         """Test that empty username raises ValidationError"""
         with pytest.raises(ValidationError):
             PutRoles(username="", roles=["admin"])
+
+
+class TestUserPage:
+    """Test the UserPage schema"""
+
+    def test_defaults(self):
+        """Test that filters are optional"""
+        page = UserPage()
+
+        assert page.role is None
+        assert page.prefix is None
+        assert page.cursor is None
+
+    def test_filters(self):
+        """Test role and prefix filters alongside pagination"""
+        page = UserPage(role="manager", prefix="jo", limit=10)
+
+        assert page.role == "manager"
+        assert page.prefix == "jo"
+        assert page.limit == 10
+
+    def test_empty_prefix(self):
+        """Test that an empty prefix is rejected"""
+        with pytest.raises(ValidationError):
+            UserPage(prefix="")
+
+
+class TestUserImport:
+    """Test the UserImport schema"""
+
+    def test_roles_default_to_empty(self):
+        """Test that roles are optional"""
+        user = UserImport(username="new", password="pw", name="New User")
+
+        assert user.roles == []
+
+
+class TestBulkRoles:
+    """Test the BulkRoles schema"""
+
+    def test_adds_by_default(self):
+        """Test that roles are added unless replace is set"""
+        bulk = BulkRoles(usernames=["a", "b"], roles=["manager"])
+
+        assert bulk.replace is False
+
+    def test_empty_usernames(self):
+        """Test that at least one username is required"""
+        with pytest.raises(ValidationError):
+            BulkRoles(usernames=[], roles=["manager"])
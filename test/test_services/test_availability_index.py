@@ -0,0 +1,233 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from app.db.models import Booking, BookingChange, Room, User
+from app.repositories.room_repository import RoomRepository
+from app.services.availability_index import AvailabilityIndex, availability_index
+
+NINE = datetime(2030, 1, 7, 9)
+
+
+def hours(start: int, end: int):
+    return NINE + timedelta(hours=start), NINE + timedelta(hours=end)
+
+
+@pytest.fixture
+def index():
+    index = AvailabilityIndex()
+    index.load(
+        [
+            (1, "R1", *hours(0, 1)),
+            (2, "R1", *hours(2, 4)),
+            (3, "R2", *hours(1, 2)),
+        ]
+    )
+    return index
+
+
+class TestAvailabilityIndex:
+    """Tests for the in-memory index of accepted bookings"""
+
+    def test_overlaps(self, index):
+        """Test half-open intervals: touching bookings do not conflict"""
+        assert not index.room_is_available("R1", *hours(0, 1))
+        assert index.room_is_available("R1", *hours(1, 2))
+        assert not index.room_is_available("R1", *hours(3, 5))
+        assert index.room_is_available("R3", *hours(0, 9))
+        assert index.conflicting_room_numbers(*hours(0, 2)) == {"R1", "R2"}
+        assert index.conflicting_room_numbers(*hours(1, 2)) == {"R2"}
+
+    def test_excludes_booking_being_updated(self, index):
+        """Test a booking never conflicts with itself"""
+        assert index.room_is_available("R1", *hours(2, 3), booking_id=2)
+        assert not index.room_is_available("R1", *hours(0, 3), booking_id=2)
+
+    def test_add_and_remove(self, index):
+        """Test adds, moves and removals, including aware datetimes"""
+        index.add(4, "R3", *hours(5, 6))
+        assert not index.room_is_available("R3", *hours(5, 6))
+
+        # re-adding a booking moves it rather than duplicating it
+        index.add(4, "R3", *hours(7, 8))
+        assert index.room_is_available("R3", *hours(5, 6))
+        assert not index.room_is_available("R3", *hours(7, 8))
+
+        index.remove(4)
+        assert index.room_is_available("R3", *hours(7, 8))
+        index.remove(4)
+
+        start, end = hours(5, 6)
+        index.add(5, "R3", start.replace(tzinfo=timezone.utc), end)
+        assert not index.room_is_available("R3", start, end)
+
+    def test_long_booking_found_behind_short_ones(self, index):
+        """Test a long booking starting early still conflicts later in the day"""
+        index.add(4, "R4", *hours(0, 10))
+        index.add(5, "R4", *hours(1, 2))
+        assert not index.room_is_available("R4", *hours(8, 9))
+
+    def test_removing_longest_booking_shrinks_scan(self, index):
+        """Test the overlap scan window shrinks back once a long booking goes"""
+        index.add(4, "R4", *hours(0, 10))
+        index.add(5, "R4", *hours(1, 2))
+        index.remove(4)
+
+        assert index._rooms["R4"].max_length == timedelta(hours=1)
+        assert index.room_is_available("R4", *hours(8, 9))
+        assert not index.room_is_available("R4", *hours(1, 2))
+
+    def test_apply_changes(self, index):
+        """Test logged changes are applied in order and old ones skipped"""
+        index.load([(1, "R1", *hours(0, 1))], last_change=2)
+
+        assert index.apply_changes(
+            [
+                (2, 1, None, None, None, False),
+                (3, 2, "R2", *hours(0, 1), True),
+                (4, 1, None, None, None, False),
+                (5, 3, "R2", *hours(2, 3), False),
+            ]
+        )
+
+        assert index.last_change == 5
+        assert index.room_is_available("R1", *hours(0, 1))
+        assert not index.room_is_available("R2", *hours(0, 1))
+        assert index.room_is_available("R2", *hours(2, 3))
+
+    def test_apply_changes_after_gap_goes_cold(self, index):
+        """Test a log pruned past the index leaves it cold for reloading"""
+        assert not index.apply_changes([(2, 4, "R3", *hours(0, 1), True)])
+        assert not index.is_warm
+
+    def test_remove_room(self, index):
+        """Test dropping every booking of a room"""
+        index.remove_room("R1")
+        assert index.room_is_available("R1", *hours(0, 9))
+        index.add(1, "R2", *hours(5, 6))
+        assert not index.room_is_available("R2", *hours(5, 6))
+
+    def test_cold_index_ignores_writes(self):
+        """Test writes before begin_load are dropped, the load supersedes them"""
+        index = AvailabilityIndex()
+        index.add(1, "R1", *hours(0, 1))
+        assert not index.is_warm
+
+        index.load([])
+        assert index.is_warm
+        assert index.room_is_available("R1", *hours(0, 1))
+
+    def test_load_replays_pending_writes(self):
+        """Test writes committed while the snapshot is read are not lost"""
+        index = AvailabilityIndex()
+        index.begin_load()
+        # made after the snapshot was taken, so missing from the rows loaded
+        index.add(3, "R2", *hours(0, 1))
+        # made before and so also in the rows loaded
+        index.add(1, "R1", *hours(0, 1))
+        index.remove(2)
+        assert not index.is_warm
+
+        index.load([(1, "R1", *hours(0, 1)), (2, "R1", *hours(2, 3))])
+
+        assert index.is_warm
+        assert not index.room_is_available("R2", *hours(0, 1))
+        assert not index.room_is_available("R1", *hours(0, 1))
+        assert index.room_is_available("R1", *hours(2, 3))
+
+    def test_invalidate(self, index):
+        """Test an invalidated index is cold and empty"""
+        index.invalidate()
+        assert not index.is_warm
+        assert index.room_is_available("R1", *hours(0, 1))
+
+
+class TestRoomRepositoryAvailability:
+    """Tests for answering availability from SQL or the index"""
+
+    @pytest.fixture
+    def db(self, db_sessions):
+        with db_sessions() as db:
+            user = User(name="Test User", username="testuser", hashed_password="x")
+            room = Room(
+                room_number="R1",
+                capacity=4,
+                description="Huddle room",
+                request_only=False,
+            )
+            db.add_all([room, user])
+            for booking_id, accepted in ((1, True), (2, False)):
+                start, end = hours(booking_id, booking_id + 1)
+                db.add(
+                    Booking(
+                        id=booking_id,
+                        user=user,
+                        room_number="R1",
+                        start_time=start,
+                        end_time=end,
+                        accepted=accepted,
+                        datetime_made=NINE,
+                    )
+                )
+            db.commit()
+            yield db
+        availability_index.invalidate()
+
+    def test_cold_index_falls_back_to_sql(self, db):
+        """Test accepted bookings conflict and pending ones do not"""
+        repo = RoomRepository(db)
+        assert not availability_index.is_warm
+
+        assert not repo.room_is_available("R1", *hours(1, 2))
+        assert repo.room_is_available("R1", *hours(1, 2), booking_id=1)
+        assert repo.room_is_available("R1", *hours(2, 3))
+        assert repo.get_conflicting_room_numbers(*hours(0, 2)) == {"R1"}
+        assert repo.get_conflicting_room_numbers(*hours(2, 3)) == set()
+
+    def test_warm_index_answers(self, db):
+        """Test the loaded index agrees with SQL and is used once warm"""
+        repo = RoomRepository(db)
+        availability_index.load(repo.get_accepted_intervals())
+
+        assert not repo.room_is_available("R1", *hours(1, 2))
+        assert repo.room_is_available("R1", *hours(2, 3))
+        # only in the index, so this proves SQL was not asked
+        availability_index.add(9, "R1", *hours(2, 3))
+        assert not repo.room_is_available("R1", *hours(2, 3))
+        assert repo.get_conflicting_room_numbers(*hours(2, 3)) == {"R1"}
+
+    def test_writes_from_other_processes_seen(self, db, db_sessions):
+        """Test bookings written without going through this process's index,
+        as another worker or the CLI would, are picked up before answering"""
+        repo = RoomRepository(db)
+        repo.load_availability_index()
+        assert repo.room_is_available("R1", *hours(2, 3))
+
+        with db_sessions() as other:
+            other.execute(
+                text("UPDATE booking_table SET accepted = 1 WHERE id = 2")
+            )
+            other.execute(text("DELETE FROM booking_table WHERE id = 1"))
+            other.commit()
+
+        assert not repo.room_is_available("R1", *hours(2, 3))
+        assert repo.room_is_available("R1", *hours(1, 2))
+        assert repo.get_conflicting_room_numbers(*hours(0, 9)) == {"R1"}
+
+    def test_reloads_when_log_pruned(self, db, db_sessions):
+        """Test an index the log no longer reaches back to is reloaded"""
+        repo = RoomRepository(db)
+        repo.load_availability_index()
+
+        with db_sessions() as other:
+            other.execute(
+                text("UPDATE booking_table SET accepted = 1 WHERE id = 2")
+            )
+            other.query(BookingChange).delete()
+            other.execute(
+                text("UPDATE booking_table SET accepted = 0 WHERE id = 1")
+            )
+            other.commit()
+
+        assert repo.room_is_available("R1", *hours(1, 2))
+        assert availability_index.is_warm
+        assert not repo.room_is_available("R1", *hours(2, 3))
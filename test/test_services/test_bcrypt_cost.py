@@ -0,0 +1,58 @@
+from passlib.context import CryptContext
+from app.services import bcrypt_cost
+from app.services.bcrypt_cost import apply_rounds, calibrate_rounds
+
+
+def fake_time_hash(monkeypatch, timings):
+    """Replace time_hash with one answering from `timings`, a list per cost"""
+    calls = []
+
+    def time_hash(rounds):
+        calls.append(rounds)
+        return timings[rounds].pop(0)
+
+    monkeypatch.setattr(bcrypt_cost, "time_hash", time_hash)
+    return calls
+
+
+class TestCalibrateRounds:
+    """Tests for picking the bcrypt cost"""
+
+    def test_best_sample_counts(self, monkeypatch):
+        """Test one slow sample does not push the cost down"""
+        calls = fake_time_hash(
+            monkeypatch, {4: [0.01], 5: [0.3, 0.02], 6: [0.3, 0.3, 0.3]}
+        )
+
+        assert calibrate_rounds(0.25, 4, 8) == 5
+        # sampling stops at the first hash within budget
+        assert calls == [4, 5, 5, 6, 6, 6]
+
+    def test_never_below_min_rounds(self, monkeypatch):
+        """Test the floor holds on hardware too slow for it"""
+        fake_time_hash(monkeypatch, {10: [1.0, 1.0, 1.0]})
+
+        assert calibrate_rounds(0.25, 10, 16) == 10
+
+    def test_stops_at_max_rounds(self, monkeypatch):
+        """Test the search never goes past max_rounds"""
+        calls = fake_time_hash(monkeypatch, {4: [0.01], 5: [0.01]})
+
+        assert calibrate_rounds(0.25, 4, 5) == 5
+        assert calls == [4, 5]
+
+
+class TestApplyRounds:
+    """Tests for applying the bcrypt cost to a CryptContext"""
+
+    def test_only_lower_costs_need_update(self):
+        """Test hashes below the cost are rehashed and those above are kept"""
+        context = CryptContext(schemes=["bcrypt"])
+        apply_rounds(context, 5)
+
+        cheaper = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4)
+        costlier = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=6)
+
+        assert context.hash("password").startswith("$2b$05$")
+        assert context.needs_update(cheaper.hash("password"))
+        assert not context.needs_update(costlier.hash("password"))
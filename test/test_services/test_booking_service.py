@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from app.auth.principal_cache import Principal
+from app.db.models import Booking, Room, User
+from app.repositories.booking_repository import BookingRepository
+from app.repositories.room_repository import RoomRepository
+from app.schemas.booking import BookingSeriesCreate
+from app.services.booking_service import BookingService
+
+START = datetime(2030, 1, 7, 9)
+
+
+@pytest.fixture
+def db(db_sessions):
+    with db_sessions() as db:
+        db.add_all(
+            [
+                Room(
+                    room_number="A101",
+                    capacity=10,
+                    description="Conference room",
+                    request_only=False,
+                ),
+                User(id=1, name="Test User", username="testuser", hashed_password="x"),
+            ]
+        )
+        db.commit()
+        yield db
+
+
+@pytest.fixture
+def booking_service(db):
+    return BookingService(BookingRepository(db), RoomRepository(db))
+
+
+@pytest.fixture
+def principal():
+    return Principal(id=1, name="Test User", username="testuser", role_names=())
+
+
+def series(duration: timedelta, **recurrence) -> BookingSeriesCreate:
+    return BookingSeriesCreate(
+        room_number="A101",
+        start_datetime=START,
+        end_datetime=START + duration,
+        **recurrence,
+    )
+
+
+class TestCreateSeries:
+    """Tests for creating recurring bookings against a real database"""
+
+    def test_occurrences_longer_than_their_gap_rejected(
+        self, db, booking_service, principal
+    ):
+        """Test a daily series of 72h bookings, which overlap each other, is refused"""
+        with pytest.raises(HTTPException) as e:
+            booking_service.create_series(
+                series(timedelta(hours=72), frequency="daily", count=3), principal
+            )
+
+        assert e.value.status_code == 400
+        assert "overlap each other" in e.value.detail
+        assert db.query(Booking).count() == 0
+
+    def test_back_to_back_occurrences_allowed(self, db, booking_service, principal):
+        """Test 24h daily occurrences, which only touch, are all created"""
+        result = booking_service.create_series(
+            series(timedelta(hours=24), frequency="daily", count=3), principal
+        )
+
+        assert result["created"] == 3
+        assert db.query(Booking).count() == 3
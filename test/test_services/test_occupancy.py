@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from app.services.occupancy import (
+    SLOT,
+    build_occupancy,
+    slot_count,
+    summarise_occupancy,
+    to_bitstring,
+)
+
+NINE = datetime(2030, 1, 7, 9)
+# 09:00 to 11:00
+SLOTS = 8
+
+
+def at(minutes: int) -> datetime:
+    return NINE + timedelta(minutes=minutes)
+
+
+def occupancy(room_numbers, *bookings) -> list:
+    """Each room's busy slots as a bitstring"""
+    intervals = [
+        (booking_id, room_number, start, end)
+        for booking_id, (room_number, start, end) in enumerate(bookings)
+    ]
+    busy = build_occupancy(room_numbers, intervals, NINE, SLOTS)
+    return [to_bitstring(row) for row in busy]
+
+
+class TestBuildOccupancy:
+    """Tests for the rooms x slots busy matrix"""
+
+    def test_slot_count(self):
+        """Test slots are counted in whole 15 minute steps"""
+        assert slot_count(NINE, at(120)) == SLOTS
+        assert slot_count(NINE, at(20)) == 1
+
+    def test_bookings_fill_their_slots(self):
+        """Test bookings on the grid mark exactly the slots they cover"""
+        assert occupancy(
+            ["R1", "R2"],
+            ("R1", at(0), at(30)),
+            ("R1", at(60), at(75)),
+            ("R2", at(105), at(120)),
+        ) == ["11001000", "00000001"]
+
+    def test_empty_room(self):
+        """Test a room without bookings, and no rooms at all"""
+        assert occupancy(["R1"]) == ["00000000"]
+        assert build_occupancy([], [], NINE, SLOTS).shape == (0, SLOTS)
+
+    def test_overlapping_and_touching_bookings(self):
+        """Test overlaps stay busy once and touching bookings leave no gap"""
+        assert occupancy(
+            ["R1"],
+            ("R1", at(0), at(45)),
+            ("R1", at(15), at(30)),
+            ("R1", at(45), at(60)),
+        ) == ["11110000"]
+
+    def test_bookings_crossing_slot_edges(self):
+        """Test bookings off the grid mark every slot they touch"""
+        assert occupancy(["R1"], ("R1", at(10), at(20))) == ["11000000"]
+        assert occupancy(["R1"], ("R1", at(50), at(61))) == ["00011000"]
+
+    def test_bookings_crossing_window_edges_clipped(self):
+        """Test bookings starting before or ending after the window are clipped"""
+        assert occupancy(["R1"], ("R1", at(-60), at(30))) == ["11000000"]
+        assert occupancy(["R1"], ("R1", at(90), at(600))) == ["00000011"]
+        assert occupancy(["R1"], ("R1", at(-60), at(0))) == ["00000000"]
+        assert occupancy(["R1"], ("R1", at(120), at(180))) == ["00000000"]
+
+    def test_unknown_rooms_ignored(self):
+        """Test bookings for rooms not asked about are skipped"""
+        assert occupancy(["R1"], ("R9", at(0), at(120))) == ["00000000"]
+
+    def test_aware_times(self):
+        """Test aware booking times are compared as naive, like stored ones"""
+        start = at(0).replace(tzinfo=timezone.utc)
+        assert occupancy(["R1"], ("R1", start, start + SLOT)) == ["10000000"]
+
+
+class TestSummariseOccupancy:
+    """Tests for aggregating the busy matrix across rooms"""
+
+    def test_summary(self):
+        """Test free counts and the any and all free bitstrings"""
+        busy = build_occupancy(
+            ["R1", "R2"],
+            [(1, "R1", at(0), at(60)), (2, "R2", at(30), at(90))],
+            NINE,
+            SLOTS,
+        )
+        assert summarise_occupancy(busy) == {
+            "free_rooms_per_slot": [1, 1, 0, 0, 1, 1, 2, 2],
+            "any_free": "11001111",
+            "all_free": "00000011",
+        }
+
+    def test_no_rooms(self):
+        """Test no rooms means no slot has a free room"""
+        summary = summarise_occupancy(np.zeros((0, SLOTS), dtype=bool))
+        assert summary["free_rooms_per_slot"] == [0] * SLOTS
+        assert summary["any_free"] == "0" * SLOTS
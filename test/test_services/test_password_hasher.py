@@ -0,0 +1,89 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+import time
+from fastapi import HTTPException
+import pytest
+from app.services.password_hasher import PasswordHasher
+
+
+class GatedContext:
+    """Stands in for the CryptContext, bulk hashes block until released"""
+
+    def __init__(self):
+        self.release = Event()
+
+    def hash(self, password: str) -> str:
+        if password.startswith("bulk"):
+            self.release.wait(5)
+        return f"hashed-{password}"
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return hashed_password == f"hashed-{password}"
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+class TestPasswordHasher:
+    """Tests for the bcrypt worker pools"""
+
+    def test_bulk_batch_does_not_hold_interactive_workers(self):
+        """Test logins are served while an import is still hashing"""
+        context = GatedContext()
+        hasher = PasswordHasher(workers=1, queue_depth=0, context=context)
+
+        with ThreadPoolExecutor(max_workers=1) as caller:
+            batch = caller.submit(hasher.hash_many, ["bulk-1", "bulk-2", "bulk-3"])
+            wait_for(lambda: hasher.metrics()["bulk"]["running"] == 1)
+
+            assert hasher.verify("login", "hashed-login")
+            bulk = hasher.metrics()["bulk"]
+            assert (bulk["running"], bulk["queued"]) == (1, 2)
+
+            context.release.set()
+            assert batch.result(5) == [
+                "hashed-bulk-1",
+                "hashed-bulk-2",
+                "hashed-bulk-3",
+            ]
+
+        metrics = hasher.metrics()
+        assert metrics["completed"] == 1
+        assert metrics["rejected"] == 0
+        assert metrics["bulk"] == {
+            "workers": 1,
+            "running": 0,
+            "queued": 0,
+            "completed": 3,
+        }
+
+    def test_async_hash_shares_the_queue_limit(self):
+        """Test awaited hashes count against the same slots and give them back"""
+        context = GatedContext()
+        hasher = PasswordHasher(workers=1, queue_depth=0, context=context)
+
+        with ThreadPoolExecutor(max_workers=1) as caller:
+            # the gated hash holds the only slot until released
+            held = caller.submit(hasher.hash, "bulk-held")
+            wait_for(lambda: hasher.metrics()["running"] == 1)
+
+            with pytest.raises(HTTPException) as e:
+                asyncio.run(hasher.hash_async("login"))
+            assert e.value.status_code == 503
+
+            context.release.set()
+            assert held.result(5) == "hashed-bulk-held"
+
+        wait_for(lambda: hasher.metrics()["running"] == 0)
+        assert asyncio.run(hasher.hash_async("login")) == "hashed-login"
+        metrics = hasher.metrics()
+        assert (metrics["queued"], metrics["completed"], metrics["rejected"]) == (
+            0,
+            2,
+            1,
+        )
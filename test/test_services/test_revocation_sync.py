@@ -0,0 +1,87 @@
+import time
+import pytest
+from app.auth.revocation import RevocationStore
+from app.db.models import RevokedToken, UserRevocation
+from app.repositories.revocation_repository import RevocationRepository
+from app.services import revocation_sync
+from app.services.revocation_sync import RevocationSync
+import app.config as Config
+
+LIFETIME = Config.ACCESS_TOKEN_EXPIRE_SECONDS
+
+
+@pytest.fixture
+def sessions(db_sessions, monkeypatch):
+    monkeypatch.setattr(revocation_sync, "SessionLocal", db_sessions)
+    return db_sessions
+
+
+def worker() -> tuple:
+    """The revocation store and loader of another worker process"""
+    store = RevocationStore(capacity=100)
+    return store, RevocationSync(store, interval_seconds=5)
+
+
+class TestRevocationSync:
+    """Tests for sharing revocations between workers through the database"""
+
+    def test_loads_revocations_made_elsewhere(self, sessions):
+        """Test a worker started later rejects tokens revoked before it started"""
+        now = time.time()
+        with sessions() as db:
+            repo = RevocationRepository(db)
+            repo.revoke_token("logged-out", now + 600)
+            repo.revoke_users(["demoted"], now)
+
+        store, sync = worker()
+        sync.load()
+
+        assert store.is_revoked("logged-out", "someone", now)
+        assert not store.is_revoked("other", "someone", now)
+        assert store.is_revoked("any", "demoted", now - 1)
+        assert not store.is_revoked("any", "demoted", now + 1)
+
+    def test_later_loads_pick_up_new_revocations(self, sessions):
+        """Test revocations made after the first load reach a running worker"""
+        store, sync = worker()
+        sync.load()
+
+        with sessions() as db:
+            RevocationRepository(db).revoke_token("logged-out", time.time() + 600)
+        assert not store.is_revoked("logged-out", "someone", None)
+
+        sync.load()
+        assert store.is_revoked("logged-out", "someone", None)
+
+    def test_prunes_expired_revocations(self, sessions):
+        """Test expired tokens and cutoffs older than any valid token are deleted"""
+        now = time.time()
+        with sessions() as db:
+            repo = RevocationRepository(db)
+            repo.revoke_token("expired", now - 1)
+            repo.revoke_token("valid", now + 600)
+            repo.revoke_users(["old"], now - LIFETIME - 1)
+            repo.revoke_users(["recent"], now - 1)
+
+        store, sync = worker()
+        sync.load()
+
+        with sessions() as db:
+            assert [row.jti for row in db.query(RevokedToken)] == ["valid"]
+            assert [row.username for row in db.query(UserRevocation)] == ["recent"]
+        assert not store.is_revoked("expired", "someone", now)
+        assert not store.is_revoked("any", "old", now - LIFETIME - 2)
+
+    def test_cutoff_never_moves_back(self, sessions):
+        """Test an earlier cutoff recorded late does not undo a later one"""
+        now = time.time()
+        with sessions() as db:
+            repo = RevocationRepository(db)
+            repo.revoke_users(["demoted"], now)
+            repo.revoke_users(["demoted"], now - 60)
+            assert db.get(UserRevocation, "demoted").revoked_before == now
+
+        store, sync = worker()
+        store.revoke_user("demoted", now + 60)
+        sync.load()
+        assert store.is_revoked("any", "demoted", now + 30)
@@ -0,0 +1,118 @@
+import pytest
+from app.auth.role_bits import role_registry
+from app.db.models import Room
+from app.repositories.room_repository import RoomRepository
+from app.services.room_catalog import RoomCatalog, RoomRecord, room_catalog
+
+
+def record(room_number: str, capacity: int, *roles: str) -> RoomRecord:
+    return RoomRecord(room_number, capacity, "Meeting room", False, roles)
+
+
+ROOMS = [record("R1", 4), record("R2", 10, "manager"), record("R3", 6, "admin")]
+
+
+class CountingLoader:
+    """Room loader counting its calls, optionally bumping the catalog mid-load"""
+
+    def __init__(self, catalog: RoomCatalog = None):
+        self.calls = 0
+        self.catalog = catalog
+
+    def __call__(self):
+        self.calls += 1
+        if self.catalog is not None:
+            # a room write committing while the rooms are being read
+            self.catalog.bump()
+        return ROOMS
+
+
+class TestRoomCatalog:
+    """Tests for the generation counted room cache"""
+
+    def test_snapshot_reused_until_bumped(self):
+        """Test reads share a snapshot and a bump invalidates it"""
+        catalog = RoomCatalog(ttl_seconds=60)
+        load = CountingLoader()
+
+        first = catalog.get(load)
+        assert catalog.get(load) is first
+        assert load.calls == 1
+
+        catalog.bump()
+        second = catalog.get(load)
+        assert second is not first
+        assert second.generation == catalog.generation == 1
+        assert catalog.get(load) is second
+        assert load.calls == 2
+
+    def test_snapshot_loaded_during_write_not_kept(self):
+        """Test a snapshot older than the generation is served but not cached"""
+        catalog = RoomCatalog(ttl_seconds=60)
+
+        stale = catalog.get(CountingLoader(catalog))
+        assert stale.generation == 0
+        assert catalog.generation == 1
+
+        load = CountingLoader()
+        fresh = catalog.get(load)
+        assert fresh.generation == 1
+        assert catalog.get(load) is fresh
+        assert load.calls == 1
+
+    def test_snapshot_expires(self):
+        """Test snapshots are reloaded after the TTL for other workers' writes"""
+        catalog = RoomCatalog(ttl_seconds=0)
+        load = CountingLoader()
+
+        catalog.get(load)
+        catalog.get(load)
+        assert load.calls == 2
+
+
+class TestCatalogSnapshot:
+    """Tests for the room lookups a snapshot answers"""
+
+    @pytest.fixture
+    def snapshot(self):
+        return RoomCatalog(ttl_seconds=60).get(lambda: ROOMS)
+
+    def test_lookups(self, snapshot):
+        """Test lookup by number, by capacity and by page"""
+        assert snapshot.get("R2").capacity == 10
+        assert snapshot.get("R9") is None
+        assert [room.room_number for room in snapshot.with_capacity(5)] == ["R3", "R2"]
+        assert [room.room_number for room in snapshot.page(None, 2)] == ["R1", "R2"]
+        assert [room.room_number for room in snapshot.page("R2", 2)] == ["R3"]
+
+    def test_bookable_by(self, snapshot):
+        """Test open rooms are bookable by anyone and others need a role"""
+        assert snapshot.bookable_by(0) == {"R1"}
+        manager = role_registry.mask(["manager"])
+        assert snapshot.bookable_by(manager) == {"R1", "R2"}
+        assert snapshot.bookable_by(manager) is snapshot.bookable_by(manager)
+
+
+class TestRoomRepositoryCatalog:
+    """Tests for room writes invalidating the shared catalog"""
+
+    def test_room_writes_bump_generation(self, db_sessions):
+        """Test created and deleted rooms are seen by the next read"""
+        with db_sessions() as db:
+            repo = RoomRepository(db)
+            assert repo.get_catalog().get("R1") is None
+
+            generation = room_catalog.generation
+            room = repo.create_room_in_db(
+                Room(
+                    room_number="R1",
+                    capacity=4,
+                    description="Huddle room",
+                    request_only=False,
+                )
+            )
+            assert room_catalog.generation == generation + 1
+            assert repo.get_catalog().get("R1").capacity == 4
+
+            repo.delete_room_in_db(room)
+            assert repo.get_catalog().get("R1") is None
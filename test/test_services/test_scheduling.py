@@ -0,0 +1,337 @@
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+from zoneinfo import ZoneInfo
+from unittest.mock import Mock
+import pytest
+from app.schemas.booking import ResolveRequests
+from app.services.booking_service import BookingService
+from app.services.scheduling import (
+    ensure_disjoint,
+    expand_occurrences,
+    find_conflicts,
+    find_free_slots,
+    take_occurrences,
+    weighted_interval_schedule,
+)
+
+NOW = datetime(2030, 1, 7, 8)
+
+
+def at(hour: float) -> datetime:
+    return NOW.replace(hour=0) + timedelta(hours=hour)
+
+
+def booked(room_number: str, *hours: Tuple[float, float]) -> list:
+    """(id, room_number, start, end) rows for a room, in start order"""
+    return [
+        (booking_id, room_number, at(start), at(end))
+        for booking_id, (start, end) in enumerate(hours)
+    ]
+
+
+def free(intervals, room_numbers=("R1",), window=(9, 17), hours=1, limit=10):
+    """Free slots as hours of the day"""
+    start, end = at(window[0]), at(window[1])
+    slots = find_free_slots(
+        intervals, room_numbers, start, end, timedelta(hours=hours), limit
+    )
+    return {
+        room_number: [
+            ((start - at(0)) / timedelta(hours=1), (end - at(0)) / timedelta(hours=1))
+            for start, end in room_slots
+        ]
+        for room_number, room_slots in slots.items()
+    }
+
+
+def occurrence_starts(*args, **kwargs) -> list:
+    return [start for start, _ in expand_occurrences(*args, **kwargs)]
+
+
+def request(booking_id: int, start: float, end: float, made_hours_ago: float = 0):
+    """A pending booking as the resolver sees it"""
+    booking = Mock()
+    booking.id = booking_id
+    booking.start_time, booking.end_time = at(start), at(end)
+    booking.datetime_made = NOW - timedelta(hours=made_hours_ago)
+    booking.user.role_names = ["employee"]
+    return booking
+
+
+def resolve(requests, **options) -> list:
+    options = ResolveRequests(**options)
+    return weighted_interval_schedule(
+        [
+            (
+                booking.id,
+                booking.start_time,
+                booking.end_time,
+                BookingService.request_weight(booking, options, NOW),
+            )
+            for booking in requests
+        ]
+    )
+
+
+class TestFindFreeSlots:
+    """Tests for the earliest free windows in each room"""
+
+    def test_empty_room_is_free_all_window(self):
+        """Test a room without bookings, or with none listed, is one free slot"""
+        assert free([], room_numbers=["R1", "R2"]) == {
+            "R1": [(9, 17)],
+            "R2": [(9, 17)],
+        }
+
+    def test_gaps_at_window_edges(self):
+        """Test the gaps before the first and after the last booking are found"""
+        assert free(booked("R1", (11, 12), (14, 15))) == {
+            "R1": [(9, 11), (12, 14), (15, 17)]
+        }
+
+    def test_back_to_back_bookings_leave_no_gap(self):
+        """Test touching bookings are treated as one busy stretch"""
+        assert free(booked("R1", (9, 10), (10, 11), (11, 12))) == {"R1": [(12, 17)]}
+
+    def test_overlapping_bookings_merged(self):
+        """Test a booking inside a longer one does not open a gap"""
+        assert free(booked("R1", (10, 14), (11, 12), (15, 16))) == {
+            "R1": [(9, 10), (14, 15), (16, 17)]
+        }
+
+    def test_minimum_duration(self):
+        """Test gaps shorter than the duration are skipped and equal ones kept"""
+        intervals = booked("R1", (9.5, 10), (12, 13), (15.5, 17))
+        assert free(intervals, hours=2) == {"R1": [(10, 12), (13, 15.5)]}
+        assert free(intervals, hours=2.5) == {"R1": [(13, 15.5)]}
+        assert free(intervals, hours=3) == {"R1": []}
+
+    def test_clipped_to_window(self):
+        """Test bookings straddling the window edges shorten the slots"""
+        assert free(booked("R1", (7, 10), (16, 20))) == {"R1": [(10, 16)]}
+        assert free(booked("R1", (7, 20))) == {"R1": []}
+        assert free(booked("R1", (18, 19))) == {"R1": [(9, 17)]}
+
+    def test_limit(self):
+        """Test at most `limit` slots are returned per room, earliest first"""
+        intervals = booked("R1", (10, 11), (12, 13), (14, 15))
+        assert free(intervals, limit=2) == {"R1": [(9, 10), (11, 12)]}
+
+    def test_rooms_kept_apart(self):
+        """Test each room only sees its own bookings"""
+        intervals = booked("R1", (9, 12)) + booked("R2", (13, 17))
+        assert free(intervals, room_numbers=["R1", "R2"]) == {
+            "R1": [(12, 17)],
+            "R2": [(9, 13)],
+        }
+
+    def test_aware_window(self):
+        """Test an aware window is compared as naive, like the stored times"""
+        slots = find_free_slots(
+            booked("R1", (9, 10)),
+            ["R1"],
+            at(9).replace(tzinfo=timezone.utc),
+            at(11).replace(tzinfo=timezone.utc),
+            timedelta(hours=1),
+            10,
+        )
+        assert slots == {"R1": [(at(10), at(11))]}
+
+
+class TestExpandOccurrences:
+    """Tests for expanding a recurring booking into its occurrences"""
+
+    def test_count(self):
+        """Test count includes the first occurrence and keeps the duration"""
+        occurrences = list(expand_occurrences(at(9), at(10.5), "daily", count=3))
+        assert occurrences == [
+            (at(9) + timedelta(days=day), at(10.5) + timedelta(days=day))
+            for day in range(3)
+        ]
+
+    def test_until_is_inclusive(self):
+        """Test an occurrence starting exactly at until is the last one"""
+        until = at(9) + timedelta(days=14)
+        starts = occurrence_starts(at(9), at(10), "weekly", until=until)
+        assert starts == [at(9) + timedelta(days=day) for day in (0, 7, 14)]
+        until -= timedelta(minutes=1)
+        starts = occurrence_starts(at(9), at(10), "weekly", until=until)
+        assert starts == [at(9), at(9) + timedelta(days=7)]
+
+    def test_weekly_keeps_the_weekday(self):
+        """Test weekly occurrences, every other week here, fall on the weekday of
+        the first one, since series take no separate BYDAY"""
+        starts = occurrence_starts(at(9), at(10), "weekly", interval=2, count=4)
+        assert [start.weekday() for start in starts] == [NOW.weekday()] * 4
+        assert starts[-1] - starts[0] == timedelta(weeks=6)
+
+    def test_monthly_skips_short_months(self):
+        """Test a series on the 31st skips months without one, as RRULE does"""
+        start = datetime(2030, 1, 31, 9)
+        end = start + timedelta(hours=1)
+        starts = occurrence_starts(start, end, "monthly", count=3)
+        assert [start.month for start in starts] == [1, 3, 5]
+
+    def test_wall_clock_kept_across_dst(self):
+        """Test occurrences stay at the same local time when the clocks change,
+        as aware times are stored naive"""
+        london = ZoneInfo("Europe/London")
+        # British Summer Time starts at 01:00 on 31 March 2030
+        start = datetime(2030, 3, 30, 9, tzinfo=london)
+        occurrences = list(
+            expand_occurrences(start, start + timedelta(hours=1), "daily", count=3)
+        )
+        assert occurrences == [
+            (datetime(2030, 3, day, 9), datetime(2030, 3, day, 10))
+            for day in (30, 31)
+        ] + [(datetime(2030, 4, 1, 9), datetime(2030, 4, 1, 10))]
+
+    def test_booking_spanning_dst_change(self):
+        """Test an overnight booking keeps its length on the night clocks change"""
+        start = datetime(2030, 3, 30, 23)
+        (_, (second_start, second_end)) = expand_occurrences(
+            start, start + timedelta(hours=4), "daily", count=2
+        )
+        assert (second_start, second_end) == (
+            datetime(2030, 3, 31, 23),
+            datetime(2030, 4, 1, 3),
+        )
+
+    def test_take_occurrences_limit(self):
+        """Test a series longer than the limit is refused without expanding it all"""
+        year = expand_occurrences(at(9), at(10), "daily", count=366)
+        assert len(take_occurrences(year, 366)) == 366
+        endless = expand_occurrences(at(9), at(10), "daily", until=datetime(9999, 1, 1))
+        with pytest.raises(ValueError, match="more than 366"):
+            take_occurrences(endless, 366)
+
+
+class TestEnsureDisjoint:
+    """Tests for rejecting series whose occurrences overlap each other"""
+
+    def test_overlap_rejected(self):
+        """Test an occurrence longer than the gap to the next is refused"""
+        occurrences = list(expand_occurrences(at(9), at(9 + 36), "daily", count=2))
+        with pytest.raises(ValueError, match="overlap each other"):
+            ensure_disjoint(occurrences)
+
+    @pytest.mark.parametrize("count", [1, 2, 3])
+    def test_touching_allowed(self, count):
+        """Test back-to-back and lone occurrences pass"""
+        ensure_disjoint(list(expand_occurrences(at(9), at(33), "daily", count=count)))
+
+    def test_empty(self):
+        """Test no occurrences pass"""
+        ensure_disjoint([])
+
+
+class TestFindConflicts:
+    """Tests for flagging candidates that clash with existing bookings"""
+
+    def test_no_existing_or_candidates(self):
+        """Test nothing conflicts with an empty room and nothing is flagged"""
+        assert find_conflicts([], [(at(9), at(10))]).tolist() == [False]
+        assert find_conflicts(booked("R1", (9, 10)), []).tolist() == []
+
+    def test_touching_does_not_conflict(self):
+        """Test half-open intervals: ending as another starts is fine"""
+        existing = booked("R1", (10, 11))
+        candidates = [(at(9), at(10)), (at(11), at(12)), (at(10.5), at(11.5))]
+        assert find_conflicts(existing, candidates).tolist() == [False, False, True]
+
+    def test_contained_and_containing(self):
+        """Test candidates inside a booking and spanning one both conflict"""
+        existing = booked("R1", (10, 12))
+        candidates = [(at(10.5), at(11)), (at(9), at(13)), (at(12), at(13))]
+        assert find_conflicts(existing, candidates).tolist() == [True, True, False]
+
+    def test_long_booking_behind_short_ones(self):
+        """Test a long early booking is found past later, shorter ones"""
+        existing = booked("R1", (8, 18), (9, 10), (12, 13))
+        candidates = [(at(15), at(16)), (at(18), at(19))]
+        assert find_conflicts(existing, candidates).tolist() == [True, False]
+
+    def test_unsorted_and_aware_inputs(self):
+        """Test existing rows in any order and aware candidates are handled"""
+        existing = booked("R1", (14, 15), (9, 10))
+        candidates = [
+            (at(9).replace(tzinfo=timezone.utc), at(10).replace(tzinfo=timezone.utc)),
+            (at(12), at(13)),
+        ]
+        assert find_conflicts(existing, candidates).tolist() == [True, False]
+
+
+class TestWeightedIntervalSchedule:
+    """Tests for choosing the heaviest set of non-overlapping requests"""
+
+    def test_empty(self):
+        """Test no intervals gives no keys"""
+        assert weighted_interval_schedule([]) == []
+
+    def test_keeps_touching_intervals(self):
+        """Test intervals that only touch are all kept, in start order"""
+        intervals = [
+            ("c", at(11), at(12), 1),
+            ("a", at(9), at(10), 1),
+            ("b", at(10), at(11), 1),
+        ]
+        assert weighted_interval_schedule(intervals) == ["a", "b", "c"]
+
+    def test_heaviest_combination_wins(self):
+        """Test one heavy interval beats the lighter ones it overlaps and the
+        other way round"""
+        short = [("a", at(9), at(10), 1), ("b", at(10), at(11), 1)]
+        assert weighted_interval_schedule([("long", at(9), at(12), 3), *short]) == [
+            "long"
+        ]
+        assert weighted_interval_schedule([("long", at(9), at(12), 1), *short]) == [
+            "a",
+            "b",
+        ]
+
+    @pytest.mark.parametrize("order", [["long", "a", "b"], ["a", "b", "long"]])
+    def test_ties_prefer_more_intervals(self, order):
+        """Test equal totals go to the larger set whatever the input order"""
+        intervals = {
+            "long": ("long", at(9), at(11), 2),
+            "a": ("a", at(9), at(10), 1),
+            "b": ("b", at(10), at(11), 1),
+        }
+        assert weighted_interval_schedule([intervals[key] for key in order]) == [
+            "a",
+            "b",
+        ]
+
+    def test_identical_intervals_pick_one(self):
+        """Test only one of two identical intervals is chosen"""
+        chosen = weighted_interval_schedule(
+            [("a", at(9), at(10), 1), ("b", at(9), at(10), 1)]
+        )
+        assert len(chosen) == 1
+
+    def test_zero_weight_never_chosen(self):
+        """Test an interval worth nothing is left out even with no competition"""
+        assert weighted_interval_schedule([("a", at(9), at(10), 0)]) == []
+
+    def test_count_weight_maximises_requests(self):
+        """Test by count the most requests are approved"""
+        requests = [request(1, 9, 12), request(2, 9, 10), request(3, 10, 11)]
+        assert resolve(requests) == [2, 3]
+
+    def test_duration_weight_maximises_booked_time(self):
+        """Test by duration the longest total time is approved"""
+        requests = [request(1, 9, 12), request(2, 9, 10), request(3, 10, 11)]
+        assert resolve(requests, weight_by="duration") == [1]
+
+    def test_age_weight_prefers_oldest(self):
+        """Test by age the request waiting longest wins a clash"""
+        requests = [request(1, 9, 10, made_hours_ago=1), request(2, 9, 10, 48)]
+        assert resolve(requests, weight_by="age") == [2]
+        requests = [request(1, 9, 10, made_hours_ago=48), request(2, 9, 10, 1)]
+        assert resolve(requests, weight_by="age") == [1]
+
+    def test_role_weights_boost_requests(self):
+        """Test a role weight lets one request beat two it overlaps"""
+        requests = [request(1, 9, 12), request(2, 9, 10), request(3, 10, 11)]
+        requests[0].user.role_names = ["manager"]
+        assert resolve(requests, role_weights={"manager": 2}) == [1]
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+import pytest
+from app.db.models import Booking, Room, User
+from app.services import warmup
+from app.services.availability_index import availability_index
+from app.services.room_catalog import room_catalog
+from app.services.warmup import Readiness, warm_up
+from test.conftest import app
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    readiness = Readiness()
+    monkeypatch.setattr(warmup, "readiness", readiness)
+    return readiness
+
+
+class TestWarmUp:
+    """Tests for the background warmup behind /health/ready"""
+
+    def test_ready_after_every_step(self, monkeypatch, readiness):
+        """Test each step is timed and the process is then marked ready"""
+        ran = []
+        steps = [("first", lambda: ran.append(1)), ("second", lambda: ran.append(2))]
+        monkeypatch.setattr(warmup, "warmup_steps", lambda app: steps)
+
+        warm_up(app)
+
+        state = readiness.snapshot()
+        assert ran == [1, 2]
+        assert state["ready"] is True
+        assert state["error"] is None
+        assert list(state["steps"]) == ["first", "second"]
+
+    def test_failed_step_keeps_process_unready(self, monkeypatch, readiness):
+        """Test a failing step is reported and later steps are skipped"""
+
+        def fail():
+            raise RuntimeError("database is locked")
+
+        monkeypatch.setattr(
+            warmup,
+            "warmup_steps",
+            lambda app: [("failing", fail), ("never", pytest.fail)],
+        )
+
+        warm_up(app)
+
+        assert readiness.snapshot() == {
+            "ready": False,
+            "error": "database is locked",
+            "steps": {},
+        }
+
+    def test_loads_availability_index(self, monkeypatch, db_sessions):
+        """Test the index is loaded with the accepted bookings only"""
+        start = datetime(2030, 1, 7, 9)
+        with db_sessions() as db:
+            user = User(name="Test User", username="testuser", hashed_password="x")
+            room = Room(
+                room_number="R1",
+                capacity=4,
+                description="Huddle room",
+                request_only=False,
+            )
+            for day, accepted in ((0, True), (1, False)):
+                db.add(
+                    Booking(
+                        user=user,
+                        room=room,
+                        start_time=start + timedelta(days=day),
+                        end_time=start + timedelta(days=day, hours=1),
+                        accepted=accepted,
+                        datetime_made=start,
+                    )
+                )
+            db.commit()
+        monkeypatch.setattr(warmup, "SessionLocal", db_sessions)
+
+        try:
+            warmup._load_availability_index()
+
+            assert availability_index.is_warm
+            assert not availability_index.room_is_available(
+                "R1", start, start + timedelta(hours=1)
+            )
+            assert availability_index.room_is_available(
+                "R1", start + timedelta(days=1), start + timedelta(days=1, hours=1)
+            )
+        finally:
+            availability_index.invalidate()
+
+    def test_loads_room_catalog(self, monkeypatch, db_sessions):
+        """Test the catalog is loaded so the first request does not have to"""
+        with db_sessions() as db:
+            db.add(
+                Room(
+                    room_number="R1",
+                    capacity=4,
+                    description="Huddle room",
+                    request_only=False,
+                )
+            )
+            db.commit()
+        monkeypatch.setattr(warmup, "SessionLocal", db_sessions)
+
+        warmup._load_room_catalog()
+
+        catalog = room_catalog.get(pytest.fail)
+        assert catalog.get("R1").capacity == 4
+
+    def test_steps(self, monkeypatch):
+        """Test the catalog is preloaded, and the index only when enabled"""
+        monkeypatch.setattr(warmup.Config, "AVAILABILITY_INDEX_ENABLED", False)
+        assert [step for step, _ in warmup.warmup_steps(app)] == [
+            "bcrypt_cost",
+            "openapi_schema",
+            "room_catalog",
+        ]
+        monkeypatch.setattr(warmup.Config, "AVAILABILITY_INDEX_ENABLED", True)
+        assert [step for step, _ in warmup.warmup_steps(app)][-1] == (
+            "availability_index"
+        )